@@ -0,0 +1,77 @@
+# Custom modules
+from guess_history import TOO_HIGH, TOO_LOW
+
+CORRECT = 0
+
+
+class EvilHost:
+    # A host that never commits to an answer. It only keeps the interval
+    # of answers that are still consistent with its replies, and every
+    # reply keeps the bigger half of it, so a guess is only correct once
+    # nothing else is left. Two integers of state and O(1) work per guess,
+    # whatever the size of the range.
+    __slots__ = ("low", "high")
+
+    def __init__(self, range_start: int, range_end: int):
+        if range_start > range_end:
+            raise ValueError("range_start must not be greater than "
+                             "range_end")
+        self.low = range_start
+        self.high = range_end
+
+    def remaining(self):
+        return self.high - self.low + 1
+
+    def reply(self, guess: int):
+        # TOO_HIGH, TOO_LOW or CORRECT. Guesses that were already ruled out
+        # get the only consistent reply and change nothing.
+        if guess < self.low:
+            return TOO_LOW
+        if guess > self.high:
+            return TOO_HIGH
+        below = guess - self.low
+        above = self.high - guess
+        if below == above == 0:
+            return CORRECT
+        if above >= below:
+            self.low = guess + 1
+            return TOO_LOW
+        self.high = guess - 1
+        return TOO_HIGH
+
+    def answer(self):
+        # An answer consistent with every reply so far, revealed when the
+        # game ends
+        return self.low
+
+
+def adversarialWorstCase(strategy, start_num: int, end_num: int,
+                         max_guesses: int = None):
+    # Plays a GuessStrategy against the evil host once and returns
+    # (guesses, answer): an answer that takes the strategy that many
+    # guesses. For strategies that never need fewer guesses on a bigger
+    # range, bisection and the split strategies among them, that is their
+    # exact worst case over every answer. For the rest it is a lower
+    # bound. With max_guesses the game stops there, counting
+    # max_guesses + 1 like playStrategy.
+    host = EvilHost(start_num, end_num)
+    strategy.newGame(start_num, end_num)
+    low, high = start_num, end_num
+    num_guesses = 0
+    while True:
+        if num_guesses == max_guesses:
+            num_guesses += 1
+            break
+        guess = strategy.nextGuess(low, high)
+        num_guesses += 1
+        reply = host.reply(guess)
+        if reply == CORRECT:
+            break
+        if reply == TOO_HIGH:
+            high = min(high, guess - 1)
+        else:
+            low = max(low, guess + 1)
+    answer = host.answer()
+    strategy.observeAnswer(answer)
+
+    return num_guesses, answer
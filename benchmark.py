@@ -0,0 +1,385 @@
+# Built-in modules
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Custom modules
+from adversary import adversarialWorstCase
+from bot import GuessBot
+from checkpoint import CheckpointBuilder, CheckpointWriter, loadCheckpoint
+from engine import ScriptedIO
+from game import Game, runOptimalSim
+from rng import AnswerStream
+from server import GameSession
+from simulation import simulateAllAnswers
+from stat_manager import StatManager
+from stat_mmap import COUNTER_SUFFIX, MappedStatManager
+from stat_sharded import ShardedStatManager
+from strategies import BisectionStrategy
+
+SEED = 1234
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_REPEAT = 5
+
+
+class BisectionIO(ScriptedIO):
+    # Plays every game by bisection, reacting to the game's own messages
+    # the same way a player reading the terminal would
+    def __init__(self):
+        super().__init__((), keep_output=False)
+        self.low = None
+        self.high = None
+        self.last_guess = None
+
+    def readLine(self, prompt: str):
+        if self.low is None:
+            # "Enter a number between <low> and <high>, inclusive: "
+            words = prompt.replace(",", "").split()
+            self.low, self.high = int(words[4]), int(words[6])
+        self.last_guess = GuessBot(self.low, self.high).getNextGuess()
+        return str(self.last_guess)
+
+    def write(self, message: str = ''):
+        if message.startswith("Your guess was higher"):
+            self.high = self.last_guess - 1
+        elif message.startswith("Your guess was lower"):
+            self.low = self.last_guess + 1
+        elif message.startswith("The number was"):
+            self.low = self.high = None
+
+
+class BenchResult:
+    def __init__(self, value: float, unit: str, higher_is_better: bool):
+        self.value = value
+        self.unit = unit
+        self.higher_is_better = higher_is_better
+
+    def to_json(self):
+        return {"value": self.value, "unit": self.unit,
+                "higher_is_better": self.higher_is_better}
+
+
+def bestOf(repeat: int, func):
+    # Best wall time of several runs, with the RNG reset before each one
+    best = float("inf")
+    for _ in range(repeat):
+        random.seed(SEED)
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def throughput(repeat: int, num_ops: int, func):
+    return BenchResult(num_ops / bestOf(repeat, func), "ops/s", True)
+
+
+def latency(repeat: int, num_ops: int, func):
+    seconds = bestOf(repeat, func)
+    return BenchResult(seconds / num_ops * 1000, "ms/op", False)
+
+
+def benchBotGuesses(scale: int, repeat: int):
+    num_searches = 2000 * scale
+
+    def run():
+        for answer in range(num_searches):
+            bot = GuessBot(0, num_searches)
+            bot_guess = bot.getNextGuess()
+            while bot_guess != answer:
+                if bot_guess > answer:
+                    bot.setUpperBound(bot_guess - 1)
+                else:
+                    bot.setLowerBound(bot_guess + 1)
+                bot_guess = bot.getNextGuess()
+
+    return throughput(repeat, num_searches, run)
+
+
+def benchOptimalSim(end_num: int, num_sims: int):
+    def bench(scale: int, repeat: int):
+        total = num_sims * scale
+
+        def run():
+            for _ in range(total):
+                runOptimalSim(1, end_num, io.StringIO())
+
+        return throughput(repeat, total, run)
+
+    return bench
+
+
+def benchAnswers(scale: int, repeat: int):
+    num_answers = 100000 * scale
+
+    def run():
+        stream = AnswerStream(SEED)
+        for _ in range(num_answers):
+            stream.randint(1, 1000)
+
+    return throughput(repeat, num_answers, run)
+
+
+def benchAllAnswers(scale: int, repeat: int):
+    def run():
+        for i in range(100 * scale):
+            simulateAllAnswers(1, 10 ** 18 + i)
+
+    return throughput(repeat, 100 * scale, run)
+
+
+def benchAdversary(scale: int, repeat: int):
+    # Worst case of the bot on huge ranges, one evil host pass each
+    def run():
+        for i in range(100 * scale):
+            adversarialWorstCase(BisectionStrategy(), 1, 10 ** 300 + i)
+
+    return throughput(repeat, 100 * scale, run)
+
+
+def benchPlayGame(difficulty: str):
+    def bench(scale: int, repeat: int):
+        num_games = 200 * scale
+        with tempfile.TemporaryDirectory() as temp_dir:
+            game = Game(StatManager(), io=BisectionIO())
+            game.SAVEFILE_NAME = os.path.join(temp_dir, "persistent")
+            game.setDifficulty(difficulty)
+
+            def run():
+                for _ in range(num_games):
+                    game.playGame()
+
+            return throughput(repeat, num_games, run)
+
+    return bench
+
+
+def statManagerWithGames(num_games: int):
+    sm = StatManager()
+    rng = random.Random(SEED)
+    for _ in range(num_games):
+        sm.recordGame(rng.choice(["easy", "medium", "hard"]),
+                      rng.random() < 0.5, rng.randint(1, 10), rng.random())
+    return sm
+
+
+def benchSaveLoad(num_games: int, operation: str):
+    def bench(scale: int, repeat: int):
+        num_ops = 50 * scale
+        sm = statManagerWithGames(num_games)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "persistent")
+            sm.save(filename)
+
+            def run():
+                for _ in range(num_ops):
+                    getattr(sm, operation)(filename)
+
+            return latency(repeat, num_ops, run)
+
+    return bench
+
+
+def benchMappedSave(scale: int, repeat: int):
+    # Games recorded in place, with snapshots throttled to one a minute
+    num_ops = 1000 * scale
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "persistent")
+        sm = MappedStatManager(f"{filename}{COUNTER_SUFFIX}",
+                               snapshot_interval=60)
+
+        def run():
+            for _ in range(num_ops):
+                sm.wins += 1
+                sm.num_guesses += 4
+                sm.save(filename)
+
+        try:
+            return latency(repeat, num_ops, run)
+        finally:
+            sm.close()
+
+
+def benchShardedCounters(scale: int, repeat: int):
+    # Guesses counted from several threads into one shared manager
+    num_threads = 4
+    num_ops = 20000 * scale
+    sm = ShardedStatManager()
+
+    def count():
+        for _ in range(num_ops // num_threads):
+            sm.increment("num_guesses")
+
+    def run():
+        threads = [threading.Thread(target=count)
+                   for _ in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return latency(repeat, num_ops, run)
+
+
+def playingSessions(num_sessions: int):
+    # Sessions a few guesses into hard games
+    stat_manager = StatManager()
+    sessions = []
+    for _ in range(num_sessions):
+        session = GameSession(stat_manager)
+        session.game.setDifficulty("hard")
+        session.startGame()
+        for _ in range(3):
+            session.handleLine(str(session.engine.hint()))
+        sessions.append(session)
+    return sessions
+
+
+def checkpointSessions(sessions, writer):
+    builder = CheckpointBuilder()
+    for session in sessions:
+        builder.add(session.session_id, session.game, session.engine,
+                    session.in_game)
+    writer.submit(builder.encode())
+
+
+def benchSessionGuesses(checkpoint_every: int):
+    # Guesses spread over 1000 live sessions, optionally with everything
+    # checkpointed every checkpoint_every guesses. The difference between
+    # the two runs is the checkpoint overhead per guess.
+    def bench(scale: int, repeat: int):
+        num_guesses = 20000 * scale
+        sessions = playingSessions(1000)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            writer = CheckpointWriter(os.path.join(temp_dir, "sessions"))
+
+            def run():
+                for guess_index in range(num_guesses):
+                    session = sessions[guess_index % len(sessions)]
+                    if not session.in_game:
+                        session.startGame()
+                    session.handleLine(str(session.engine.hint()))
+                    if checkpoint_every and \
+                            guess_index % checkpoint_every == 0:
+                        checkpointSessions(sessions, writer)
+
+            try:
+                return latency(repeat, num_guesses, run)
+            finally:
+                writer.close()
+
+    return bench
+
+
+def benchCheckpointLoad(num_sessions: int):
+    # What a restarted server does before accepting connections
+    def bench(scale: int, repeat: int):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "sessions")
+            writer = CheckpointWriter(filename)
+            checkpointSessions(playingSessions(num_sessions * scale),
+                               writer)
+            writer.close()
+            return latency(repeat, 1, lambda: loadCheckpoint(filename))
+
+    return bench
+
+
+BENCHMARKS = {
+    "bot_next_guess": benchBotGuesses,
+    "optimal_sim_small": benchOptimalSim(1000, 500),
+    "optimal_sim_huge": benchOptimalSim(10 ** 300, 20),
+    "all_answers_huge": benchAllAnswers,
+    "batched_answers": benchAnswers,
+    "adversary_huge": benchAdversary,
+    "play_game_easy": benchPlayGame("easy"),
+    "play_game_hard": benchPlayGame("hard"),
+    "stat_save_empty": benchSaveLoad(0, "save"),
+    "stat_load_empty": benchSaveLoad(0, "load"),
+    "stat_save_1k_games": benchSaveLoad(1000, "save"),
+    "stat_load_1k_games": benchSaveLoad(1000, "load"),
+    "stat_save_mapped": benchMappedSave,
+    "stat_sharded_threads": benchShardedCounters,
+    "session_guess": benchSessionGuesses(0),
+    "session_guess_checkpointed": benchSessionGuesses(2000),
+    "checkpoint_load_1k": benchCheckpointLoad(1000),
+    "checkpoint_load_10k": benchCheckpointLoad(10000),
+}
+
+
+def runBenchmarks(names=None, scale: int = 1, repeat: int = DEFAULT_REPEAT):
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        results[name] = bench(scale, repeat).to_json()
+
+    return {
+        "seed": SEED,
+        "scale": scale,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+def compareResults(current: dict, baseline: dict,
+                   threshold: float = DEFAULT_THRESHOLD):
+    # Returns (name, change) for every benchmark that got worse than the
+    # baseline by more than threshold, as a fraction of the baseline
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or base["value"] == 0:
+            continue
+        change = (result["value"] - base["value"]) / base["value"]
+        if result["higher_is_better"]:
+            change = -change
+        if change > threshold:
+            regressions.append((name, change))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the simulation, game loop and save hot paths"
+    )
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS))
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare with stored results")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.only, args.scale, args.repeat)
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compareResults(results, baseline, args.threshold)
+        for name, change in regressions:
+            print(f"REGRESSION {name}: {change:.1%} worse than baseline",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
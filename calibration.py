@@ -0,0 +1,167 @@
+# Built-in modules
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+# Custom modules
+from difficulty import DIFFICULTIES, Difficulty
+from rng import AnswerStream, deriveSeed
+from simulation import SimSummary, depthHistogram
+from strategies import (BisectionStrategy, NoisyBisectionStrategy,
+                        RandomPickStrategy, playStrategy)
+
+DEFAULT_TARGET = 0.5
+DEFAULT_GAMES = 20000
+DEFAULT_MODEL = "casual"
+# Games per stream. Fixed so results don't depend on worker count
+SHARD_SIZE = 2000
+
+# Imperfect players to calibrate against, built from a seed inside each
+# worker so only the name has to be sent to it
+PLAYER_MODELS = {
+    "expert": lambda seed: BisectionStrategy(),
+    "skilled": lambda seed: NoisyBisectionStrategy(0.2, seed),
+    "casual": lambda seed: NoisyBisectionStrategy(0.5, seed),
+    "random": lambda seed: RandomPickStrategy(seed),
+}
+
+
+def calibrationShard(model_name: str, start_num: int, end_num: int,
+                     num_games: int, seed: int):
+    # The player and the answers get separate streams so they can't
+    # correlate
+    strategy = PLAYER_MODELS[model_name](deriveSeed(seed, 0))
+    answers = AnswerStream(deriveSeed(seed, 1))
+    histogram = Counter()
+    for answer in answers.answers(start_num, end_num, num_games):
+        histogram[playStrategy(strategy, start_num, end_num, answer)] += 1
+    return dict(histogram)
+
+
+def guessDistribution(model_name: str, start_num: int, end_num: int,
+                      num_games: int = DEFAULT_GAMES, seed: int = 0,
+                      workers: int = None):
+    # How many guesses the model needs to find the answer when it has as
+    # many as it wants. That one histogram answers every chance count.
+    if model_name not in PLAYER_MODELS:
+        raise ValueError(f"unknown player model {model_name!r}")
+    if start_num > end_num:
+        raise ValueError("start_num must not be greater than end_num")
+    strategy = PLAYER_MODELS[model_name](seed)
+    if strategy.deterministic:
+        return SimSummary(dict(depthHistogram(end_num - start_num + 1,
+                                              strategy.splitOffset)))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = [(model_name, start_num, end_num,
+               min(SHARD_SIZE, num_games - shard_start),
+               deriveSeed(seed, index))
+              for index, shard_start in
+              enumerate(range(0, num_games, SHARD_SIZE))]
+    summary = SimSummary()
+
+    if workers == 1 or len(shards) <= 1:
+        for shard in shards:
+            summary.merge(SimSummary(calibrationShard(*shard)))
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for histogram in executor.map(calibrationShard, *zip(*shards)):
+            summary.merge(SimSummary(histogram))
+
+    return summary
+
+
+def chancesForWinRate(summary: SimSummary, target: float):
+    # Fewest chances whose win rate reaches target, and that win rate
+    if not 0 < target <= 1:
+        raise ValueError("target must be above 0 and at most 1")
+    total = summary.total
+    if total == 0:
+        raise ValueError("no games were simulated")
+    wins = 0
+    for num_guesses in sorted(summary.histogram):
+        wins += summary.histogram[num_guesses]
+        if wins >= target * total:
+            return num_guesses, wins / total
+
+    return summary.max, 1.0
+
+
+class CalibrationResult:
+    def __init__(self, difficulty: Difficulty, model_name: str,
+                 target: float, chances: int, win_rate: float,
+                 summary: SimSummary):
+        self.difficulty = difficulty
+        self.model_name = model_name
+        self.target = target
+        self.chances = chances
+        self.win_rate = win_rate
+        self.summary = summary
+
+    def __str__(self):
+        message = f"{self.difficulty.name} " \
+                  f"({self.difficulty.range_start} to " \
+                  f"{self.difficulty.range_end}): {self.chances} chances " \
+                  f"give a {self.model_name} player a " \
+                  f"{self.win_rate:.1%} win rate " \
+                  f"(target {self.target:.0%})"
+        if self.difficulty.chances:
+            message += f", currently {self.difficulty.chances} chances"
+        return message
+
+
+def calibrateDifficulty(difficulty: Difficulty, target: float = DEFAULT_TARGET,
+                        model_name: str = DEFAULT_MODEL,
+                        num_games: int = DEFAULT_GAMES, seed: int = 0,
+                        workers: int = None):
+    summary = guessDistribution(model_name, difficulty.range_start,
+                                difficulty.range_end, num_games, seed,
+                                workers)
+    chances, win_rate = chancesForWinRate(summary, target)
+    return CalibrationResult(difficulty, model_name, target, chances,
+                             win_rate, summary)
+
+
+def calibrateAll(target: float = DEFAULT_TARGET,
+                 model_name: str = DEFAULT_MODEL,
+                 num_games: int = DEFAULT_GAMES, seed: int = 0,
+                 workers: int = None):
+    return [calibrateDifficulty(difficulty, target, model_name, num_games,
+                                seed, workers)
+            for difficulty in DIFFICULTIES.values()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pick chances that give a player model a target "
+                    "win rate"
+    )
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET)
+    parser.add_argument("--model", choices=list(PLAYER_MODELS),
+                        default=DEFAULT_MODEL)
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--range", type=int, nargs=2,
+                        metavar=("START", "END"),
+                        help="Calibrate this range instead of the "
+                             "registered difficulties")
+    args = parser.parse_args(argv)
+
+    if args.range:
+        # Not registered, only used to describe the range
+        difficulties = [Difficulty("custom", *args.range, 0, "", "")]
+    else:
+        difficulties = list(DIFFICULTIES.values())
+    for difficulty in difficulties:
+        print(calibrateDifficulty(difficulty, args.target, args.model,
+                                  args.games, args.seed, args.workers))
+
+    return 0
+
+
+if __name__ == "__main__":
+    main()
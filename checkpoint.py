@@ -0,0 +1,366 @@
+# Built-in modules
+from array import array
+import json
+import struct
+import threading
+
+# Custom modules
+from difficulty import DIFFICULTIES
+from guess_history import GuessHistory
+from stat_binary import packNames, unpackNames
+import game_exceptions
+import util
+
+MAGIC = b"GTNCKPT1"
+# magic, sessions in the blocks, guesses in the blocks, overflow bytes
+HEADER = struct.Struct("<8sIIQ")
+NO_TREE_INDEX = -1
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# Every session is one row in each of these blocks. Rows are stored
+# back to back so a whole block is written and read with a single copy.
+INT_FIELDS = ("range_start", "range_end", "chances", "answer", "tries_left",
+              "low", "high", "tree_index")
+COUNT_FIELDS = ("guess_count", "num_wasted")
+# Bits of each session's flags byte
+FLAG_IN_GAME = 1
+FLAG_EVIL_HOST = 2
+# The game's evil host hasn't picked an answer yet, the answer column is
+# unused
+FLAG_NO_ANSWER = 4
+
+
+def padTo8(num_bytes: int):
+    return -num_bytes % 8
+
+
+class SessionState:
+    # Everything needed to put one session back: the Game's config and,
+    # when a game is in progress, the engine's state and guess history.
+    # answer is None while an evil host game hasn't picked one yet.
+    __slots__ = ("session_id", "difficulty", "in_game", "range_start",
+                 "range_end", "chances", "answer", "tries_left", "low",
+                 "high", "tree_index", "started", "num_wasted", "guesses",
+                 "replies", "evil_host")
+
+    def __init__(self, session_id: str, difficulty: str,
+                 range_start: int = 0, range_end: int = 0, chances: int = 0,
+                 in_game: bool = False, answer: int = 0, tries_left: int = 0,
+                 low: int = 0, high: int = 0,
+                 tree_index: int = NO_TREE_INDEX, started: float = 0.0,
+                 num_wasted: int = 0, guesses=(), replies=(),
+                 evil_host: bool = False):
+        self.session_id = session_id
+        self.difficulty = difficulty
+        self.range_start = range_start
+        self.range_end = range_end
+        self.chances = chances
+        self.in_game = in_game
+        self.answer = answer
+        self.tries_left = tries_left
+        self.low = low
+        self.high = high
+        self.tree_index = tree_index
+        self.started = started
+        self.num_wasted = num_wasted
+        self.guesses = guesses
+        self.replies = replies
+        self.evil_host = evil_host
+
+    @classmethod
+    def capture(cls, session_id: str, game, engine, in_game: bool):
+        state = cls(session_id, game.DIFFICULTY, game.ANSWER_RANGE_START,
+                    game.ANSWER_RANGE_END, game.STARTING_CHANCES)
+        state.evil_host = game.evil_host
+        if in_game:
+            history = engine.history
+            state.in_game = True
+            state.answer = None if engine.host is not None else engine.answer
+            state.tries_left = engine.tries_left
+            state.low = history.low
+            state.high = history.high
+            if engine.tree_index is not None:
+                state.tree_index = engine.tree_index
+            state.started = engine.started
+            state.num_wasted = history.num_wasted
+            state.guesses = history.guesses
+            state.replies = history.replies
+        return state
+
+    def restore(self, game, engine):
+        # Puts this state into a fresh Game and GameEngine
+        if self.difficulty not in DIFFICULTIES:
+            # Unregistered since the checkpoint, wins couldn't be counted
+            raise game_exceptions.InvalidSaveFormatError
+        game.DIFFICULTY = self.difficulty
+        game.setGenerateStartEnd(self.range_start, self.range_end)
+        game.STARTING_CHANCES = self.chances
+        game.evil_host = self.evil_host
+        if not self.in_game:
+            return
+        history = GuessHistory.restore(self.low, self.high, self.guesses,
+                                       self.replies, self.num_wasted)
+        engine.resumeGame(self.answer, self.tries_left, history,
+                          self.started,
+                          None if self.tree_index == NO_TREE_INDEX
+                          else self.tree_index)
+
+    def to_json(self):
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields["guesses"] = list(self.guesses)
+        fields["replies"] = list(self.replies)
+        return fields
+
+    @classmethod
+    def from_json(cls, fields: dict):
+        state = cls(**fields)
+        state.guesses = list(state.guesses)
+        state.replies = array("b", state.replies)
+        return state
+
+
+class CheckpointBuilder:
+    # Collects sessions straight from their Game and GameEngine into flat
+    # lists, which become typed arrays in one call each when encoded.
+    # Sessions with numbers past 64 bits, which only custom ranges can
+    # have, go into a small JSON section instead.
+    def __init__(self):
+        self.session_ids = []
+        self.difficulties = []
+        self.ints = []
+        self.started = []
+        self.counts = []
+        self.flags = []
+        self.guesses = array("q")
+        self.replies = array("b")
+        self.overflow = []
+
+    def __len__(self):
+        return len(self.session_ids) + len(self.overflow)
+
+    def add(self, session_id: str, game, engine, in_game: bool):
+        flags = FLAG_EVIL_HOST if game.evil_host else 0
+        if in_game:
+            history = engine.history
+            tree_index = engine.tree_index
+            flags |= FLAG_IN_GAME
+            answer = engine.answer
+            if engine.host is not None:
+                flags |= FLAG_NO_ANSWER
+                answer = 0
+            row = (game.ANSWER_RANGE_START, game.ANSWER_RANGE_END,
+                   game.STARTING_CHANCES, answer, engine.tries_left,
+                   history.low, history.high,
+                   NO_TREE_INDEX if tree_index is None else tree_index)
+            guesses = history.guesses
+        else:
+            row = (game.ANSWER_RANGE_START, game.ANSWER_RANGE_END,
+                   game.STARTING_CHANCES, 0, 0, 0, 0, NO_TREE_INDEX)
+            guesses = ()
+        if min(row) < INT64_MIN or max(row) > INT64_MAX or \
+                type(guesses) is list:
+            self.overflow.append(SessionState.capture(
+                session_id, game, engine, in_game
+            ).to_json())
+            return
+
+        self.session_ids.append(session_id)
+        self.difficulties.append(game.DIFFICULTY)
+        self.ints.extend(row)
+        self.flags.append(flags)
+        if in_game:
+            self.started.append(engine.started)
+            self.counts.append(len(guesses))
+            self.counts.append(history.num_wasted)
+            self.guesses.extend(guesses)
+            self.replies.extend(history.replies)
+        else:
+            self.started.append(0.0)
+            self.counts.append(0)
+            self.counts.append(0)
+
+    def addState(self, state: SessionState):
+        # For sessions that were restored but haven't been resumed yet
+        flags = (FLAG_IN_GAME if state.in_game else 0) | \
+            (FLAG_EVIL_HOST if state.evil_host else 0)
+        answer = state.answer
+        if answer is None:
+            flags |= FLAG_NO_ANSWER
+            answer = 0
+        row = (state.range_start, state.range_end, state.chances,
+               answer, state.tries_left, state.low, state.high,
+               state.tree_index)
+        if min(row) < INT64_MIN or max(row) > INT64_MAX or \
+                type(state.guesses) is list:
+            self.overflow.append(state.to_json())
+            return
+
+        self.session_ids.append(state.session_id)
+        self.difficulties.append(state.difficulty)
+        self.ints.extend(row)
+        self.started.append(state.started)
+        self.counts.append(len(state.guesses))
+        self.counts.append(state.num_wasted)
+        self.flags.append(flags)
+        self.guesses.extend(state.guesses)
+        self.replies.extend(state.replies)
+
+    def encode(self):
+        body = bytearray(packNames(self.session_ids))
+        body += packNames(self.difficulties)
+        for block in (array("q", self.ints), array("d", self.started),
+                      array("I", self.counts), array("B", self.flags),
+                      self.guesses, self.replies):
+            body += bytes(padTo8(len(body)))
+            body += block.tobytes()
+        overflow = json.dumps(self.overflow).encode("utf-8") \
+            if self.overflow else b""
+        header = HEADER.pack(MAGIC, len(self.session_ids), len(self.guesses),
+                             len(overflow))
+        return header + bytes(body) + overflow
+
+
+def encodeCheckpoint(sessions):
+    # sessions yields (session_id, game, engine, in_game)
+    builder = CheckpointBuilder()
+    for session_id, game, engine, in_game in sessions:
+        builder.add(session_id, game, engine, in_game)
+    return builder.encode()
+
+
+def readBlock(data: bytes, offset: int, code: str, length: int):
+    # Blocks start on 8 byte boundaries, relative to the end of the header
+    offset += padTo8(offset - HEADER.size)
+    block = array(code)
+    end = offset + length * block.itemsize
+    if end > len(data):
+        raise game_exceptions.InvalidSaveFormatError
+    block.frombytes(data[offset:end])
+    return block, end
+
+
+def decodeCheckpoint(data: bytes):
+    # Returns a list of SessionState in the order they were added, except
+    # that sessions kept in the JSON section come after all the others
+    try:
+        magic, num_sessions, num_guesses, overflow_length = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise game_exceptions.InvalidSaveFormatError
+        session_ids, offset = unpackNames(data, HEADER.size)
+        difficulties, offset = unpackNames(data, offset)
+        if len(session_ids) != num_sessions or \
+                len(difficulties) != num_sessions:
+            raise game_exceptions.InvalidSaveFormatError
+        ints, offset = readBlock(data, offset, "q",
+                                 num_sessions * len(INT_FIELDS))
+        started, offset = readBlock(data, offset, "d", num_sessions)
+        counts, offset = readBlock(data, offset, "I",
+                                   num_sessions * len(COUNT_FIELDS))
+        flags, offset = readBlock(data, offset, "B", num_sessions)
+        guesses, offset = readBlock(data, offset, "q", num_guesses)
+        replies, offset = readBlock(data, offset, "b", num_guesses)
+        if sum(counts[::len(COUNT_FIELDS)]) != num_guesses or \
+                offset + overflow_length != len(data):
+            raise game_exceptions.InvalidSaveFormatError
+        overflow = json.loads(data[offset:]) if overflow_length else []
+    except (struct.error, UnicodeDecodeError, ValueError):
+        raise game_exceptions.InvalidSaveFormatError from None
+
+    states = []
+    guess_offset = 0
+    rows = zip(session_ids, difficulties, zip(*[iter(ints)] * 8), started,
+               zip(*[iter(counts)] * 2), flags)
+    for session_id, difficulty, int_row, game_started, \
+            (guess_count, num_wasted), session_flags in rows:
+        evil_host = bool(session_flags & FLAG_EVIL_HOST)
+        if session_flags & FLAG_IN_GAME:
+            guess_end = guess_offset + guess_count
+            state = SessionState(
+                session_id, difficulty, *int_row[:3], True, *int_row[3:],
+                game_started, num_wasted, guesses[guess_offset:guess_end],
+                replies[guess_offset:guess_end], evil_host
+            )
+            if session_flags & FLAG_NO_ANSWER:
+                state.answer = None
+            states.append(state)
+            guess_offset = guess_end
+        else:
+            states.append(SessionState(session_id, difficulty,
+                                       *int_row[:3], evil_host=evil_host))
+
+    try:
+        states.extend(SessionState.from_json(fields) for fields in overflow)
+    except TypeError:
+        raise game_exceptions.InvalidSaveFormatError from None
+    return states
+
+
+def saveCheckpoint(filename: str, sessions):
+    return util.writeFileAtomic(filename, encodeCheckpoint(sessions))
+
+
+def loadCheckpoint(filename: str):
+    # One read for the whole file, however many sessions it holds
+    with open(filename, "rb") as f:
+        return decodeCheckpoint(f.read())
+
+
+class CheckpointWriter:
+    # Writes checkpoints on a thread of its own so the disk never holds up
+    # the game loop. Only the newest checkpoint waiting to be written is
+    # kept: a slow disk skips stale ones instead of queueing them.
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.condition = threading.Condition()
+        self.pending = None
+        self.writing = False
+        self.closed = False
+        self.num_written = 0
+        # Last write that failed, the next checkpoint simply tries again
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True,
+                                       name="checkpoint-writer")
+        self.thread.start()
+
+    def submit(self, data: bytes):
+        with self.condition:
+            if self.closed:
+                raise ValueError("checkpoint writer is closed")
+            self.pending = data
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                data, self.pending = self.pending, None
+                self.writing = True
+            try:
+                util.writeFileAtomic(self.filename, data)
+                error = None
+            except OSError as write_error:
+                error = write_error
+            with self.condition:
+                self.writing = False
+                self.error = error
+                if error is None:
+                    self.num_written += 1
+                self.condition.notify_all()
+
+    def wait(self):
+        # Blocks until everything submitted so far is on disk
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+
+    def close(self):
+        # Whatever is still pending is written before the thread exits
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
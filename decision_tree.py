@@ -0,0 +1,148 @@
+# Built-in modules
+from array import array
+from collections import deque
+import mmap
+import os
+import struct
+
+# Custom modules
+from bot import GuessBot
+import util
+
+CACHE_DIR = "./.tree_cache"
+FILE_MAGIC = b"GTNTREE1"
+# magic, range start, range end, number of nodes
+FILE_HEADER = struct.Struct("<8sqqQ")
+# Marks heap slots that no path of the bot ever reaches
+EMPTY = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+MAX_TREE_NODES = 1 << 24
+
+
+def treeSize(range_start: int, range_end: int):
+    # The bot needs at most bit_length(n) guesses, so its whole decision
+    # tree fits in a complete binary tree of that depth
+    return (1 << (range_end - range_start + 1).bit_length()) - 1
+
+
+def buildTree(range_start: int, range_end: int):
+    # Implicit heap layout: the node at i is followed by 2i + 1 after a
+    # "too high" reply and by 2i + 2 after a "too low" reply
+    if not EMPTY < range_start <= range_end <= INT64_MAX:
+        raise ValueError("Decision trees need a non-empty 64-bit range")
+    num_nodes = treeSize(range_start, range_end)
+    if num_nodes > MAX_TREE_NODES:
+        raise ValueError("Range is too large to precompute")
+
+    nodes = array("q", [EMPTY]) * num_nodes
+    pending = deque([(0, range_start, range_end)])
+    while pending:
+        index, low, high = pending.popleft()
+        if low > high:
+            continue
+        guess = GuessBot(low, high).getNextGuess()
+        nodes[index] = guess
+        pending.append((2 * index + 1, low, guess - 1))
+        pending.append((2 * index + 2, guess + 1, high))
+
+    return nodes
+
+
+class DecisionTree:
+    # Read-only view of a cached tree file. Lookups index straight into
+    # the mapped file, so any number of sessions share one copy.
+    def __init__(self, filename: str, range_start: int, range_end: int):
+        self.filename = filename
+        self.range_start = range_start
+        self.range_end = range_end
+        with open(filename, "rb") as f:
+            self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.nodes = memoryview(self.mapped)[FILE_HEADER.size:].cast("q")
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def guessAt(self, index: int):
+        if index >= len(self.nodes):
+            return None
+        guess = self.nodes[index]
+        return None if guess == EMPTY else guess
+
+    def close(self):
+        self.nodes.release()
+        self.mapped.close()
+
+
+def isValidTreeFile(filename: str, range_start: int, range_end: int):
+    num_nodes = treeSize(range_start, range_end)
+    try:
+        with open(filename, "rb") as f:
+            header = f.read(FILE_HEADER.size)
+            size = os.fstat(f.fileno()).st_size
+    except FileNotFoundError:
+        return False
+    if len(header) != FILE_HEADER.size:
+        return False
+
+    expected = (FILE_MAGIC, range_start, range_end, num_nodes)
+    return FILE_HEADER.unpack(header) == expected and \
+        size == FILE_HEADER.size + num_nodes * 8
+
+
+class DecisionTreeCache:
+    # Builds each range's tree the first time it is asked for, writes it
+    # to CACHE_DIR and maps it. A file whose header doesn't describe the
+    # requested range is treated as stale and rebuilt.
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.trees = {}
+
+    def fileName(self, range_start: int, range_end: int):
+        return os.path.join(self.cache_dir,
+                            f"tree_{range_start}_{range_end}.bin")
+
+    def get(self, range_start: int, range_end: int):
+        key = (range_start, range_end)
+        tree = self.trees.get(key)
+        if tree is None:
+            filename = self.fileName(range_start, range_end)
+            if not isValidTreeFile(filename, range_start, range_end):
+                self.writeTree(filename, range_start, range_end)
+            tree = DecisionTree(filename, range_start, range_end)
+            self.trees[key] = tree
+
+        return tree
+
+    def writeTree(self, filename: str, range_start: int, range_end: int):
+        nodes = buildTree(range_start, range_end)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        header = FILE_HEADER.pack(FILE_MAGIC, range_start, range_end,
+                                  len(nodes))
+        util.writeFileAtomic(filename, header + nodes.tobytes())
+
+    def close(self):
+        for tree in self.trees.values():
+            tree.close()
+        self.trees = {}
+
+
+class TreeBot:
+    # Drop-in for GuessBot that walks a precomputed tree instead of
+    # doing arithmetic. Bounds passed in are ignored, only which side
+    # the last guess was on matters.
+    def __init__(self, tree: DecisionTree):
+        self.tree = tree
+        self.index = 0
+
+    def setUpperBound(self, new_upper: int):
+        self.index = 2 * self.index + 1
+
+    def setLowerBound(self, new_lower: int):
+        self.index = 2 * self.index + 2
+
+    def getNextGuess(self):
+        return self.tree.guessAt(self.index)
+
+    def __str__(self):
+        return f"Bot walking the decision tree for " \
+               f"{self.tree.range_start} to {self.tree.range_end}"
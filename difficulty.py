@@ -0,0 +1,75 @@
+class Difficulty:
+    def __init__(self, name: str, range_start: int, range_end: int,
+                 chances: int, stat_key: str, label: str):
+        self.name = name
+        self.range_start = range_start
+        self.range_end = range_end
+        self.chances = chances
+        # StatManager counter holding the wins on this difficulty
+        self.stat_key = stat_key
+        self.label = label
+
+    @property
+    def range_size(self):
+        return self.range_end - self.range_start + 1
+
+    def __str__(self):
+        return f"{self.name}: {self.range_start} to {self.range_end} " \
+               f"with {self.chances} chances"
+
+
+# Looked up by name everywhere a difficulty is chosen or a win counted
+DIFFICULTIES = {}
+# Win counter -> label for every registered difficulty, in registration
+# order. StatManager builds its per-difficulty counters from this.
+WIN_STATS = {}
+# Names a win counter can't take because StatManager already uses them,
+# filled in by stat_manager through reserveStatKeys()
+RESERVED_STAT_KEYS = set()
+
+
+def reserveStatKeys(names):
+    clashes = WIN_STATS.keys() & set(names)
+    if clashes:
+        raise ValueError(f"stat_key {min(clashes)!r} is already used")
+    RESERVED_STAT_KEYS.update(names)
+
+
+def registerDifficulty(name: str, range_start: int, range_end: int,
+                       chances: int, stat_key: str = None,
+                       label: str = None):
+    if range_start > range_end:
+        raise ValueError("range_start must not be greater than range_end")
+    if chances < 1:
+        raise ValueError("chances must be at least 1")
+    if stat_key is None:
+        stat_key = f"num_{name}_wins"
+    if label is None:
+        label = f"Wins on {name} mode"
+    if not stat_key.isidentifier():
+        raise ValueError(f"stat_key {stat_key!r} is not a valid name")
+    if stat_key in RESERVED_STAT_KEYS:
+        raise ValueError(f"stat_key {stat_key!r} is reserved")
+    # Re-registering a name may change its range and chances, but its
+    # wins have to keep going to the same counter
+    existing = DIFFICULTIES.get(name)
+    if existing is not None and existing.stat_key != stat_key:
+        raise ValueError(f"{name!r} already counts wins in "
+                         f"{existing.stat_key!r}")
+    if existing is None and stat_key in WIN_STATS:
+        raise ValueError(f"stat_key {stat_key!r} is already used")
+
+    difficulty = Difficulty(name, range_start, range_end, chances, stat_key,
+                            label)
+    DIFFICULTIES[name] = difficulty
+    WIN_STATS[stat_key] = label
+    return difficulty
+
+
+def difficultyNames():
+    return ", ".join(DIFFICULTIES)
+
+
+registerDifficulty("easy", 1, 10, 5, "num_easy_wins")
+registerDifficulty("medium", 1, 100, 7, "num_med_wins")
+registerDifficulty("hard", 1, 1000, 10, "num_hard_wins")
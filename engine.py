@@ -0,0 +1,287 @@
+# Built-in modules
+from enum import Enum
+from random import randint
+import sys
+import time
+
+# Custom modules
+from adversary import CORRECT, EvilHost
+from bot import GuessBot
+from guess_history import GuessHistory, TOO_HIGH, TOO_LOW
+import game_exceptions
+
+
+class EngineState(Enum):
+    NEW = "new"
+    IN_PROGRESS = "in progress"
+    OVER = "over"
+
+
+class GuessResult(Enum):
+    CORRECT = "correct"
+    TOO_HIGH = "too high"
+    TOO_LOW = "too low"
+
+
+class GameEngine:
+    # Step-driven game loop with no terminal I/O.
+    # Config is read from the owning Game when a game starts and stats
+    # are updated through the Game so they match the interactive flow.
+    def __init__(self, game):
+        self.game = game
+        self.state = EngineState.NEW
+        self.answer = None
+        self.range_start = None
+        self.range_end = None
+        self.starting_chances = 0
+        self.tries_left = 0
+        self.history = None
+        self.last_guess_wasted = False
+        self.won = False
+        self.first_try = False
+        self.started = None
+        self.tree = None
+        self.tree_index = None
+        # EvilHost that picks the answer as the game goes, in evil mode
+        self.host = None
+
+    def newGame(self, answer: int = None):
+        self.range_start = self.game.ANSWER_RANGE_START
+        self.range_end = self.game.ANSWER_RANGE_END
+        self.starting_chances = self.game.STARTING_CHANCES
+        self.host = None
+        if answer is None and self.game.evil_host:
+            # Decided once the game ends
+            self.host = EvilHost(self.range_start, self.range_end)
+        elif answer is None:
+            # Seeded games draw from their own stream, the rest from the
+            # global RNG
+            rng = self.game.rng
+            draw = rng.randint if rng is not None else randint
+            answer = draw(self.range_start, self.range_end)
+        self.answer = answer
+        self.tries_left = self.starting_chances
+        self.history = GuessHistory(self.range_start, self.range_end)
+        self.last_guess_wasted = False
+        self.won = False
+        self.first_try = False
+        self.started = time.time()
+        self.state = EngineState.IN_PROGRESS
+        self.loadDecisionTree()
+
+    def resumeGame(self, answer: int, tries_left: int, history: GuessHistory,
+                   started: float, tree_index: int = None):
+        # Picks a game restored from a checkpoint back up where it was.
+        # Without an answer the evil host carries on from the range the
+        # history still allows, which is all the state it keeps.
+        self.range_start = self.game.ANSWER_RANGE_START
+        self.range_end = self.game.ANSWER_RANGE_END
+        self.starting_chances = self.game.STARTING_CHANCES
+        self.answer = answer
+        self.tries_left = tries_left
+        self.history = history
+        self.last_guess_wasted = False
+        self.won = False
+        self.first_try = False
+        self.started = started
+        self.state = EngineState.IN_PROGRESS
+        self.host = None
+        if answer is None:
+            self.host = EvilHost(history.low, history.high)
+        self.loadDecisionTree()
+        if self.tree is not None:
+            self.tree_index = tree_index
+
+    def loadDecisionTree(self):
+        self.tree = None
+        self.tree_index = None
+        trees = self.game.decision_trees
+        if trees is None:
+            return
+        try:
+            self.tree = trees.get(self.range_start, self.range_end)
+            self.tree_index = 0
+        except ValueError:
+            # Range too big to precompute, hints fall back to arithmetic
+            pass
+
+    def isOver(self):
+        return self.state is EngineState.OVER
+
+    def isOutOfRange(self, guess: int):
+        return guess < self.range_start or guess > self.range_end
+
+    def submitGuess(self, guess: int):
+        if self.state is not EngineState.IN_PROGRESS:
+            raise game_exceptions.GameNotInProgressError
+        # Guesses that cannot be correct don't use up a try
+        if self.isOutOfRange(guess):
+            raise game_exceptions.InvalidOptionError
+
+        self.game.stat_manager.increment("num_guesses")
+
+        if self.host is not None:
+            reply = self.host.reply(guess)
+        elif guess == self.answer:
+            reply = CORRECT
+        elif guess > self.answer:
+            reply = TOO_HIGH
+        else:
+            reply = TOO_LOW
+
+        if reply == CORRECT:
+            self.last_guess_wasted = self.history.record(guess)
+            self.won = True
+            if self.tries_left == self.starting_chances:
+                self.first_try = True
+                self.game.firstGuessWin()
+            else:
+                self.game.win()
+            self.finishGame()
+            return GuessResult.CORRECT
+
+        if reply == TOO_HIGH:
+            result = GuessResult.TOO_HIGH
+            self.last_guess_wasted = self.history.record(guess, TOO_HIGH)
+        else:
+            result = GuessResult.TOO_LOW
+            self.last_guess_wasted = self.history.record(guess, TOO_LOW)
+        self.followDecisionTree(guess, result)
+
+        self.tries_left -= 1
+
+        if self.tries_left == 0:
+            self.game.lose()
+            self.finishGame()
+
+        return result
+
+    def followDecisionTree(self, guess: int, result: GuessResult):
+        if self.tree_index is None:
+            return
+        if guess != self.tree.guessAt(self.tree_index):
+            # Player left the optimal path, the tree no longer applies
+            self.tree_index = None
+        elif result is GuessResult.TOO_HIGH:
+            self.tree_index = 2 * self.tree_index + 1
+        else:
+            self.tree_index = 2 * self.tree_index + 2
+
+    @property
+    def lower_guesses(self):
+        return self.history.lowerGuesses()
+
+    @property
+    def higher_guesses(self):
+        return self.history.higherGuesses()
+
+    def hint(self):
+        # Optimal next guess, a table lookup while the player has stayed
+        # on the precomputed tree's path
+        if self.tree_index is not None:
+            guess = self.tree.guessAt(self.tree_index)
+            if guess is not None:
+                return guess
+        return GuessBot(self.history.low, self.history.high).getNextGuess()
+
+    def finishGame(self):
+        self.state = EngineState.OVER
+        if self.host is not None:
+            self.answer = self.host.answer()
+        finished = time.time()
+        self.game.stat_manager.recordGame(self.game.DIFFICULTY, self.won,
+                                          len(self.history),
+                                          finished - self.started)
+        event_log = self.game.event_log
+        if event_log is not None:
+            event_log.recordGame(self.game.DIFFICULTY, self.answer,
+                                 self.history.guesses, self.won,
+                                 self.started, finished)
+
+
+class TerminalIO:
+    # Everything written between two prompts is collected into one frame
+    # and handed to the sink in a single write, together with the prompt.
+    # The sink defaults to whatever sys.stdout is when the frame is sent.
+    def __init__(self, sink=None, silent: bool = False):
+        self.sink = sink
+        self.silent = silent
+        self.frame = []
+
+    def readLine(self, prompt: str):
+        self.flush(prompt)
+        return input()
+
+    def write(self, message: str = ''):
+        if not self.silent:
+            self.frame.append(f"{message}\n")
+
+    def flush(self, prompt: str = ''):
+        if self.silent or not (self.frame or prompt):
+            return
+        self.frame.append(prompt)
+        sink = self.sink if self.sink is not None else sys.stdout
+        sink.write("".join(self.frame))
+        sink.flush()
+        self.frame = []
+
+    def stream(self, text: str):
+        # Passes text straight to the sink, for reports too long to hold
+        # in a frame. The frame so far goes first to keep the order.
+        if self.silent:
+            return
+        sink = self.sink if self.sink is not None else sys.stdout
+        if self.frame:
+            sink.write("".join(self.frame))
+            self.frame = []
+        sink.write(text)
+
+
+class ScriptedIO:
+    # Feeds pre-made input lines and keeps everything that was written.
+    # Running out of lines behaves like a closed stdin.
+    def __init__(self, lines, keep_output: bool = True):
+        self.lines = iter(lines)
+        self.keep_output = keep_output
+        self.output = []
+
+    def readLine(self, prompt: str):
+        try:
+            return next(self.lines)
+        except StopIteration:
+            raise EOFError from None
+
+    def write(self, message: str = ''):
+        if self.keep_output:
+            self.output.append(message)
+
+    def flush(self, prompt: str = ''):
+        pass
+
+
+class LineSink:
+    # File-like view of an I/O adapter, for code that streams text in
+    # pieces like runOptimalSim. Adapters that can stream get every piece
+    # as it comes, the rest each finished line through io.write().
+    def __init__(self, io):
+        self.io = io
+        self.pieces = []
+        self.stream = getattr(io, "stream", None)
+
+    def write(self, text: str):
+        if self.stream is not None:
+            self.stream(text)
+            return len(text)
+        *lines, rest = text.split("\n")
+        for line in lines:
+            self.pieces.append(line)
+            self.io.write("".join(self.pieces))
+            self.pieces = []
+        if rest:
+            self.pieces.append(rest)
+        return len(text)
+
+    def flush(self):
+        if self.pieces:
+            self.io.write("".join(self.pieces))
+            self.pieces = []
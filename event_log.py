@@ -0,0 +1,256 @@
+# Built-in modules
+from array import array
+import mmap
+import os
+import struct
+
+FILE_MAGIC = b"GTNLOG01"
+# Blocks written before difficulty names were stored in each block
+LEGACY_BLOCK_MAGIC = b"BLK1"
+BLOCK_MAGIC = b"BLK2"
+# magic, rows in block, total guesses in block, block size in bytes
+BLOCK_HEADER = struct.Struct("<4sIIQ")
+BLOCK_ROWS = 4096
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# Outcomes and difficulty levels are stored as one byte codes. A
+# difficulty's code is its index in the names stored at the start of
+# each block, so any registered difficulty can be logged.
+OUTCOME_LOSS = 0
+OUTCOME_WIN = 1
+LEGACY_DIFFICULTIES = ("easy", "medium", "hard")
+UNKNOWN_DIFFICULTY = 255
+NAMES_LENGTH = struct.Struct("<I")
+NAME_SEPARATOR = "\n"
+
+# Column layout of a block: (name, array typecode). Fixed-width columns
+# come first, the variable length guesses column is last.
+COLUMNS = (
+    ("answer", "q"),
+    ("started", "d"),
+    ("finished", "d"),
+    ("guess_count", "I"),
+    ("difficulty", "B"),
+    ("outcome", "B"),
+)
+
+
+def difficultyName(names, code: int):
+    if code < len(names):
+        return names[code]
+    return None
+
+
+def padTo8(num_bytes: int):
+    return -num_bytes % 8
+
+
+class GameRecord:
+    __slots__ = ("difficulty", "answer", "guesses", "won", "started",
+                 "finished")
+
+    def __init__(self, difficulty, answer, guesses, won, started, finished):
+        self.difficulty = difficulty
+        self.answer = answer
+        self.guesses = guesses
+        self.won = won
+        self.started = started
+        self.finished = finished
+
+    def __repr__(self):
+        return f"GameRecord({self.difficulty!r}, answer={self.answer}, " \
+               f"guesses={list(self.guesses)}, won={self.won})"
+
+
+class EventLogWriter:
+    # Append-only columnar game log. Games are buffered into typed
+    # arrays and written as one block per BLOCK_ROWS games, each column
+    # stored contiguously so readers can cast it straight from the file.
+    def __init__(self, filename: str, block_rows: int = BLOCK_ROWS):
+        self.filename = filename
+        self.block_rows = block_rows
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        self.guesses = array("q")
+        # Difficulty name -> code in the block being buffered
+        self.difficulty_codes = {}
+        # Games with numbers past 64 bits, which only custom ranges can
+        # have, don't fit the columns and are left out of the log
+        self.num_skipped = 0
+
+        with open(filename, "a+b") as f:
+            f.seek(0)
+            head = f.read(len(FILE_MAGIC))
+            if head != FILE_MAGIC:
+                # Anything but a new log, or one torn while being created,
+                # is somebody else's file
+                if not FILE_MAGIC.startswith(head):
+                    raise ValueError(f"{filename} is not a game event log")
+                f.truncate(0)
+                f.write(FILE_MAGIC)
+                return
+            # A block torn by a crash would hide every block appended
+            # after it, so the log is cut back to its last complete block
+            f.truncate(completeLength(f))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.columns["answer"])
+
+    def recordGame(self, difficulty: str, answer: int, guesses, won: bool,
+                   started: float, finished: float):
+        # Checked up front so a skipped game never leaves half a row
+        if not INT64_MIN <= answer <= INT64_MAX or guesses and \
+                (min(guesses) < INT64_MIN or max(guesses) > INT64_MAX):
+            self.num_skipped += 1
+            return
+        self.columns["answer"].append(answer)
+        self.columns["started"].append(started)
+        self.columns["finished"].append(finished)
+        self.columns["guess_count"].append(len(guesses))
+        self.columns["difficulty"].append(self.difficultyCode(difficulty))
+        self.columns["outcome"].append(OUTCOME_WIN if won else OUTCOME_LOSS)
+        self.guesses.extend(guesses)
+
+        if len(self) >= self.block_rows:
+            self.flush()
+
+    def difficultyCode(self, difficulty: str):
+        code = self.difficulty_codes.get(difficulty)
+        if code is not None:
+            return code
+        if len(self.difficulty_codes) == UNKNOWN_DIFFICULTY or \
+                not difficulty or NAME_SEPARATOR in difficulty:
+            return UNKNOWN_DIFFICULTY
+        code = self.difficulty_codes[difficulty] = len(self.difficulty_codes)
+        return code
+
+    def flush(self):
+        num_rows = len(self)
+        if num_rows == 0:
+            return
+
+        names = NAME_SEPARATOR.join(self.difficulty_codes).encode("utf-8")
+        body = bytearray(NAMES_LENGTH.pack(len(names)) + names)
+        body += bytes(padTo8(len(body)))
+        for name, _ in COLUMNS:
+            body += self.columns[name].tobytes()
+            body += bytes(padTo8(len(body)))
+        body += self.guesses.tobytes()
+
+        header = BLOCK_HEADER.pack(BLOCK_MAGIC, num_rows, len(self.guesses),
+                                   BLOCK_HEADER.size + len(body))
+        with open(self.filename, "ab") as f:
+            f.write(header + body)
+
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        self.guesses = array("q")
+        self.difficulty_codes = {}
+
+    def close(self):
+        self.flush()
+
+
+def isCompleteBlock(magic: bytes, block_size: int, offset: int,
+                    file_size: int):
+    return magic in (BLOCK_MAGIC, LEGACY_BLOCK_MAGIC) and \
+        block_size >= BLOCK_HEADER.size and offset + block_size <= file_size
+
+
+def completeLength(f):
+    # Bytes up to the end of the last complete block, found by hopping
+    # from header to header
+    file_size = os.fstat(f.fileno()).st_size
+    offset = len(FILE_MAGIC)
+    while offset + BLOCK_HEADER.size <= file_size:
+        f.seek(offset)
+        magic, _, _, block_size = \
+            BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+        if not isCompleteBlock(magic, block_size, offset, file_size):
+            break
+        offset += block_size
+    return offset
+
+
+def iterBlocks(filename: str):
+    # Yields each block as a dict of memoryviews over the mapped file,
+    # plus the block's difficulty names. Nothing is parsed per row, and
+    # only one block is touched at a time.
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(FILE_MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                if view[:len(FILE_MAGIC)] != FILE_MAGIC:
+                    raise ValueError(f"{filename} is not a game event log")
+                offset = len(FILE_MAGIC)
+                while offset + BLOCK_HEADER.size <= len(view):
+                    magic, num_rows, num_guesses, block_size = \
+                        BLOCK_HEADER.unpack_from(view, offset)
+                    # A block cut short by a crash ends the log
+                    if not isCompleteBlock(magic, block_size, offset,
+                                           len(view)):
+                        break
+                    block = readBlock(view, offset + BLOCK_HEADER.size,
+                                      num_rows, num_guesses,
+                                      magic == LEGACY_BLOCK_MAGIC)
+                    try:
+                        yield block
+                    finally:
+                        # Views are only valid until the next block
+                        for name, _ in COLUMNS:
+                            block[name].release()
+                        block["guesses"].release()
+                    offset += block_size
+            finally:
+                view.release()
+
+
+def readBlock(view, offset: int, num_rows: int, num_guesses: int,
+              legacy: bool = False):
+    block = {}
+    # Column padding is relative to the start of the block body
+    position = 0
+    if legacy:
+        block["difficulty_names"] = LEGACY_DIFFICULTIES
+    else:
+        (length,) = NAMES_LENGTH.unpack_from(view, offset)
+        position = NAMES_LENGTH.size + length
+        names = bytes(view[offset + NAMES_LENGTH.size:offset + position])
+        block["difficulty_names"] = \
+            names.decode("utf-8").split(NAME_SEPARATOR) if names else []
+        position += padTo8(position)
+    for name, code in COLUMNS:
+        size = num_rows * array(code).itemsize
+        start = offset + position
+        block[name] = view[start:start + size].cast(code)
+        position += size
+        position += padTo8(position)
+    start = offset + position
+    block["guesses"] = view[start:start + num_guesses * 8].cast("q")
+
+    return block
+
+
+def iterGames(filename: str):
+    for block in iterBlocks(filename):
+        guesses = block["guesses"]
+        names = block["difficulty_names"]
+        guess_offset = 0
+        for row in range(len(block["answer"])):
+            count = block["guess_count"][row]
+            yield GameRecord(
+                difficultyName(names, block["difficulty"][row]),
+                block["answer"][row],
+                guesses[guess_offset:guess_offset + count].tolist(),
+                block["outcome"][row] == OUTCOME_WIN,
+                block["started"][row],
+                block["finished"][row]
+            )
+            guess_offset += count
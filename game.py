@@ -2,18 +2,29 @@
 from random import randint
 from json import JSONDecodeError
 import sys
-import os.path
+import os
 
 # Custom modules
+from difficulty import DIFFICULTIES, difficultyNames
+from stat_journal import JournaledStatManager
 from stat_manager import StatManager
-from bot import GuessBot
+from engine import GameEngine, GuessResult, LineSink, TerminalIO
+from event_log import EventLogWriter
+from rng import AnswerStream
+from simulation import iterOptimalSim, simulateAllAnswers
+from solver import Solver
+import metrics
 import util
 import game_exceptions
 
 
 class Game:
     def __init__(self, stat_manager: StatManager, difficulty: str = 'easy',
-                 range_start: int = 1, range_end: int = 10, chances: int = 5):
+                 range_start: int = 1, range_end: int = 10, chances: int = 5,
+                 io=None, event_log=None, rng=None, evil_host: bool = False):
+        # Wins are counted per difficulty, so it has to be a registered one
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"unknown difficulty {difficulty!r}")
         # Config
         self.ANSWER_RANGE_START = range_start
         self.ANSWER_RANGE_END = range_end
@@ -29,41 +40,64 @@ class Game:
             4: "Statistics",
             5: "Choose difficulty",
             6: "Simulate Optimal Game",
+            7: "Simulate every answer in a range",
             9: "Quit"
         }
 
         self.stat_manager = stat_manager
+        # Terminal by default, swap in another adapter to run headless
+        self.io = io if io is not None else TerminalIO()
+        # Optional EventLogWriter that records every finished game
+        self.event_log = event_log
+        # Optional seeded rng.AnswerStream so games can be replayed exactly
+        self.rng = rng
+        # Harder mode where the answer dodges every guess for as long as
+        # it can, see adversary.EvilHost
+        self.evil_host = evil_host
+        # Optional DecisionTreeCache used for optimal guess hints
+        self.decision_trees = None
+        # Rendered menus keyed by HAS_SAVE, the only thing they depend on
+        self.menu_frames = {}
 
     def run(self):
         while True:
             self.printMenu()
-            user_in = input("Please select an option from above: ")
+            user_in = self.io.readLine("Please select an option from above: ")
             try:
                 option_key = int(user_in)
                 self.handleMenuChoice(option_key)
             except (ValueError, game_exceptions.InvalidOptionError):
-                print("You did not enter a valid option. Please try again.\n")
+                if metrics.ENABLED:
+                    metrics.INVALID_MENU_INPUTS.inc()
+                self.io.write(
+                    "You did not enter a valid option. Please try again.\n"
+                )
                 continue
 
     def printMenu(self):
-        menu_str = ''
-        for key, option in self.menu_options.items():
+        menu = self.menu_frames.get(self.HAS_SAVE)
+        if menu is None:
             # Remove load option if save is invalid or doesn't exist
-            if not self.HAS_SAVE and option == "Load save data":
-                continue
-            menu_str += f"{key} -- {option}\n"
+            menu = util.formatWithBorder("\n".join(
+                f"{key} -- {option}"
+                for key, option in self.menu_options.items()
+                if self.HAS_SAVE or option != "Load save data"
+            ))
+            self.menu_frames[self.HAS_SAVE] = menu
 
-        util.printWithBorder(menu_str.strip())
+        self.io.write(menu)
 
+    @metrics.timed(metrics.MENU_DISPATCH)
     def handleMenuChoice(self, menu_choice: int):
         choice_functions = {
             1: self.playGame,
             2: self.saveGameStats,
             3: self.loadGameStats,
-            4: self.stat_manager.pretty_print,
+            4: self.showStats,
             5: self.requestDifficultyChange,
-            6: setupSim,
-            9: stopGame
+            6: self.setupSim,
+            7: self.setupBatchSim,
+            9: self.stopGame
         }
 
         if menu_choice in choice_functions:
@@ -74,133 +108,137 @@ class Game:
             raise game_exceptions.InvalidOptionError
 
     def playGame(self):
-        lower_guesses = []
-        higher_guesses = []
-
-        lowest_num = self.ANSWER_RANGE_START
-        highest_num = self.ANSWER_RANGE_END
-
-        answer = randint(lowest_num, highest_num)
-        tries_left = self.STARTING_CHANCES
-
-        while True:
-            if tries_left < self.STARTING_CHANCES:
-                self.printGuessHistory(
-                    tries_left, lower_guesses, higher_guesses
-                )
-            input_mess = f"Enter a number between " \
-                         f"{lowest_num} and {highest_num}, inclusive: "
-            guess_str = input(input_mess)
-            try:
-                guess_int = int(guess_str)
-                # Handle error where user guesses that cannot be correct
-                if self.isOutOfRange(guess_int):
-                    raise game_exceptions.InvalidOptionError
-            except (ValueError, game_exceptions.InvalidOptionError):
-                print("You did not enter an integer in the given range!")
-                continue
-
-            self.stat_manager.num_guesses += 1
+        engine = GameEngine(self)
+        engine.newGame()
+        if metrics.ENABLED:
+            metrics.ACTIVE_GAMES.inc()
 
-            if isCorrectGuess(guess_int, answer):
-                self.handleCorrectGuess(tries_left)
-                break
+        try:
+            while not engine.isOver():
+                if engine.tries_left < self.STARTING_CHANCES:
+                    self.printGuessHistory(engine.tries_left, engine.history)
+                input_mess = f"Enter a number between " \
+                             f"{engine.range_start} and {engine.range_end}, " \
+                             f"inclusive: "
+                self.handleGuess(engine, self.io.readLine(input_mess))
+        finally:
+            if metrics.ENABLED:
+                metrics.ACTIVE_GAMES.dec()
+
+        self.io.write(f"The number was {engine.answer}. Thanks for playing!")
+        # Automatically save stats after every completed game
+        self.saveGameStats()
 
-            if guess_int > answer:
-                print("Your guess was higher than the answer.\n")
-                higher_guesses.append(guess_int)
+    @metrics.timed(metrics.GUESS_HANDLING)
+    def handleGuess(self, engine: GameEngine, guess_str: str):
+        try:
+            result = engine.submitGuess(int(guess_str))
+        except (ValueError, game_exceptions.InvalidOptionError):
+            if metrics.ENABLED:
+                metrics.INVALID_GUESSES.inc()
+            self.io.write("You did not enter an integer in the given range!")
+            return
+
+        if result is GuessResult.CORRECT:
+            if engine.first_try:
+                self.io.write("You guessed it on the first try!")
             else:
-                print("Your guess was lower than the answer.\n")
-                lower_guesses.append(guess_int)
+                self.io.write("You guessed it!")
+        elif result is GuessResult.TOO_HIGH:
+            self.io.write("Your guess was higher than the answer.\n")
+        else:
+            self.io.write("Your guess was lower than the answer.\n")
 
-            tries_left -= 1
+        if engine.last_guess_wasted and not engine.won:
+            self.io.write("That number was already ruled out by your "
+                          "earlier guesses!\n")
 
-            if tries_left == 0:
-                self.lose()
-                print("You are out of guesses.")
-                break
+        if engine.isOver() and not engine.won:
+            self.io.write("You are out of guesses.")
 
-        print(f"The number was {answer}. Thanks for playing!")
-        # Automatically save stats after every completed game
-        self.saveGameStats()
-
-    def printGuessHistory(self, chances_left, lower_list, higher_list):
+    def printGuessHistory(self, chances_left, history):
         num_guesses = self.STARTING_CHANCES - chances_left
         if num_guesses > 1:
-            print(f"In {num_guesses} guesses you have tried: ")
+            self.io.write(f"In {num_guesses} guesses you have tried: ")
         else:
-            print(f"In {num_guesses} guess you have tried: ")
+            self.io.write(f"In {num_guesses} guess you have tried: ")
 
-        print(f"Lower: {lower_list}")
-        print(f"Higher: {higher_list}")
+        self.io.write(f"Lower: {history.lowerGuesses()}")
+        self.io.write(f"Higher: {history.higherGuesses()}")
+        self.io.write(f"The answer is between {history.low} and "
+                      f"{history.high} ({history.remaining()} possible)")
 
-        print(f"Guesses remaining: {chances_left}\n")
+        self.io.write(f"Guesses remaining: {chances_left}\n")
 
+    @metrics.timed(metrics.STAT_SAVE)
     def saveGameStats(self):
-        print("Saving data...")
-        self.stat_manager.save(self.SAVEFILE_NAME)
+        self.io.write("Saving data...")
+        try:
+            self.stat_manager.save(self.SAVEFILE_NAME)
+        except game_exceptions.InvalidSaveFormatError:
+            # Stat managers that merge into the save refuse to replace
+            # one they can't read
+            self.io.write("Error reading save file, stats were not saved!")
+            return
+        self.io.write("Save successful!")
         self.HAS_SAVE = True
 
+    @metrics.timed(metrics.STAT_LOAD)
     def loadGameStats(self):
         try:
             self.stat_manager.load(self.SAVEFILE_NAME)
         except FileNotFoundError:
-            print("No save file found!")
+            self.io.write("No save file found!")
             self.HAS_SAVE = False
         except (JSONDecodeError, game_exceptions.InvalidSaveFormatError):
-            print("Error loading save file!")
-            print("Make a new one by saving or completing a game!")
+            self.io.write("Error loading save file!")
+            self.io.write("Make a new one by saving or completing a game!")
             self.HAS_SAVE = False
+        else:
+            self.io.write("Load successful!")
+
+    def showStats(self):
+        self.io.write(self.stat_manager.summary())
 
     def firstGuessWin(self):
-        self.stat_manager.num_first_correct += 1
         self.win()
-
-    def handleCorrectGuess(self, chances_left):
-        if chances_left == self.STARTING_CHANCES:
-            print("You guessed it on the first try!")
-            self.firstGuessWin()
-        else:
-            print("You guessed it!")
-            self.win()
+        self.stat_manager.increment("num_first_correct")
 
     def win(self):
-        self.stat_manager.wins += 1
-        if self.DIFFICULTY == 'easy':
-            self.stat_manager.num_easy_wins += 1
-        elif self.DIFFICULTY == 'medium':
-            self.stat_manager.num_med_wins += 1
-        else:
-            self.stat_manager.num_hard_wins += 1
+        # Looked up first so a win is never counted without its level
+        stat_key = DIFFICULTIES[self.DIFFICULTY].stat_key
+        self.stat_manager.increment("wins")
+        self.stat_manager.increment(stat_key)
 
     def lose(self):
-        self.stat_manager.losses += 1
+        self.stat_manager.increment("losses")
 
     def requestDifficultyChange(self):
-        difficulty_mess = "Enter difficulty (easy, medium, hard): "
-        self.changeDifficulty(input(difficulty_mess))
+        difficulty_mess = f"Enter difficulty ({difficultyNames()}): "
+        self.changeDifficulty(self.io.readLine(difficulty_mess))
 
     def changeDifficulty(self, difficulty: str):
-        if difficulty in ['easy', 'medium', 'hard']:
+        if difficulty in DIFFICULTIES:
             self.setDifficulty(difficulty)
-            print(f"Difficulty has been set to {self.DIFFICULTY}")
-            print(f"This mode gives you {self.STARTING_CHANCES} chances")
+            self.io.write(f"Difficulty has been set to {self.DIFFICULTY}")
+            self.io.write(
+                f"This mode gives you {self.STARTING_CHANCES} chances"
+            )
+            result = Solver().solveRange(self.ANSWER_RANGE_START,
+                                         self.ANSWER_RANGE_END,
+                                         self.STARTING_CHANCES)
+            self.io.write(f"A perfect player wins "
+                          f"{float(result.win_probability):.0%} of games")
         else:
-            print("Invalid difficulty level entered!")
+            self.io.write("Invalid difficulty level entered!")
 
     def setDifficulty(self, difficulty: str):
-        if difficulty == 'easy':
-            self.DIFFICULTY = 'easy'
-            self.setGenerateStartEnd(1, 10)
-            self.STARTING_CHANCES = 5
-        elif difficulty == 'medium':
-            self.DIFFICULTY = 'medium'
-            self.setGenerateStartEnd(1, 100)
-            self.STARTING_CHANCES = 7
-        elif difficulty == 'hard':
-            self.DIFFICULTY = 'hard'
-            self.setGenerateStartEnd(1, 1000)
-            self.STARTING_CHANCES = 10
+        definition = DIFFICULTIES.get(difficulty)
+        if definition is None:
+            return
+        self.DIFFICULTY = definition.name
+        self.setGenerateStartEnd(definition.range_start, definition.range_end)
+        self.STARTING_CHANCES = definition.chances
 
     def setGenerateStartEnd(self, start, end):
         self.ANSWER_RANGE_START = start
@@ -214,10 +252,48 @@ class Game:
 
         return False
 
+    def stopGame(self):
+        self.io.write("Exiting program...")
+        self.io.flush()
+        sys.exit()
 
-def stopGame():
-    print("Exiting program...")
-    sys.exit()
+    def requestSimRange(self):
+        start_mess = "Enter the lowest value for the sim: "
+        end_mess = "Enter the highest value for the sim: "
+        start_num = int(self.io.readLine(start_mess))
+        end_num = int(self.io.readLine(end_mess))
+        # New line to reduce statement cluster
+        self.io.write()
+        if start_num >= end_num:
+            raise game_exceptions.InvalidRangeError
+
+        return start_num, end_num
+
+    def setupSim(self):
+        try:
+            start_num, end_num = self.requestSimRange()
+            runOptimalSim(start_num, end_num, LineSink(self.io),
+                          rng=self.rng)
+        except ValueError:
+            self.io.write("Both inputs need to be numbers! Try again.")
+        except game_exceptions.InvalidRangeError:
+            self.io.write("Cannot simulate between the given range of "
+                          "numbers!")
+            self.io.write("The starting number must be less than the end!\n")
+
+    def setupBatchSim(self):
+        try:
+            start_num, end_num = self.requestSimRange()
+            summary = simulateAllAnswers(start_num, end_num)
+            self.io.write(f"The bot searched for every answer from "
+                          f"{start_num} to {end_num}.")
+            self.io.write(util.formatWithBorder(str(summary)))
+        except ValueError:
+            self.io.write("Both inputs need to be numbers! Try again.")
+        except game_exceptions.InvalidRangeError:
+            self.io.write("Cannot simulate between the given range of "
+                          "numbers!")
+            self.io.write("The starting number must be less than the end!\n")
 
 
 def isCorrectGuess(guess: int, answer: int):
@@ -227,46 +303,56 @@ def isCorrectGuess(guess: int, answer: int):
     return False
 
 
-def setupSim():
-    try:
-        start_mess = "Enter the lowest value for the sim: "
-        end_mess = "Enter the highest value for the sim: "
-        start_num = int(input(start_mess))
-        end_num = int(input(end_mess))
-        # New line to reduce statement cluster
-        print()
-        if start_num >= end_num:
-            raise game_exceptions.InvalidRangeError
-        runOptimalSim(start_num, end_num)
-    except ValueError:
-        print("Both inputs need to be numbers! Try again.")
-    except game_exceptions.InvalidRangeError:
-        print("Cannot simulate between the given range of numbers!")
-        print("The starting number must be less than the end!\n")
-
-
-def runOptimalSim(start_num: int, end_num: int):
-    bot = GuessBot(start_num, end_num)
-    answer = randint(start_num, end_num)
-    print(f"The bot is looking for {answer}.")
-    bot_guess = bot.getNextGuess()
-    num_guesses = 1
-    guesses = [bot_guess]
-
-    while bot_guess != answer:
-        if bot_guess > answer:
-            bot.setUpperBound(bot_guess - 1)
-        else:
-            bot.setLowerBound(bot_guess + 1)
-
-        bot_guess = bot.getNextGuess()
-        num_guesses += 1
-        guesses.append(bot_guess)
-
-    print(f"The bot guessed the correct answer in {num_guesses} guesses.\n")
-    print(f"It's guess order is: {guesses}\n")
+@metrics.timed(metrics.SIM_RUN)
+def runOptimalSim(start_num: int, end_num: int, out=None, rng=None):
+    # out is any file-like sink, LineSink(game.io) for a Game's I/O
+    if out is None:
+        out = sys.stdout
+    draw = rng.randint if rng is not None else randint
+    answer = draw(start_num, end_num)
+    out.write(f"The bot is looking for {answer}.\n")
+
+    # The count comes before the guesses, so the bot plays twice rather
+    # than keep its guesses. Each guess is then written as soon as it is
+    # made, so only the current one is ever held in memory.
+    num_guesses = sum(1 for _ in iterOptimalSim(start_num, end_num, answer))
+    out.write(f"The bot guessed the correct answer in "
+              f"{num_guesses} guesses.\n\n")
+
+    out.write("It's guess order is: [")
+    for i, bot_guess in enumerate(iterOptimalSim(start_num, end_num,
+                                                 answer)):
+        if i:
+            out.write(", ")
+        out.write(str(bot_guess))
+    out.write("]\n\n")
+    return num_guesses
 
 
 if __name__ == "__main__":
-    game = Game(StatManager())
-    game.run()
+    # e.g. GTN_METRICS_PORT=9100 python3 game.py
+    metrics_port = os.environ.get("GTN_METRICS_PORT")
+    if metrics_port:
+        metrics.enable()
+        metrics.startHttpServer(int(metrics_port))
+    # e.g. GTN_SEED=42 python3 game.py to replay the same answers
+    seed = os.environ.get("GTN_SEED")
+    # e.g. GTN_EVIL_HOST=1 python3 game.py for an answer that dodges you
+    # e.g. GTN_JOURNAL=1 python3 game.py to append each game's stats to a
+    # journal instead of rewriting the whole save
+    stat_manager = JournaledStatManager() \
+        if os.environ.get("GTN_JOURNAL") else StatManager()
+    # e.g. GTN_EVENT_LOG=/tmp/games.log python3 game.py to log elsewhere,
+    # or GTN_EVENT_LOG= python3 game.py to not log games at all
+    event_log_file = os.environ.get("GTN_EVENT_LOG", "./games.log")
+    event_log = EventLogWriter(event_log_file) if event_log_file else None
+    game = Game(stat_manager, rng=AnswerStream(int(seed)) if seed else None,
+                evil_host=bool(os.environ.get("GTN_EVIL_HOST")),
+                event_log=event_log)
+    try:
+        game.run()
+    finally:
+        # Quitting exits from inside the menu, so games still buffered
+        # are written here
+        if event_log is not None:
+            event_log.close()
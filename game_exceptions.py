@@ -9,3 +9,7 @@ class InvalidSaveFormatError(Exception):
 
 class InvalidRangeError(Exception):
     pass
+
+
+class GameNotInProgressError(Exception):
+    pass
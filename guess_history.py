@@ -0,0 +1,72 @@
+# Built-in modules
+from array import array
+
+TOO_HIGH = 1
+TOO_LOW = -1
+
+
+class GuessHistory:
+    # Compact per-game guess record. Guesses and their replies sit in two
+    # typed arrays, and the interval the answer can still be in is kept
+    # up to date as guesses come in, so checks never rescan the history.
+    __slots__ = ("low", "high", "guesses", "replies", "num_wasted")
+
+    def __init__(self, range_start: int, range_end: int):
+        self.low = range_start
+        self.high = range_end
+        self.guesses = array("q")
+        self.replies = array("b")
+        self.num_wasted = 0
+
+    @classmethod
+    def restore(cls, low: int, high: int, guesses, replies,
+                num_wasted: int):
+        # Rebuilds a history from a checkpoint without replaying it
+        history = cls.__new__(cls)
+        history.low = low
+        history.high = high
+        history.guesses = guesses
+        history.replies = replies
+        history.num_wasted = num_wasted
+        return history
+
+    def __len__(self):
+        return len(self.replies)
+
+    def isFeasible(self, guess: int):
+        return self.low <= guess <= self.high
+
+    def remaining(self):
+        return max(0, self.high - self.low + 1)
+
+    def appendGuess(self, guess: int):
+        try:
+            self.guesses.append(guess)
+        except OverflowError:
+            # Ranges past 64 bits switch over to a plain list
+            self.guesses = list(self.guesses)
+            self.guesses.append(guess)
+
+    def record(self, guess: int, reply: int = 0):
+        # Returns True when the guess was already ruled out before it was
+        # made. reply is TOO_HIGH, TOO_LOW or 0 for the winning guess.
+        wasted = not self.isFeasible(guess)
+        if wasted:
+            self.num_wasted += 1
+        self.appendGuess(guess)
+        self.replies.append(reply)
+
+        if reply == TOO_HIGH:
+            self.high = min(self.high, guess - 1)
+        elif reply == TOO_LOW:
+            self.low = max(self.low, guess + 1)
+
+        return wasted
+
+    def lowerGuesses(self):
+        return [guess for guess, reply in zip(self.guesses, self.replies)
+                if reply == TOO_LOW]
+
+    def higherGuesses(self):
+        return [guess for guess, reply in zip(self.guesses, self.replies)
+                if reply == TOO_HIGH]
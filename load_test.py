@@ -0,0 +1,304 @@
+# Built-in modules
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import random
+import tempfile
+import time
+
+# Custom modules
+from bot import GuessBot
+from difficulty import DIFFICULTIES
+from engine import ScriptedIO
+from game import Game
+from rng import AnswerStream, deriveSeed
+from stat_manager import StatManager
+
+DEFAULT_GAMES = 2000
+REPORTED_PERCENTILES = (50, 90, 99)
+MENU_PROMPT = "Please select an option from above: "
+
+
+class PlayerModel:
+    name = "player"
+
+    def guess(self, rng: random.Random, low: int, high: int,
+              range_start: int, range_end: int):
+        # Returns the next line typed at the guess prompt. [low, high] is
+        # what the player has narrowed the answer down to so far.
+        raise NotImplementedError
+
+    def menuChoice(self, rng: random.Random):
+        return "1"
+
+
+class RandomPlayer(PlayerModel):
+    # Ignores every hint and picks anywhere in the game's range
+    name = "random"
+
+    def guess(self, rng, low, high, range_start, range_end):
+        return str(rng.randint(range_start, range_end))
+
+
+class BisectionPlayer(PlayerModel):
+    name = "bisection"
+
+    def guess(self, rng, low, high, range_start, range_end):
+        return str(GuessBot(low, high).getNextGuess())
+
+
+class NoisyBisectionPlayer(PlayerModel):
+    # Bisects, but sometimes guesses anywhere that is still possible
+    name = "noisy bisection"
+
+    def __init__(self, noise: float = 0.3):
+        self.noise = noise
+
+    def guess(self, rng, low, high, range_start, range_end):
+        if rng.random() < self.noise:
+            return str(rng.randint(low, high))
+        return str(GuessBot(low, high).getNextGuess())
+
+
+class InvalidInputPlayer(PlayerModel):
+    # Mostly types junk, which never uses up a chance, so every game
+    # still ends once the real guesses run out
+    name = "invalid input"
+    JUNK = ("", "abc", "1.5", "-", "0x10", "99999999999999999999", "  ")
+
+    def __init__(self, junk_rate: float = 0.7):
+        self.junk_rate = junk_rate
+
+    def guess(self, rng, low, high, range_start, range_end):
+        if rng.random() < self.junk_rate:
+            junk = rng.choice(self.JUNK)
+            # Numbers outside the range are as invalid as text
+            return junk or str(range_end + rng.randint(1, 10))
+        return str(GuessBot(low, high).getNextGuess())
+
+    def menuChoice(self, rng):
+        if rng.random() < self.junk_rate:
+            return rng.choice(("8", "play", "0", ""))
+        return "1"
+
+
+MODELS = {
+    "random": RandomPlayer,
+    "bisection": BisectionPlayer,
+    "noisy": NoisyBisectionPlayer,
+    "invalid": InvalidInputPlayer,
+}
+
+
+class SyntheticPlayerIO(ScriptedIO):
+    # Types a player model's input into the real menu and game loop,
+    # following the game's replies the way a person reading them would.
+    # Once num_games have been played it behaves like a closed stdin.
+    def __init__(self, model: PlayerModel, num_games: int, seed: int):
+        super().__init__((), keep_output=False)
+        self.model = model
+        self.games_left = num_games
+        self.rng = random.Random(seed)
+        self.range_start = self.range_end = None
+        self.low = self.high = None
+        self.last_guess = None
+
+    def readLine(self, prompt: str):
+        if prompt == MENU_PROMPT:
+            if self.games_left == 0:
+                raise EOFError
+            choice = self.model.menuChoice(self.rng)
+            if choice == "1":
+                self.games_left -= 1
+            return choice
+
+        if self.low is None:
+            # "Enter a number between <low> and <high>, inclusive: "
+            words = prompt.replace(",", "").split()
+            self.range_start, self.range_end = int(words[4]), int(words[6])
+            self.low, self.high = self.range_start, self.range_end
+        line = self.model.guess(self.rng, self.low, self.high,
+                                self.range_start, self.range_end)
+        self.last_guess = line
+        return line
+
+    def write(self, message: str = ''):
+        if message.startswith("Your guess was higher"):
+            self.high = min(self.high, int(self.last_guess) - 1)
+        elif message.startswith("Your guess was lower"):
+            self.low = max(self.low, int(self.last_guess) + 1)
+        elif message.startswith("The number was"):
+            self.low = self.high = None
+
+
+def timedCalls(func, durations: list):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    return wrapper
+
+
+def runPlayerShard(model_name: str, num_games: int, seed: int,
+                   difficulty: str):
+    # Runs in a worker process. Every shard saves to its own file so the
+    # workers measure save I/O instead of contending for one file.
+    guess_seconds = []
+    save_seconds = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        game = Game(StatManager(), difficulty,
+                    io=SyntheticPlayerIO(MODELS[model_name](), num_games,
+                                         seed),
+                    rng=AnswerStream(seed))
+        game.SAVEFILE_NAME = os.path.join(temp_dir, "persistent")
+        game.HAS_SAVE = False
+        game.setDifficulty(difficulty)
+        # Patched on the instance so the menu and game loop call them
+        game.handleGuess = timedCalls(game.handleGuess, guess_seconds)
+        game.saveGameStats = timedCalls(game.saveGameStats, save_seconds)
+
+        start = time.perf_counter()
+        try:
+            game.run()
+        except EOFError:
+            pass
+        seconds = time.perf_counter() - start
+
+    return {
+        "games": len(save_seconds),
+        "seconds": seconds,
+        "save_seconds": sum(save_seconds),
+        "guess_seconds": guess_seconds,
+    }
+
+
+def percentile(sorted_values: list, percent: float):
+    # Nearest-rank percentile of already sorted values
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class LoadTestReport:
+    def __init__(self, model_name: str, workers: int, games: int,
+                 seconds: float, busy_seconds: float, save_seconds: float,
+                 guess_seconds: list):
+        self.model_name = model_name
+        self.workers = workers
+        self.games = games
+        self.seconds = seconds
+        self.busy_seconds = busy_seconds
+        self.save_seconds = save_seconds
+        self.guess_seconds = sorted(guess_seconds)
+
+    @property
+    def games_per_second(self):
+        return self.games / self.seconds if self.seconds else 0.0
+
+    @property
+    def save_fraction(self):
+        # Share of the workers' time spent in saveGameStats
+        if not self.busy_seconds:
+            return 0.0
+        return self.save_seconds / self.busy_seconds
+
+    def latencyPercentiles(self):
+        # Per-guess latencies in milliseconds
+        return {p: percentile(self.guess_seconds, p) * 1000
+                for p in REPORTED_PERCENTILES}
+
+    def to_json(self):
+        return {
+            "model": self.model_name,
+            "workers": self.workers,
+            "games": self.games,
+            "guesses": len(self.guess_seconds),
+            "seconds": self.seconds,
+            "games_per_second": self.games_per_second,
+            "save_fraction": self.save_fraction,
+            "guess_latency_ms": {f"p{p}": value for p, value in
+                                 self.latencyPercentiles().items()},
+        }
+
+    def __str__(self):
+        latencies = ", ".join(f"p{p} {value:.3f} ms" for p, value in
+                              self.latencyPercentiles().items())
+        return f"{self.model_name}: {self.games} games in " \
+               f"{self.seconds:.2f}s ({self.games_per_second:.0f} " \
+               f"games/s on {self.workers} workers)\n" \
+               f"Guess latency: {latencies}\n" \
+               f"Save I/O: {self.save_fraction:.1%} of worker time"
+
+
+def splitGames(num_games: int, workers: int):
+    share, extra = divmod(num_games, workers)
+    return [share + (index < extra) for index in range(workers)]
+
+
+def runLoadTest(model_name: str, num_games: int = DEFAULT_GAMES,
+                workers: int = None, difficulty: str = "easy",
+                seed: int = 0):
+    if model_name not in MODELS:
+        raise ValueError(f"unknown player model {model_name!r}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    # Each shard plays from its own stream spawned from the run's seed
+    shards = [(model_name, games, deriveSeed(seed, index), difficulty)
+              for index, games in enumerate(splitGames(num_games, workers))
+              if games]
+
+    start = time.perf_counter()
+    if len(shards) <= 1:
+        results = [runPlayerShard(*shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            results = list(executor.map(runPlayerShard, *zip(*shards)))
+    seconds = time.perf_counter() - start
+
+    guess_seconds = []
+    for result in results:
+        guess_seconds.extend(result["guess_seconds"])
+    return LoadTestReport(
+        model_name, max(len(shards), 1),
+        sum(result["games"] for result in results), seconds,
+        sum(result["seconds"] for result in results),
+        sum(result["save_seconds"] for result in results), guess_seconds
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Drive scripted players through the menu, game loop "
+                    "and saves"
+    )
+    parser.add_argument("--model", nargs="*", choices=list(MODELS),
+                        default=list(MODELS))
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--difficulty", default="easy",
+                        choices=list(DIFFICULTIES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    reports = [runLoadTest(model_name, args.games, args.workers,
+                           args.difficulty, args.seed)
+               for model_name in args.model]
+    for report in reports:
+        print(f"{report}\n")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([report.to_json() for report in reports], f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    main()
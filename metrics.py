@@ -0,0 +1,177 @@
+# Built-in modules
+from bisect import bisect_left
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+# Custom modules
+import util
+
+# Instrumented code checks this flag before reading the clock, so with
+# metrics off the only cost is one attribute lookup per call site
+ENABLED = False
+
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01,
+                   0.05, 0.1, 0.5, 1.0, 5.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    TYPE = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name, self.value
+
+
+class Gauge(Counter):
+    TYPE = "gauge"
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Histogram:
+    TYPE = "histogram"
+
+    def __init__(self, name: str, description: str,
+                 buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus the +Inf overflow slot
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{bound}"}}', cumulative
+        yield f'{self.name}_bucket{{le="+Inf"}}', self.count
+        yield f"{self.name}_sum", self.total
+        yield f"{self.name}_count", self.count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str):
+        return self.register(Counter(name, description))
+
+    def gauge(self, name: str, description: str):
+        return self.register(Gauge(name, description))
+
+    def histogram(self, name: str, description: str,
+                  buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, description, buckets))
+
+    def render(self):
+        # Prometheus text exposition format
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(f"{name} {value}" for name, value in
+                         metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+MENU_DISPATCH = REGISTRY.histogram(
+    "gtn_menu_dispatch_seconds", "Time spent handling a menu choice")
+GUESS_HANDLING = REGISTRY.histogram(
+    "gtn_guess_seconds", "Time spent handling one guess in a game")
+STAT_SAVE = REGISTRY.histogram(
+    "gtn_stat_save_seconds", "Time spent saving statistics")
+STAT_LOAD = REGISTRY.histogram(
+    "gtn_stat_load_seconds", "Time spent loading statistics")
+SIM_RUN = REGISTRY.histogram(
+    "gtn_simulation_seconds", "Time spent running bot simulations")
+INVALID_MENU_INPUTS = REGISTRY.counter(
+    "gtn_invalid_menu_inputs_total", "Menu inputs that were not an option")
+INVALID_GUESSES = REGISTRY.counter(
+    "gtn_invalid_guesses_total", "Guesses that were not a number in range")
+ACTIVE_GAMES = REGISTRY.gauge(
+    "gtn_active_games", "Games currently in progress")
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def timed(histogram: Histogram):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def writeMetricsFile(filename: str, registry: MetricsRegistry = REGISTRY):
+    # Atomic so a scraper (e.g. node_exporter's textfile collector)
+    # never reads a half-written file
+    util.writeFileAtomic(filename, registry.render())
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrapes out of the game's terminal output
+        pass
+
+
+def startHttpServer(port: int, host: str = "127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
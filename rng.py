@@ -0,0 +1,81 @@
+# Built-in modules
+import hashlib
+import random
+import sys
+
+BATCH_SIZE = 4096
+# Caps a batch of big-int answers, which can be hundreds of bytes each
+MAX_BATCH_BYTES = 1 << 16
+# memoryview formats that turn a block of random bytes into ints at C
+# speed, by number of bytes per value
+FAST_FORMATS = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+def newRootSeed():
+    return random.SystemRandom().getrandbits(128)
+
+
+def deriveSeed(seed: int, index: int):
+    # Children are hashed from (parent, index), so streams never overlap
+    # and the same parent always spawns the same children
+    digest = hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=16)
+    return int.from_bytes(digest.digest(), "little")
+
+
+class AnswerStream:
+    # Seeded source of answers that draws them in batches. Each batch is a
+    # single getrandbits call cut into fixed-width values, with values
+    # past the range rejected so every answer is exactly uniform, also
+    # for big-int ranges. A seed of None picks a random one, which is
+    # kept in .seed so the run can be repeated.
+    def __init__(self, seed: int = None, batch_size: int = BATCH_SIZE):
+        if seed is None:
+            seed = newRootSeed()
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.seed = seed
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        # Unused answers per (start, end), so switching ranges back and
+        # forth doesn't throw batches away
+        self.batches = {}
+
+    def spawn(self, count: int):
+        return [AnswerStream(deriveSeed(self.seed, index), self.batch_size)
+                for index in range(count)]
+
+    def refill(self, start: int, end: int):
+        range_size = end - start + 1
+        if range_size < 1:
+            raise ValueError("start must not be greater than end")
+        bits = (range_size - 1).bit_length() or 1
+        width = -(-bits // 8)
+        mask = (1 << bits) - 1
+        num_bytes = min(self.batch_size, max(1, MAX_BATCH_BYTES // width)) \
+            * width
+        data = self.rng.getrandbits(num_bytes * 8).to_bytes(num_bytes,
+                                                            "little")
+
+        fast_format = FAST_FORMATS.get(width)
+        if fast_format is not None and sys.byteorder == "little":
+            values = memoryview(data).cast(fast_format)
+        else:
+            values = (int.from_bytes(data[i:i + width], "little")
+                      for i in range(0, len(data), width))
+        batch = [start + value for value in map(mask.__and__, values)
+                 if value < range_size]
+        # Popped from the end, so reverse to hand answers out in order
+        batch.reverse()
+        return batch
+
+    def randint(self, start: int, end: int):
+        # Drop-in for random.randint
+        batch = self.batches.get((start, end))
+        while not batch:
+            batch = self.refill(start, end)
+            self.batches[start, end] = batch
+        return batch.pop()
+
+    def answers(self, start: int, end: int, count: int):
+        for _ in range(count):
+            yield self.randint(start, end)
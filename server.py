@@ -0,0 +1,439 @@
+# Built-in modules
+import argparse
+import asyncio
+import os
+import secrets
+import threading
+import time
+
+# Custom modules
+from checkpoint import (CheckpointBuilder, CheckpointWriter, SessionState,
+                        loadCheckpoint)
+from decision_tree import DecisionTreeCache
+from difficulty import DIFFICULTIES
+from engine import GameEngine, GuessResult, ScriptedIO
+from event_log import EventLogWriter
+from game import Game
+from stat_journal import JournaledStatManager
+from stat_manager import StatManager
+import game_exceptions
+import metrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Seconds a client may stay silent before its session is closed
+SESSION_TIMEOUT = 300
+SAVE_INTERVAL = 30
+CHECKPOINT_INTERVAL = 5
+MAX_LINE_LENGTH = 1024
+MAX_SESSIONS = 20000
+
+HELP_MESSAGE = "Commands: play | <number> | difficulty <level> | " \
+               "hint | history | stats | resume <id> | help | quit"
+
+
+class GameSession:
+    # One connected player. Each session has its own Game (difficulty,
+    # range and chances) while the StatManager is shared by everyone.
+    def __init__(self, stat_manager: StatManager, decision_trees=None,
+                 session_id: str = None, event_log=None):
+        # Lets a player pick the session back up after a server restart
+        self.session_id = session_id if session_id is not None else \
+            secrets.token_hex(8)
+        self.io = ScriptedIO(())
+        self.game = Game(stat_manager, io=self.io, event_log=event_log)
+        self.game.decision_trees = decision_trees
+        self.engine = GameEngine(self.game)
+        self.in_game = False
+
+    @classmethod
+    def restore(cls, state: SessionState, stat_manager: StatManager,
+                decision_trees=None, event_log=None):
+        session = cls(stat_manager, decision_trees, state.session_id,
+                      event_log)
+        state.restore(session.game, session.engine)
+        if state.in_game:
+            session.in_game = True
+            if metrics.ENABLED:
+                metrics.ACTIVE_GAMES.inc()
+        return session
+
+    def handleLine(self, line: str):
+        command = line.strip()
+        lowered = command.lower()
+
+        if lowered in ("play", "new"):
+            self.startGame()
+        elif lowered.startswith("difficulty"):
+            self.changeDifficulty(command[len("difficulty"):].strip())
+        elif lowered == "history":
+            self.showHistory()
+        elif lowered == "hint":
+            self.showHint()
+        elif lowered == "stats":
+            self.io.write(str(self.game.stat_manager))
+        elif lowered == "help":
+            self.io.write(HELP_MESSAGE)
+        elif self.in_game:
+            self.submitGuess(command)
+        else:
+            self.io.write("Type 'play' to start a game or 'help' for help.")
+
+        return self.takeOutput()
+
+    def takeOutput(self):
+        output = self.io.output
+        self.io.output = []
+        return output
+
+    def startGame(self):
+        if not self.in_game and metrics.ENABLED:
+            metrics.ACTIVE_GAMES.inc()
+        self.engine.newGame()
+        self.in_game = True
+        self.io.write(f"Enter a number between {self.engine.range_start} "
+                      f"and {self.engine.range_end}, inclusive.")
+
+    def changeDifficulty(self, difficulty: str):
+        if self.in_game:
+            self.io.write("Finish your current game first!")
+            return
+        self.game.changeDifficulty(difficulty)
+
+    def showHint(self):
+        if not self.in_game:
+            self.io.write("You are not in a game.")
+            return
+        self.io.write(f"The optimal next guess is {self.engine.hint()}")
+
+    def showHistory(self):
+        if not self.in_game:
+            self.io.write("You are not in a game.")
+            return
+        self.game.printGuessHistory(self.engine.tries_left,
+                                    self.engine.history)
+
+    def endGame(self):
+        if self.in_game and metrics.ENABLED:
+            metrics.ACTIVE_GAMES.dec()
+        self.in_game = False
+
+    @metrics.timed(metrics.GUESS_HANDLING)
+    def submitGuess(self, guess_str: str):
+        try:
+            result = self.engine.submitGuess(int(guess_str))
+        except (ValueError, game_exceptions.InvalidOptionError):
+            if metrics.ENABLED:
+                metrics.INVALID_GUESSES.inc()
+            self.io.write("You did not enter an integer in the given range!")
+            return
+
+        if result is GuessResult.CORRECT:
+            if self.engine.first_try:
+                self.io.write("You guessed it on the first try!")
+            else:
+                self.io.write("You guessed it!")
+        elif result is GuessResult.TOO_HIGH:
+            self.io.write("Your guess was higher than the answer.")
+        else:
+            self.io.write("Your guess was lower than the answer.")
+        if self.engine.last_guess_wasted and not self.engine.won:
+            self.io.write("That number was already ruled out!")
+
+        if self.engine.isOver():
+            if not self.engine.won:
+                self.io.write("You are out of guesses.")
+            self.io.write(f"The number was {self.engine.answer}. "
+                          f"Thanks for playing!")
+            self.endGame()
+        else:
+            self.io.write(f"Guesses remaining: {self.engine.tries_left}")
+
+
+class GameServer:
+    def __init__(self, stat_manager: StatManager, host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT,
+                 session_timeout: float = SESSION_TIMEOUT,
+                 save_file: str = None, save_interval: float = SAVE_INTERVAL,
+                 max_sessions: int = MAX_SESSIONS, decision_trees=None,
+                 checkpoint_file: str = None,
+                 checkpoint_interval: float = CHECKPOINT_INTERVAL,
+                 event_log=None):
+        self.stat_manager = stat_manager
+        # Shared by every session, so each range's tree is mapped once
+        self.decision_trees = decision_trees
+        # Optional EventLogWriter every session records its games in
+        self.event_log = event_log
+        self.host = host
+        self.port = port
+        self.session_timeout = session_timeout
+        self.save_file = save_file
+        self.save_interval = save_interval
+        self.max_sessions = max_sessions
+        self.active_sessions = 0
+        self.server = None
+        self.save_task = None
+        self.write_lock = threading.Lock()
+        self.last_saved_guesses = None
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_writer = None
+        self.checkpoint_task = None
+        # Connected sessions, and sessions restored from a checkpoint that
+        # are waiting for their player to resume them
+        self.sessions = {}
+        self.detached = {}
+        self.detached_since = None
+        # Bumped on every handled line so idle servers skip checkpoints
+        self.changes = 0
+        self.last_checkpoint_changes = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handleClient, self.host, self.port, limit=MAX_LINE_LENGTH,
+            backlog=1024
+        )
+        # Port 0 picks a free port, so report the one actually bound
+        self.port = self.server.sockets[0].getsockname()[1]
+        if self.save_file is not None:
+            await self.loadStats()
+        # Still set unless the save couldn't be read
+        if self.save_file is not None:
+            self.save_task = asyncio.create_task(self.saveLoop())
+        if self.checkpoint_file is not None:
+            self.restoreSessions()
+            self.checkpoint_writer = CheckpointWriter(self.checkpoint_file)
+            self.checkpoint_task = asyncio.create_task(
+                self.checkpointLoop()
+            )
+
+    async def serveForever(self):
+        if self.server is None:
+            await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        if self.save_task is not None:
+            self.save_task.cancel()
+        if self.checkpoint_writer is not None:
+            self.checkpoint_task.cancel()
+            # Taken before connections close, so games still being played
+            # survive a planned restart
+            self.checkpointSessions()
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.checkpoint_writer.close
+            )
+            self.checkpoint_writer = None
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.saveStats()
+
+    async def saveLoop(self):
+        while True:
+            await asyncio.sleep(self.save_interval)
+            # A failed save is retried on the next round instead of
+            # ending periodic saving for good
+            try:
+                await self.saveStats()
+            except (OSError, ValueError) as error:
+                print(f"Could not save stats to {self.save_file}: {error}")
+
+    async def loadStats(self):
+        # Carries on from the existing save instead of replacing it with
+        # fresh counters. A save that can't be read is left alone and
+        # this server doesn't save at all.
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.stat_manager.load,
+                                       self.save_file)
+        except FileNotFoundError:
+            return
+        # Not JSON, or not even text
+        except (ValueError, game_exceptions.InvalidSaveFormatError):
+            print(f"Could not read {self.save_file}, stats will not be "
+                  f"saved.")
+            self.save_file = None
+            return
+        self.last_saved_guesses = self.stat_manager.num_guesses
+
+    async def saveStats(self):
+        # Stats are saved in batches instead of after every game. The
+        # save is serialized on the event loop, which is the only thing
+        # that changes the stats, and only the file write runs off it so
+        # slow disks don't stall the other sessions.
+        if self.save_file is None:
+            return
+        num_guesses = self.stat_manager.num_guesses
+        if num_guesses == self.last_saved_guesses:
+            return
+        writes = self.stat_manager.prepareSave(self.save_file)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.runWrites, writes)
+        self.last_saved_guesses = num_guesses
+
+    def runWrites(self, writes):
+        # A save cancelled by stop() may still be writing on its thread
+        # when the final save starts
+        with self.write_lock:
+            for write in writes:
+                write()
+
+    def restoreSessions(self):
+        # The whole checkpoint is read and decoded in one go. A session is
+        # only rebuilt from its state once its player resumes it.
+        if not os.path.exists(self.checkpoint_file):
+            return
+        try:
+            states = loadCheckpoint(self.checkpoint_file)
+        except game_exceptions.InvalidSaveFormatError:
+            return
+        # Sessions on difficulties that are no longer registered can't
+        # be played, so they aren't offered
+        self.detached = {state.session_id: state for state in states
+                         if state.difficulty in DIFFICULTIES}
+        self.detached_since = time.monotonic()
+
+    async def checkpointLoop(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            self.checkpointSessions()
+
+    def checkpointSessions(self):
+        # Capturing is a pass over in-memory state on the event loop, so
+        # every session is seen at a consistent point. The write happens
+        # on the checkpoint writer's thread.
+        if self.detached and time.monotonic() - self.detached_since > \
+                self.session_timeout:
+            # Nobody came back for these in time
+            self.detached = {}
+            self.changes += 1
+        if self.changes == self.last_checkpoint_changes:
+            return
+        builder = CheckpointBuilder()
+        for session in self.sessions.values():
+            builder.add(session.session_id, session.game, session.engine,
+                        session.in_game)
+        for state in self.detached.values():
+            builder.addState(state)
+        self.checkpoint_writer.submit(builder.encode())
+        self.last_checkpoint_changes = self.changes
+
+    def resumeSession(self, session: GameSession, session_id: str):
+        # Swaps the connection's session for one restored from a
+        # checkpoint. Returns the session to use and the lines to send.
+        state = self.detached.pop(session_id, None)
+        if state is None:
+            return session, ["No session to resume with that id."]
+        restored = GameSession.restore(state, self.stat_manager,
+                                       self.decision_trees, self.event_log)
+        session.endGame()
+        del self.sessions[session.session_id]
+        self.sessions[session_id] = restored
+        lines = [f"Session {session_id} resumed."]
+        if restored.in_game:
+            engine = restored.engine
+            lines.append(f"Enter a number between {engine.range_start} "
+                         f"and {engine.range_end}, inclusive.")
+            lines.append(f"Guesses remaining: {engine.tries_left}")
+        return restored, lines
+
+    async def send(self, writer, lines):
+        writer.write("".join(f"{line}\n" for line in lines).encode())
+        # Wait for slow clients to drain so output can't pile up in memory
+        await writer.drain()
+
+    async def handleClient(self, reader, writer):
+        if self.active_sessions >= self.max_sessions:
+            writer.close()
+            return
+
+        self.active_sessions += 1
+        session = GameSession(self.stat_manager, self.decision_trees,
+                              event_log=self.event_log)
+        self.sessions[session.session_id] = session
+        self.changes += 1
+        try:
+            await self.send(writer, ["Welcome to Guess The Number!",
+                                     f"Your session id is "
+                                     f"{session.session_id}.",
+                                     HELP_MESSAGE])
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(),
+                                                  self.session_timeout)
+                except asyncio.TimeoutError:
+                    await self.send(writer, ["Session timed out."])
+                    break
+                except ValueError:
+                    await self.send(writer, ["Line too long."])
+                    break
+
+                if not line:
+                    break
+                text = line.decode(errors="replace")
+                command = text.strip()
+                self.changes += 1
+                if command.lower() == "quit":
+                    await self.send(writer, ["Goodbye!"])
+                    break
+                if command.lower().startswith("resume"):
+                    session, lines = self.resumeSession(
+                        session, command[len("resume"):].strip()
+                    )
+                    await self.send(writer, lines)
+                    continue
+                await self.send(writer, session.handleLine(text))
+        except ConnectionError:
+            pass
+        finally:
+            # Games abandoned by a disconnect are no longer active
+            session.endGame()
+            self.sessions.pop(session.session_id, None)
+            self.changes += 1
+            self.active_sessions -= 1
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Host Guess The Number for many players at once"
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--timeout", type=float, default=SESSION_TIMEOUT)
+    parser.add_argument("--save-file", default="./persistent")
+    parser.add_argument("--checkpoint-file", default="./sessions.checkpoint",
+                        help="Where live games are checkpointed so a "
+                             "restarted server can resume them")
+    parser.add_argument("--event-log", default="./games.log",
+                        help="Where every finished game is recorded, "
+                             "an empty path turns the log off")
+    parser.add_argument("--journal", action="store_true",
+                        help="Append stat changes to a journal instead of "
+                             "rewriting the whole save file")
+    args = parser.parse_args()
+
+    event_log = EventLogWriter(args.event_log) if args.event_log else None
+    stat_manager = JournaledStatManager() if args.journal else StatManager()
+    server = GameServer(stat_manager, args.host, args.port, args.timeout,
+                        args.save_file, decision_trees=DecisionTreeCache(),
+                        checkpoint_file=args.checkpoint_file,
+                        event_log=event_log)
+    print(f"Serving on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serveForever())
+    except KeyboardInterrupt:
+        print("Exiting server...")
+    finally:
+        # Games still buffered when the server shuts down
+        if event_log is not None:
+            event_log.close()
+
+
+if __name__ == "__main__":
+    main()
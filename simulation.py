@@ -0,0 +1,265 @@
+# Built-in modules
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fractions import Fraction
+from functools import lru_cache
+import os
+
+# Custom modules
+from bot import GuessBot
+from rng import AnswerStream, deriveSeed
+import metrics
+
+REPORTED_PERCENTILES = (50, 90, 95, 99)
+SHARDS_PER_WORKER = 4
+# Sampled games per stream. Fixed so results don't depend on worker count
+SAMPLE_SHARD_SIZE = 10000
+
+
+class SimSummary:
+    def __init__(self, histogram=None):
+        # Maps number of guesses -> number of answers found in that many
+        self.histogram = Counter(histogram or {})
+
+    def __str__(self):
+        percentile_str = ", ".join(
+            f"p{p}: {val}" for p, val in self.percentiles().items()
+        )
+        return f"Answers simulated: {self.total}\n" \
+               f"Mean guesses: {self.mean:.4f}\n" \
+               f"Max guesses: {self.max}\n" \
+               f"Percentiles: {percentile_str}\n" \
+               f"Histogram: {dict(sorted(self.histogram.items()))}"
+
+    @property
+    def total(self):
+        return sum(self.histogram.values())
+
+    @property
+    def mean(self):
+        total = self.total
+        if total == 0:
+            return 0.0
+        guess_sum = sum(d * count for d, count in self.histogram.items())
+        return guess_sum / total
+
+    @property
+    def max(self):
+        return max(self.histogram, default=0)
+
+    def percentile(self, p: float):
+        total = self.total
+        if total == 0:
+            return 0
+        # Nearest-rank percentile, walking the (short) sorted histogram.
+        # Integer math keeps this exact for big-int totals.
+        rank = max(1, -(-total * Fraction(p) // 100))
+        seen = 0
+        for num_guesses in sorted(self.histogram):
+            seen += self.histogram[num_guesses]
+            if seen >= rank:
+                return num_guesses
+
+        return self.max
+
+    def percentiles(self):
+        return {p: self.percentile(p) for p in REPORTED_PERCENTILES}
+
+    def merge(self, other: 'SimSummary'):
+        self.histogram.update(other.histogram)
+        return self
+
+    def to_json(self):
+        return {
+            "total": self.total,
+            "mean": self.mean,
+            "max": self.max,
+            "percentiles": self.percentiles(),
+            "histogram": dict(sorted(self.histogram.items()))
+        }
+
+
+def botSplit(range_size: int):
+    # Number of answers left below the bot's first guess for a range
+    # of the given size. The rest (minus the guess) end up above it.
+    return GuessBot(0, range_size - 1).getNextGuess()
+
+
+@lru_cache(maxsize=4096)
+def sizeHistogram(range_size: int):
+    # Closed-form count of answers found at each depth for every answer
+    # in a range of range_size numbers. The bot only looks at the size
+    # of its current range, so every depth holds at most a couple of
+    # distinct sizes and this runs in O(log n) even for huge ranges.
+    return depthHistogram(range_size, botSplit)
+
+
+def depthHistogram(range_size: int, split):
+    # Same as sizeHistogram for any searcher whose guess only depends on
+    # the size of its range. split(size) gives how many numbers are left
+    # below the guess.
+    histogram = []
+    level = {range_size: 1}
+    depth = 1
+    while level:
+        histogram.append((depth, sum(level.values())))
+        next_level = Counter()
+        for size, multiplicity in level.items():
+            lower_size = split(size)
+            upper_size = size - 1 - lower_size
+            if lower_size > 0:
+                next_level[lower_size] += multiplicity
+            if upper_size > 0:
+                next_level[upper_size] += multiplicity
+        level = next_level
+        depth += 1
+
+    return tuple(histogram)
+
+
+def answerHistogram(start_num: int, end_num: int,
+                    answer_start: int = None, answer_end: int = None):
+    # Guess-count histogram for the bot searching [start_num, end_num],
+    # counting only answers inside [answer_start, answer_end].
+    # Sub-ranges that lie fully inside the answer window use the
+    # closed-form size histogram, so only the O(log n) ranges straddling
+    # the window edges are walked guess by guess.
+    if answer_start is None:
+        answer_start = start_num
+    if answer_end is None:
+        answer_end = end_num
+
+    histogram = Counter()
+    pending = [(start_num, end_num, 1)]
+    while pending:
+        low, high, depth = pending.pop()
+        if low > high or high < answer_start or low > answer_end:
+            continue
+        if answer_start <= low and high <= answer_end:
+            for num_guesses, count in sizeHistogram(high - low + 1):
+                histogram[num_guesses + depth - 1] += count
+            continue
+
+        bot_guess = GuessBot(low, high).getNextGuess()
+        if answer_start <= bot_guess <= answer_end:
+            histogram[depth] += 1
+        pending.append((low, bot_guess - 1, depth + 1))
+        pending.append((bot_guess + 1, high, depth + 1))
+
+    return histogram
+
+
+def iterOptimalSim(start_num: int, end_num: int, answer: int):
+    # Yields the bot's guesses one at a time until it finds the answer.
+    # Nothing is accumulated, so callers can stop early or keep only a
+    # summary even when the numbers themselves are enormous.
+    if not start_num <= answer <= end_num:
+        raise ValueError("answer must be inside the simulated range")
+    bot = GuessBot(start_num, end_num)
+    bot_guess = bot.getNextGuess()
+    yield bot_guess
+
+    while bot_guess != answer:
+        if bot_guess > answer:
+            bot.setUpperBound(bot_guess - 1)
+        else:
+            bot.setLowerBound(bot_guess + 1)
+
+        bot_guess = bot.getNextGuess()
+        yield bot_guess
+
+
+@metrics.timed(metrics.SIM_RUN)
+def simulateAllAnswers(start_num: int, end_num: int):
+    return SimSummary(answerHistogram(start_num, end_num))
+
+
+def splitIntoShards(start_num: int, end_num: int, chunk_size: int):
+    shard_start = start_num
+    while shard_start <= end_num:
+        shard_end = min(shard_start + chunk_size - 1, end_num)
+        yield shard_start, shard_end
+        shard_start = shard_end + 1
+
+
+def simulateShard(start_num: int, end_num: int,
+                  shard_start: int, shard_end: int):
+    # Runs in a worker process, so only a small dict is sent back
+    return dict(answerHistogram(start_num, end_num, shard_start, shard_end))
+
+
+@metrics.timed(metrics.SIM_RUN)
+def simulateSharded(start_num: int, end_num: int, workers: int = None,
+                    chunk_size: int = None, progress=None):
+    if start_num > end_num:
+        raise ValueError("start_num must not be greater than end_num")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    range_size = end_num - start_num + 1
+    if chunk_size is None:
+        chunk_size = -(-range_size // (workers * SHARDS_PER_WORKER))
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    shards = list(splitIntoShards(start_num, end_num, chunk_size))
+    summary = SimSummary()
+
+    # Skip the pool entirely when there's nothing to parallelize
+    if workers == 1 or len(shards) == 1:
+        for done, (shard_start, shard_end) in enumerate(shards, 1):
+            summary.merge(SimSummary(simulateShard(
+                start_num, end_num, shard_start, shard_end
+            )))
+            if progress is not None:
+                progress(done, len(shards))
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(simulateShard, start_num, end_num,
+                            shard_start, shard_end)
+            for shard_start, shard_end in shards
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            summary.merge(SimSummary(future.result()))
+            if progress is not None:
+                progress(done, len(shards))
+
+    return summary
+
+
+def sampleShard(start_num: int, end_num: int, num_games: int, seed: int):
+    histogram = Counter()
+    for answer in AnswerStream(seed).answers(start_num, end_num, num_games):
+        histogram[sum(1 for _ in iterOptimalSim(start_num, end_num,
+                                                answer))] += 1
+    return dict(histogram)
+
+
+@metrics.timed(metrics.SIM_RUN)
+def sampleOptimalSim(start_num: int, end_num: int, num_games: int,
+                     seed: int, workers: int = None):
+    # Plays the bot against num_games random answers. Shard i always uses
+    # the i-th stream spawned from seed, so reruns are bit-identical on
+    # any number of workers.
+    if start_num > end_num:
+        raise ValueError("start_num must not be greater than end_num")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = [(start_num, end_num,
+               min(SAMPLE_SHARD_SIZE, num_games - shard_start),
+               deriveSeed(seed, index))
+              for index, shard_start in
+              enumerate(range(0, num_games, SAMPLE_SHARD_SIZE))]
+    summary = SimSummary()
+
+    if workers == 1 or len(shards) <= 1:
+        for shard in shards:
+            summary.merge(SimSummary(sampleShard(*shard)))
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for histogram in executor.map(sampleShard, *zip(*shards)):
+            summary.merge(SimSummary(histogram))
+
+    return summary
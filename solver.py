@@ -0,0 +1,179 @@
+# Built-in modules
+import argparse
+from fractions import Fraction
+from functools import lru_cache
+import json
+import os
+
+# Custom modules
+from simulation import sizeHistogram
+import util
+
+CACHE_FILENAME = "./solver_cache.json"
+
+
+class SolverResult:
+    # Win probabilities and expected guesses for a uniformly random answer
+    # among range_size numbers with `chances` guesses. Expected guesses
+    # count a lost game as using every chance.
+    def __init__(self, range_size: int, chances: int,
+                 win_probability: Fraction, expected_guesses: Fraction,
+                 bot_win_probability: Fraction,
+                 bot_expected_guesses: Fraction):
+        self.range_size = range_size
+        self.chances = chances
+        self.win_probability = win_probability
+        self.expected_guesses = expected_guesses
+        self.bot_win_probability = bot_win_probability
+        self.bot_expected_guesses = bot_expected_guesses
+
+    def __str__(self):
+        return f"Range of {self.range_size} with {self.chances} chances: " \
+               f"optimal win rate {float(self.win_probability):.2%}, " \
+               f"expected guesses {float(self.expected_guesses):.3f}"
+
+    def to_json(self):
+        return [str(self.win_probability), str(self.expected_guesses),
+                str(self.bot_win_probability),
+                str(self.bot_expected_guesses)]
+
+    @classmethod
+    def fromJson(cls, range_size: int, chances: int, data):
+        return cls(range_size, chances, *(Fraction(value) for value in data))
+
+
+def maxWinnable(range_size: int, chances: int):
+    # A search tree of depth `chances` has at most 2^chances - 1 guesses
+    return min(range_size, (1 << chances) - 1)
+
+
+def totalDepth(num_nodes: int):
+    # Sum of depths of the first num_nodes nodes of a binary tree filled
+    # level by level, which is the cheapest shape for that many answers
+    full_levels = (num_nodes + 1).bit_length() - 1
+    full_nodes = (1 << full_levels) - 1
+    full_depth = (full_levels - 1) * (1 << full_levels) + 1
+    return full_depth + (num_nodes - full_nodes) * (full_levels + 1)
+
+
+def optimalWinProbability(range_size: int, chances: int):
+    return Fraction(maxWinnable(range_size, chances), range_size)
+
+
+def optimalExpectedGuesses(range_size: int, chances: int):
+    winnable = maxWinnable(range_size, chances)
+    guesses = totalDepth(winnable) + (range_size - winnable) * chances
+    return Fraction(guesses, range_size)
+
+
+def botStats(range_size: int, chances: int):
+    # (answers found, total guesses spent on them) for GuessBot with a
+    # budget, read off the bot's cached per-depth answer counts
+    found = guesses = 0
+    for num_guesses, count in sizeHistogram(range_size):
+        if num_guesses > chances:
+            break
+        found += count
+        guesses += num_guesses * count
+    return found, guesses
+
+
+@lru_cache(maxsize=None)
+def exhaustiveSolve(range_size: int, chances: int):
+    # Reference DP trying every possible guess, only practical for small
+    # ranges. Returns (answers found, guesses spent on them) maximizing
+    # found answers and then minimizing guesses.
+    if range_size <= 0 or chances <= 0:
+        return 0, 0
+    best = None
+    for guess in range(range_size):
+        lower = exhaustiveSolve(guess, chances - 1)
+        upper = exhaustiveSolve(range_size - 1 - guess, chances - 1)
+        found = 1 + lower[0] + upper[0]
+        guesses = found + lower[1] + upper[1]
+        if best is None or (found, -guesses) > (best[0], -best[1]):
+            best = (found, guesses)
+    return best
+
+
+class Solver:
+    # Results are cheap to compute, but kept in a table that can be
+    # persisted so repeated lookups across runs are a dict hit
+    def __init__(self, cache_filename: str = None):
+        self.cache_filename = cache_filename
+        self.table = {}
+        self.dirty = False
+        if cache_filename is not None and os.path.exists(cache_filename):
+            self.loadCache()
+
+    def loadCache(self):
+        try:
+            with open(self.cache_filename, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (ValueError, OSError):
+            return
+        # A cache in the wrong shape is ignored like a missing one
+        table = {}
+        try:
+            for key, data in stored.items():
+                range_size, chances = (int(part) for part in key.split(","))
+                table[range_size, chances] = SolverResult.fromJson(
+                    range_size, chances, data
+                )
+        except (ValueError, TypeError, AttributeError, ZeroDivisionError):
+            return
+        self.table = table
+
+    def saveCache(self):
+        if self.cache_filename is None or not self.dirty:
+            return
+        stored = {f"{range_size},{chances}": result.to_json()
+                  for (range_size, chances), result in self.table.items()}
+        util.writeFileAtomic(self.cache_filename, json.dumps(stored))
+        self.dirty = False
+
+    def solve(self, range_size: int, chances: int):
+        if range_size < 1 or chances < 0:
+            raise ValueError("range_size must be positive and chances "
+                             "can't be negative")
+        key = (range_size, chances)
+        result = self.table.get(key)
+        if result is None:
+            bot_found, bot_guesses = botStats(range_size, chances)
+            bot_total = bot_guesses + (range_size - bot_found) * chances
+            result = SolverResult(
+                range_size, chances,
+                optimalWinProbability(range_size, chances),
+                optimalExpectedGuesses(range_size, chances),
+                Fraction(bot_found, range_size),
+                Fraction(bot_total, range_size)
+            )
+            self.table[key] = result
+            self.dirty = True
+
+        return result
+
+    def solveRange(self, range_start: int, range_end: int, chances: int):
+        return self.solve(range_end - range_start + 1, chances)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exact win probability for a range size and chances"
+    )
+    parser.add_argument("range_size", type=int)
+    parser.add_argument("chances", type=int)
+    parser.add_argument("--cache", default=CACHE_FILENAME)
+    args = parser.parse_args()
+
+    solver = Solver(args.cache)
+    result = solver.solve(args.range_size, args.chances)
+    solver.saveCache()
+    print(result)
+    print(f"The built-in bot wins {float(result.bot_win_probability):.2%} "
+          f"using {float(result.bot_expected_guesses):.3f} guesses "
+          f"on average")
+
+
+if __name__ == "__main__":
+    main()
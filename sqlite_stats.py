@@ -0,0 +1,136 @@
+# Built-in modules
+from functools import partial
+import json
+import os
+import sqlite3
+
+# Custom modules
+from stat_manager import StatManager, statDict, parseSave
+import game_exceptions
+
+DEFAULT_PLAYER = "default"
+SQLITE_HEADER = b"SQLite format 3\x00"
+LEGACY_BACKUP_SUFFIX = ".json.bak"
+
+
+def isSqliteFile(filename: str):
+    with open(filename, "rb") as f:
+        return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+
+
+class StatStore:
+    # Many player profiles in one SQLite database, one row per player
+    # keyed (and indexed) by player id with a column per counter
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.createSchema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def createSchema(self):
+        columns = ", ".join(f"{stat} INTEGER NOT NULL DEFAULT 0"
+                            for stat in statDict)
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS profiles "
+                f"(player_id TEXT PRIMARY KEY, {columns}) WITHOUT ROWID"
+            )
+            # Counters added since the database was created
+            existing = {row[1] for row in
+                        self.connection.execute("PRAGMA table_info(profiles)")}
+            for stat in statDict:
+                if stat not in existing:
+                    self.connection.execute(
+                        f"ALTER TABLE profiles ADD COLUMN "
+                        f"{stat} INTEGER NOT NULL DEFAULT 0"
+                    )
+
+    def getProfile(self, player_id: str):
+        row = self.connection.execute(
+            f"SELECT {', '.join(statDict)} FROM profiles "
+            f"WHERE player_id = ?", (player_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        return dict(zip(statDict, row))
+
+    def getPlayers(self):
+        rows = self.connection.execute(
+            "SELECT player_id FROM profiles ORDER BY player_id"
+        )
+        return [row[0] for row in rows]
+
+    def upsertProfiles(self, profiles: dict):
+        # All profiles go in as one transaction with a single prepared
+        # statement, which is what makes bulk writes fast
+        stats = list(statDict)
+        updates = ", ".join(f"{stat} = excluded.{stat}" for stat in stats)
+        query = f"INSERT INTO profiles (player_id, {', '.join(stats)}) " \
+                f"VALUES ({', '.join('?' * (len(stats) + 1))}) " \
+                f"ON CONFLICT(player_id) DO UPDATE SET {updates}"
+        rows = ((player_id, *(profile[stat] for stat in stats))
+                for player_id, profile in profiles.items())
+        with self.connection:
+            self.connection.executemany(query, rows)
+
+    def close(self):
+        self.connection.close()
+
+
+def migrateJsonSave(json_filename: str, db_filename: str = None,
+                    player_id: str = DEFAULT_PLAYER):
+    # Moves a ./persistent style JSON save into a database. Without a
+    # db_filename the database replaces the JSON file in place and the
+    # old file is kept next to it as a backup.
+    with open(json_filename, "r", encoding="utf-8") as f:
+        stat_data = parseSave(json.loads(f.read()))
+
+    if db_filename is None:
+        db_filename = json_filename
+        os.replace(json_filename, f"{json_filename}{LEGACY_BACKUP_SUFFIX}")
+
+    with StatStore(db_filename) as store:
+        store.upsertProfiles({player_id: stat_data})
+
+    return stat_data
+
+
+class SqliteStatManager(StatManager):
+    # Same save/load interface as StatManager, so Game keeps working,
+    # but the save file is a database that can hold many players
+    def __init__(self, player_id: str = DEFAULT_PLAYER):
+        super().__init__()
+        self.player_id = player_id
+
+    def migrateIfLegacy(self, filename: str):
+        if os.path.exists(filename) and not isSqliteFile(filename):
+            migrateJsonSave(filename, player_id=self.player_id)
+
+    def save(self, filename: str):
+        self.migrateIfLegacy(filename)
+        with StatStore(filename) as store:
+            store.upsertProfiles({self.player_id: self.counters()})
+
+    def prepareSave(self, filename: str):
+        # The database does its own writing, all of it in the write
+        return [partial(self.save, filename)]
+
+    def load(self, filename):
+        if not os.path.exists(filename):
+            raise FileNotFoundError(filename)
+        self.migrateIfLegacy(filename)
+
+        with StatStore(filename) as store:
+            stat_data = store.getProfile(self.player_id)
+        if stat_data is None:
+            raise game_exceptions.InvalidSaveFormatError
+
+        for stat in statDict:
+            setattr(self, stat, stat_data[stat])
+        return True
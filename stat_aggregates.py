@@ -0,0 +1,256 @@
+# Built-in modules
+from array import array
+import base64
+import sys
+
+WINDOW_SIZE = 1000
+TRACKED_QUANTILES = (0.5, 0.95)
+REPORTED_PERCENTILES = (50, 95)
+
+
+def packArray(values: array):
+    # Little-endian bytes as base64 text, a few kilobytes for a full
+    # window where a JSON list of numbers would take tens
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def unpackArray(typecode: str, text: str):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(text, validate=True))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+class P2Quantile:
+    # Streaming quantile estimate (P-square algorithm by Jain and
+    # Chlamtac). Keeps five markers no matter how many values are added.
+    def __init__(self, quantile: float):
+        self.quantile = quantile
+        self.count = 0
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value: float):
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self.parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self.linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def parabolic(self, i: int, step: int):
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def linear(self, i: int, step: int):
+        q, n = self.heights, self.positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    def value(self):
+        if self.count == 0:
+            return 0.0
+        if self.count <= 5:
+            index = round(self.quantile * (self.count - 1))
+            return self.heights[index]
+        return self.heights[2]
+
+    def to_json(self):
+        return {"quantile": self.quantile, "count": self.count,
+                "heights": self.heights, "positions": self.positions,
+                "desired": self.desired}
+
+    @classmethod
+    def fromJson(cls, data: dict):
+        estimate = cls(data["quantile"])
+        estimate.count = data["count"]
+        estimate.heights = list(data["heights"])
+        estimate.positions = list(data["positions"])
+        estimate.desired = list(data["desired"])
+        return estimate
+
+
+class RollingWindow:
+    # Ring buffer over the last `size` games with running sums, so the
+    # windowed win rate and mean guesses cost O(1) per game
+    def __init__(self, size: int = WINDOW_SIZE):
+        self.size = size
+        self.outcomes = array("B", bytes(size))
+        self.guesses = array("I", bytes(4 * size))
+        self.next_index = 0
+        self.filled = 0
+        self.win_sum = 0
+        self.guess_sum = 0
+
+    def add(self, won: bool, num_guesses: int):
+        i = self.next_index
+        if self.filled == self.size:
+            self.win_sum -= self.outcomes[i]
+            self.guess_sum -= self.guesses[i]
+        else:
+            self.filled += 1
+        self.outcomes[i] = int(won)
+        self.guesses[i] = num_guesses
+        self.win_sum += int(won)
+        self.guess_sum += num_guesses
+        self.next_index = (i + 1) % self.size
+
+    def winRate(self):
+        return self.win_sum / self.filled if self.filled else 0.0
+
+    def meanGuesses(self):
+        return self.guess_sum / self.filled if self.filled else 0.0
+
+    def chronological(self):
+        start = (self.next_index - self.filled) % self.size
+        for offset in range(self.filled):
+            i = (start + offset) % self.size
+            yield self.outcomes[i], self.guesses[i]
+
+    def inOrder(self, values: array):
+        # Slice of a ring buffer column from the oldest game to the newest
+        if self.filled < self.size:
+            return values[:self.filled]
+        return values[self.next_index:] + values[:self.next_index]
+
+    def to_json(self):
+        outcomes = self.inOrder(self.outcomes)
+        guesses = self.inOrder(self.guesses)
+        # One byte per game unless a game took more than 255 guesses
+        if max(guesses, default=0) <= 0xFF:
+            guesses = array("B", guesses)
+        return {"size": self.size,
+                "outcomes": packArray(outcomes),
+                "guess_type": guesses.typecode,
+                "guesses": packArray(guesses)}
+
+    @classmethod
+    def fromJson(cls, data: dict):
+        window = cls(data["size"])
+        outcomes, guesses = data["outcomes"], data["guesses"]
+        # Older saves stored both columns as plain lists
+        if isinstance(outcomes, str):
+            outcomes = unpackArray("B", outcomes)
+            guesses = unpackArray(data["guess_type"], guesses)
+        for won, num_guesses in zip(outcomes, guesses):
+            window.add(bool(won), num_guesses)
+        return window
+
+
+class GameAggregates:
+    # Per-game aggregates on top of StatManager's plain counters. Every
+    # structure is bounded: histograms by each difficulty's chances, the
+    # quantile estimates by five markers and the window by its size.
+    def __init__(self, window_size: int = WINDOW_SIZE):
+        self.histograms = {}
+        self.duration_quantiles = {q: P2Quantile(q)
+                                   for q in TRACKED_QUANTILES}
+        self.window = RollingWindow(window_size)
+        self.games = 0
+
+    def isEmpty(self):
+        return self.games == 0
+
+    def recordGame(self, difficulty: str, won: bool, num_guesses: int,
+                   duration: float):
+        histogram = self.histograms.setdefault(difficulty, {})
+        histogram[num_guesses] = histogram.get(num_guesses, 0) + 1
+        for estimate in self.duration_quantiles.values():
+            estimate.add(duration)
+        self.window.add(won, num_guesses)
+        self.games += 1
+
+    def guessPercentile(self, difficulty: str, p: float):
+        histogram = self.histograms.get(difficulty)
+        if not histogram:
+            return 0
+        total = sum(histogram.values())
+        rank = max(1, -(-total * p // 100))
+        seen = 0
+        for num_guesses in sorted(histogram):
+            seen += histogram[num_guesses]
+            if seen >= rank:
+                return num_guesses
+
+        return max(histogram)
+
+    def summaryLines(self):
+        lines = []
+        for difficulty in self.histograms:
+            percentiles = ", ".join(
+                f"p{p} {self.guessPercentile(difficulty, p)}"
+                for p in REPORTED_PERCENTILES
+            )
+            lines.append(f"Guesses per game on {difficulty}: {percentiles}")
+        durations = ", ".join(f"p{round(q * 100)} {estimate.value():.1f}s"
+                              for q, estimate in
+                              self.duration_quantiles.items())
+        lines.append(f"Game length: {durations}")
+        lines.append(f"Win rate over last {self.window.filled} games: "
+                     f"{self.window.winRate():.1%}")
+        lines.append(f"Mean guesses over last {self.window.filled} games: "
+                     f"{self.window.meanGuesses():.2f}")
+        return lines
+
+    def to_json(self):
+        return {
+            "games": self.games,
+            "histograms": {
+                difficulty: {str(k): v for k, v in histogram.items()}
+                for difficulty, histogram in self.histograms.items()
+            },
+            "duration_quantiles": [estimate.to_json() for estimate in
+                                   self.duration_quantiles.values()],
+            "window": self.window.to_json()
+        }
+
+    @classmethod
+    def fromJson(cls, data: dict):
+        aggregates = cls()
+        aggregates.games = data["games"]
+        aggregates.histograms = {
+            difficulty: {int(k): v for k, v in histogram.items()}
+            for difficulty, histogram in data["histograms"].items()
+        }
+        aggregates.duration_quantiles = {
+            estimate["quantile"]: P2Quantile.fromJson(estimate)
+            for estimate in data["duration_quantiles"]
+        }
+        aggregates.window = RollingWindow.fromJson(data["window"])
+        return aggregates
@@ -0,0 +1,187 @@
+# Built-in modules
+from array import array
+from collections.abc import Mapping
+from functools import partial
+import os
+import struct
+import sys
+
+# Custom modules
+from stat_manager import BASE_STATS, StatManager, statDict
+import game_exceptions
+import util
+
+MAGIC = b"GTNB"
+BINARY_VERSION = 1
+DEFAULT_PLAYER = "default"
+# Magic, format version, number of counters, number of profiles
+HEADER = struct.Struct("<4sHHI")
+NAMES_LENGTH = struct.Struct("<I")
+NAME_SEPARATOR = "\n"
+
+
+def isBinarySave(filename: str):
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def packNames(names):
+    for name in names:
+        if not name or NAME_SEPARATOR in name:
+            raise ValueError(f"invalid name {name!r}")
+    data = NAME_SEPARATOR.join(names).encode("utf-8")
+    return NAMES_LENGTH.pack(len(data)) + data
+
+
+def unpackNames(data: bytes, offset: int):
+    (length,) = NAMES_LENGTH.unpack_from(data, offset)
+    offset += NAMES_LENGTH.size
+    if offset + length > len(data):
+        raise game_exceptions.InvalidSaveFormatError
+    names = data[offset:offset + length].decode("utf-8")
+    return (names.split(NAME_SEPARATOR) if names else []), offset + length
+
+
+def littleEndian(values: array):
+    # The file is always little-endian, whatever this machine uses
+    if sys.byteorder == "little":
+        return values
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped
+
+
+class ProfileTable(Mapping):
+    # Every player's counters in one flat int64 array, row by row in
+    # statDict order. Loading and saving copy that array as raw bytes and
+    # never build per-player dicts, a profile only becomes a dict when it
+    # is looked up.
+    def __init__(self, players=(), values=()):
+        self.stats = list(statDict)
+        self.players = list(players)
+        self.rows = dict(zip(self.players, range(len(self.players))))
+        self.values = values if isinstance(values, array) else \
+            array("q", values)
+        if len(self.values) != len(self.players) * len(self.stats):
+            raise ValueError("values don't match the number of players")
+
+    def __getitem__(self, player: str):
+        start = self.rows[player] * len(self.stats)
+        return dict(zip(self.stats,
+                        self.values[start:start + len(self.stats)]))
+
+    def __setitem__(self, player: str, counters: dict):
+        row_values = [counters[stat] for stat in self.stats]
+        row = self.rows.get(player)
+        if row is None:
+            self.rows[player] = len(self.players)
+            self.players.append(player)
+            self.values.extend(row_values)
+        else:
+            start = row * len(self.stats)
+            self.values[start:start + len(self.stats)] = \
+                array("q", row_values)
+
+    def __iter__(self):
+        return iter(self.players)
+
+    def __len__(self):
+        return len(self.players)
+
+    def encode(self):
+        # Fixed layout: a header, the counter names, the player names,
+        # then all counters as one block of little-endian int64s. Counter
+        # names are stored so files survive counters being added.
+        return b"".join((
+            HEADER.pack(MAGIC, BINARY_VERSION, len(self.stats),
+                        len(self.players)),
+            packNames(self.stats),
+            packNames(self.players),
+            littleEndian(self.values).tobytes()
+        ))
+
+    @classmethod
+    def decode(cls, data: bytes):
+        try:
+            magic, version, num_stats, num_players = \
+                HEADER.unpack_from(data)
+            if magic != MAGIC or version != BINARY_VERSION:
+                raise game_exceptions.InvalidSaveFormatError
+            stats, offset = unpackNames(data, HEADER.size)
+            players, offset = unpackNames(data, offset)
+            if len(stats) != num_stats or len(players) != num_players:
+                raise game_exceptions.InvalidSaveFormatError
+            num_bytes = num_stats * num_players * 8
+            if offset + num_bytes > len(data):
+                raise game_exceptions.InvalidSaveFormatError
+            values = array("q")
+            values.frombytes(data[offset:offset + num_bytes])
+        except (struct.error, UnicodeDecodeError):
+            raise game_exceptions.InvalidSaveFormatError from None
+        if not set(BASE_STATS).issubset(stats):
+            raise game_exceptions.InvalidSaveFormatError
+
+        values = littleEndian(values)
+        current = list(statDict)
+        if stats != current:
+            # Written with other counters: ones the file doesn't have
+            # start at zero and ones this version doesn't know are dropped
+            columns = {stat: index for index, stat in enumerate(stats)}
+            layout = [columns.get(stat) for stat in current]
+            values = [0 if column is None else values[row + column]
+                      for row in range(0, len(values), num_stats)
+                      for column in layout]
+
+        return cls(players, values)
+
+
+def encodeProfiles(profiles: Mapping):
+    if not isinstance(profiles, ProfileTable):
+        table = ProfileTable()
+        for player, counters in profiles.items():
+            table[player] = counters
+        profiles = table
+    return profiles.encode()
+
+
+def decodeProfiles(data: bytes):
+    return ProfileTable.decode(data)
+
+
+def saveProfiles(filename: str, profiles: Mapping):
+    return util.writeFileAtomic(filename, encodeProfiles(profiles))
+
+
+def loadProfiles(filename: str):
+    with open(filename, "rb") as f:
+        return decodeProfiles(f.read())
+
+
+class BinaryStatManager(StatManager):
+    # Same save/load interface as StatManager, with every player's
+    # counters kept in one compact binary file. Aggregates are not part
+    # of the fixed layout and stay in memory only.
+    def __init__(self, player_id: str = DEFAULT_PLAYER):
+        super().__init__()
+        self.player_id = player_id
+
+    def save(self, filename: str):
+        profiles = ProfileTable()
+        if os.path.exists(filename):
+            profiles = loadProfiles(filename)
+        profiles[self.player_id] = self.counters()
+        saveProfiles(filename, profiles)
+
+    def prepareSave(self, filename: str):
+        # Other players' profiles come from the file, so it all happens
+        # in the write
+        return [partial(self.save, filename)]
+
+    def load(self, filename):
+        profiles = loadProfiles(filename)
+        if self.player_id not in profiles:
+            raise game_exceptions.InvalidSaveFormatError
+
+        for stat, value in profiles[self.player_id].items():
+            setattr(self, stat, value)
+        return True
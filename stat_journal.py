@@ -0,0 +1,220 @@
+# Built-in modules
+import atexit
+import functools
+import json
+import os
+import time
+import weakref
+
+# Custom modules
+from stat_manager import StatManager, parseSave
+import game_exceptions
+import util
+
+JOURNAL_SUFFIX = ".journal"
+# Snapshot key holding the last journal entry folded into it
+SEQ_KEY = "journal_seq"
+FLUSH_COUNT = 32
+FLUSH_INTERVAL = 5.0
+COMPACT_ENTRIES = 1024
+
+# Managers with journal lines that may still be pending. Held weakly so
+# the exit hook doesn't keep every manager alive until the process ends.
+OPEN_MANAGERS = weakref.WeakSet()
+
+
+@atexit.register
+def closeOpenManagers():
+    for manager in list(OPEN_MANAGERS):
+        manager.close()
+
+
+class JournaledStatManager(StatManager):
+    # Write-behind stat persistence. save() records the counter changes
+    # and the games played since the last save as one compact journal
+    # line, lines are appended in batches, and every so often the journal
+    # is folded back into the regular save file (the snapshot).
+    def __init__(self, flush_count: int = FLUSH_COUNT,
+                 flush_interval: float = FLUSH_INTERVAL,
+                 compact_entries: int = COMPACT_ENTRIES):
+        super().__init__()
+        self.flush_count = flush_count
+        self.flush_interval = flush_interval
+        self.compact_entries = compact_entries
+
+        self.filename = None
+        self.committed = self.counters()
+        # Games for the aggregates since the last save, as
+        # [difficulty, won, guesses, duration] rows
+        self.games = []
+        self.pending = []
+        self.seq = 0
+        self.journal_entries = 0
+        self.last_flush = time.monotonic()
+        self.bytes_written = 0
+
+        OPEN_MANAGERS.add(self)
+
+    def journalName(self, filename: str = None):
+        return f"{filename or self.filename}{JOURNAL_SUFFIX}"
+
+    def save(self, filename: str):
+        for write in self.prepareSave(filename):
+            write()
+
+    def prepareSave(self, filename: str):
+        # save() in two halves for callers that write on another thread:
+        # journal lines and snapshots are built now from the counters, and
+        # the returned functions only write them, in order
+        writes = []
+        if filename != self.filename:
+            writes.extend(self.takeLines())
+            self.filename = filename
+            # Like a regular save, the first save to a file replaces it
+            # with the current counters before any deltas are journaled
+            writes.extend(self.takeSnapshot())
+
+        current = self.counters()
+        delta = {stat: current[stat] - self.committed[stat]
+                 for stat in current if current[stat] != self.committed[stat]}
+        if delta or self.games:
+            self.seq += 1
+            entry = {"seq": self.seq, "d": delta}
+            if self.games:
+                entry["g"] = self.games
+                self.games = []
+            self.pending.append(json.dumps(entry, separators=(",", ":")))
+            self.committed = current
+
+        flush_due = time.monotonic() - self.last_flush >= self.flush_interval
+        if len(self.pending) >= self.flush_count or flush_due:
+            writes.extend(self.takeLines())
+        return writes
+
+    def flush(self):
+        for write in self.takeLines():
+            write()
+
+    def takeLines(self):
+        self.last_flush = time.monotonic()
+        if not self.pending or self.filename is None:
+            return []
+
+        data = "".join(f"{line}\n" for line in self.pending)
+        writes = [functools.partial(self.appendJournal, self.journalName(),
+                                    data)]
+        self.journal_entries += len(self.pending)
+        self.pending = []
+
+        if self.journal_entries >= self.compact_entries:
+            writes.extend(self.takeSnapshot())
+        return writes
+
+    def appendJournal(self, journal_name: str, data: str):
+        with open(journal_name, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.bytes_written += len(data.encode("utf-8"))
+
+    def recordGame(self, difficulty: str, won: bool, num_guesses: int,
+                   duration: float):
+        super().recordGame(difficulty, won, num_guesses, duration)
+        self.games.append([difficulty, int(won), num_guesses, duration])
+
+    def compact(self):
+        for write in self.takeSnapshot():
+            write()
+
+    def takeSnapshot(self):
+        # Pending lines and games are already part of the snapshot
+        snapshot = self.to_json()
+        snapshot[SEQ_KEY] = self.seq
+        self.committed = self.counters()
+        self.games = []
+        self.pending = []
+        self.journal_entries = 0
+        return [functools.partial(self.writeSnapshot, self.filename,
+                                  json.dumps(snapshot))]
+
+    def writeSnapshot(self, filename: str, data: str):
+        self.bytes_written += util.writeFileAtomic(filename, data)
+        # A crash before this truncate is harmless: entries up to SEQ_KEY
+        # are skipped when the journal is replayed
+        with open(self.journalName(filename), "w", encoding="utf-8"):
+            pass
+
+    def close(self):
+        self.flush()
+        OPEN_MANAGERS.discard(self)
+
+    def load(self, filename):
+        self.flush()
+        with open(filename, "r", encoding="utf-8") as f:
+            stat_data = json.loads(f.read())
+
+        if not isinstance(stat_data, dict):
+            raise game_exceptions.InvalidSaveFormatError
+        snapshot_seq = stat_data.pop(SEQ_KEY, 0)
+        stat_data = parseSave(stat_data)
+
+        last_seq, num_entries, games = replayJournal(
+            self.journalName(filename), stat_data, snapshot_seq
+        )
+
+        self.restoreFromJson(stat_data)
+        try:
+            for difficulty, won, num_guesses, duration in games:
+                self.aggregates.recordGame(difficulty, bool(won),
+                                           num_guesses, duration)
+        except (TypeError, ValueError):
+            raise game_exceptions.InvalidSaveFormatError from None
+        self.filename = filename
+        self.seq = last_seq
+        self.journal_entries = num_entries
+        self.committed = self.counters()
+        self.games = []
+        self.pending = []
+        OPEN_MANAGERS.add(self)
+        return True
+
+
+def replayJournal(journal_name: str, stat_data: dict, snapshot_seq: int):
+    # Applies the counter deltas to stat_data and returns the games to
+    # add to the aggregates, in the order they were played
+    last_seq = snapshot_seq
+    num_entries = 0
+    good_bytes = 0
+    games = []
+    try:
+        f = open(journal_name, "rb")
+    except FileNotFoundError:
+        return last_seq, num_entries, games
+
+    with f:
+        for raw_line in f:
+            try:
+                entry = json.loads(raw_line)
+                seq, delta = entry["seq"], entry["d"]
+                entry_games = list(entry.get("g", ()))
+            except (ValueError, KeyError, TypeError):
+                # Torn write from a crash, everything after it is unusable
+                break
+            if not raw_line.endswith(b"\n"):
+                break
+            good_bytes += len(raw_line)
+            num_entries += 1
+            if seq <= snapshot_seq:
+                continue
+            for stat, change in delta.items():
+                if stat in stat_data:
+                    stat_data[stat] += change
+            games.extend(entry_games)
+            last_seq = seq
+
+    # Drop a torn tail so new entries don't get appended onto it
+    if os.path.getsize(journal_name) != good_bytes:
+        with open(journal_name, "r+b") as f:
+            f.truncate(good_bytes)
+
+    return last_seq, num_entries, games
@@ -0,0 +1,89 @@
+# Built-in modules
+from contextlib import contextmanager
+from functools import partial
+import json
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks outside of Unix, saves fall back to unlocked
+    fcntl = None
+
+# Custom modules
+from stat_manager import (AGGREGATES_KEY, SAVE_VERSION, VERSION_KEY,
+                          StatManager, statDict, parseSave)
+import game_exceptions
+import util
+
+LOCK_SUFFIX = ".lock"
+
+
+@contextmanager
+def lockFile(filename: str, exclusive: bool = True):
+    # Lock a sidecar file so the save file itself can be swapped out by
+    # rename while other processes are waiting on the lock
+    with open(f"{filename}{LOCK_SUFFIX}", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(),
+                        fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def readStatsOrZero(filename: str):
+    # Only a missing file means there are no stats yet. A file that can't
+    # be read raises instead, so it is never replaced by merged counters.
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            stat_data = json.loads(f.read())
+    except FileNotFoundError:
+        return StatManager().counters()
+    except ValueError:
+        raise game_exceptions.InvalidSaveFormatError from None
+
+    return parseSave(stat_data)
+
+
+class LockedStatManager(StatManager):
+    # Lets several processes share one save file without lost updates.
+    # Each save commits only what changed since this process last synced
+    # with the file, merged into whatever is on disk under an exclusive
+    # lock. The lock is only held for one small read and write.
+    # Aggregates can't be merged that way, so the file keeps those of the
+    # last save that had any.
+    def __init__(self):
+        super().__init__()
+        self.baseline = self.counters()
+
+    def save(self, filename: str):
+        current = self.counters()
+        with lockFile(filename):
+            on_disk = readStatsOrZero(filename)
+            merged = {
+                stat: on_disk[stat] + current[stat] - self.baseline[stat]
+                for stat in statDict
+            }
+            stat_data = {VERSION_KEY: SAVE_VERSION, **merged}
+            if not self.aggregates.isEmpty():
+                stat_data[AGGREGATES_KEY] = self.aggregates.to_json()
+            elif AGGREGATES_KEY in on_disk:
+                stat_data[AGGREGATES_KEY] = on_disk[AGGREGATES_KEY]
+            util.writeFileAtomic(filename, json.dumps(stat_data))
+
+        for stat in statDict:
+            setattr(self, stat, merged[stat])
+        self.baseline = merged
+
+    def prepareSave(self, filename: str):
+        # The merge reads the save under its lock, so it all waits for
+        # the write
+        return [partial(self.save, filename)]
+
+    def load(self, filename):
+        with lockFile(filename, exclusive=False):
+            result = super().load(filename)
+        self.baseline = self.counters()
+        return result
@@ -1,74 +1,183 @@
+from collections import ChainMap
+from functools import lru_cache, partial
 import json
+import sys
 
+from difficulty import WIN_STATS, reserveStatKeys
+from stat_aggregates import GameAggregates
 import util
 import game_exceptions
 
-statDict = {
+BASE_STATS = {
         "wins": "Games Won",
         "losses": "Games Lost",
         "num_guesses": "Total # of valid guesses",
-        "num_first_correct": "Number of correct first guesses",
-        "num_easy_wins": "Wins on easy mode",
-        "num_med_wins": "Wins on medium mode",
-        "num_hard_wins": "Wins on hard mode"
+        "num_first_correct": "Number of correct first guesses"
     }
+# Win counters come from the difficulty registry, and this view stays in
+# sync when more difficulties are registered later
+statDict = ChainMap(WIN_STATS, BASE_STATS)
+
+SAVE_VERSION = 2
+VERSION_KEY = "version"
+AGGREGATES_KEY = "aggregates"
 
 
 class StatManager:
+    # Aggregates live in a slot so __dict__ only ever holds the counters
+    __slots__ = ("__dict__", "aggregates")
+
     def __init__(self):
+        self.aggregates = GameAggregates()
         # Counters
         self.wins = 0
         self.losses = 0
         self.num_guesses = 0
         self.num_first_correct = 0
-        self.num_easy_wins = 0
-        self.num_med_wins = 0
-        self.num_hard_wins = 0
+        # One win counter per registered difficulty
+        for stat in WIN_STATS:
+            setattr(self, stat, 0)
 
     def __str__(self):
-        stat_kvs = self.__dict__.items()
+        stat_kvs = self.counters().items()
         return "\n".join(f"{stat}: {val}" for stat, val in stat_kvs)
 
+    def increment(self, stat: str, amount: int = 1):
+        # How the game counts, so subclasses can add without reading the
+        # current total first
+        setattr(self, stat, getattr(self, stat) + amount)
+
+    def counters(self):
+        # Only the counters are persisted, so subclasses are free to keep
+        # their own bookkeeping attributes on the instance
+        return {stat: getattr(self, stat) for stat in statDict}
+
     def to_json(self):
-        return self.__dict__
+        stat_data = {VERSION_KEY: SAVE_VERSION, **self.counters()}
+        if not self.aggregates.isEmpty():
+            stat_data[AGGREGATES_KEY] = self.aggregates.to_json()
+        return stat_data
 
-    def pretty_print(self):
-        stat_kvs = self.__dict__.items()
+    def recordGame(self, difficulty: str, won: bool, num_guesses: int,
+                   duration: float):
+        self.aggregates.recordGame(difficulty, won, num_guesses, duration)
+
+    def summary(self):
+        # Rendered here and written by whoever shows it, so headless and
+        # silent I/O adapters decide what reaches the terminal
+        stat_kvs = self.counters().items()
         str_list = [f"{statDict[stat]}: {val}" for stat, val in stat_kvs]
-        print("\nYour game statistics")
-        util.printWithBorder("\n".join(str_list))
+        if not self.aggregates.isEmpty():
+            str_list.extend(self.aggregates.summaryLines())
+        stats = "\n".join(str_list)
+        return f"\nYour game statistics\n{util.formatWithBorder(stats)}"
+
+    def pretty_print(self, out=None):
+        if out is None:
+            out = sys.stdout
+        out.write(f"{self.summary()}\n")
 
     def save(self, filename: str):
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(self.to_json(), f, indent=2)
-        f.close()
-        print("Save successful!")
+        # Replaces the old save in one rename, so a crash mid-save can't
+        # leave a truncated file behind. Written without indentation,
+        # which lets json use its C encoder on every save.
+        util.writeFileAtomic(filename, json.dumps(self.to_json()))
+
+    def prepareSave(self, filename: str):
+        # For callers that write on another thread than the one counting:
+        # the save is built from the stats now, and the returned functions
+        # only touch the disk. Subclasses that save differently override
+        # this too.
+        data = json.dumps(self.to_json())
+        return [partial(util.writeFileAtomic, filename, data)]
 
-    def load(self, filename):
+    def load(self, filename, strict: bool = False):
+        with open(filename, "r", encoding="utf-8") as f:
+            stat_data = json.load(f)
+
+        self.restoreFromJson(parseSave(stat_data, strict))
+        return True
+
+    def restoreFromJson(self, stat_data: dict):
+        for stat in statDict:
+            setattr(self, stat, stat_data[stat])
+
+        if AGGREGATES_KEY not in stat_data:
+            self.aggregates = GameAggregates()
+            return
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                stat_data = json.loads(f.read())
-            f.close()
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            raise e
-
-        # Don't depend on current StatManager
-        # Create new instance and compare keys and value types with it
-        if not isValidDict(StatManager().__dict__, stat_data):
+            self.aggregates = GameAggregates.fromJson(
+                stat_data[AGGREGATES_KEY]
+            )
+        except (KeyError, TypeError, ValueError, AttributeError):
             raise game_exceptions.InvalidSaveFormatError
 
-        self.__dict__ = stat_data
-        print("Load successful!")
-        return True
+
+# A win counter named like a base counter, a save key or anything else on
+# StatManager would count twice or replace it
+reserveStatKeys([*BASE_STATS, VERSION_KEY, AGGREGATES_KEY, *dir(StatManager)])
+
+
+class SaveSchema:
+    # Compiled once per set of counters, so a load is a few set operations
+    # and one type check per counter instead of building a StatManager
+    def __init__(self, required, optional):
+        self.required = tuple(required)
+        self.optional = tuple(optional)
+        self.known = frozenset(self.required + self.optional) | \
+            {VERSION_KEY, AGGREGATES_KEY}
+
+    def validate(self, stat_data: dict, strict: bool = False):
+        # Returns the counters (and aggregates) of stat_data. Unknown
+        # fields are dropped, or rejected when strict.
+        if strict and not self.known.issuperset(stat_data):
+            raise game_exceptions.InvalidSaveFormatError
+        clean = {}
+        for stat in self.required:
+            value = stat_data.get(stat)
+            if not isinstance(value, int):
+                raise game_exceptions.InvalidSaveFormatError
+            clean[stat] = value
+        # Difficulties registered after the save was made start at zero
+        for stat in self.optional:
+            value = stat_data.get(stat, 0)
+            if not isinstance(value, int):
+                raise game_exceptions.InvalidSaveFormatError
+            clean[stat] = value
+        if AGGREGATES_KEY in stat_data:
+            clean[AGGREGATES_KEY] = stat_data[AGGREGATES_KEY]
+
+        return clean
+
+
+@lru_cache(maxsize=None)
+def compileSchema(win_stats: tuple):
+    return SaveSchema(BASE_STATS, win_stats)
+
+
+def currentSchema():
+    return compileSchema(tuple(WIN_STATS))
+
+
+def migrateV1(stat_data: dict):
+    # Version 1 saves were the bare counters without a version field
+    return {**stat_data, VERSION_KEY: 2}
+
+
+# Version -> function upgrading a save of that version by one version
+MIGRATIONS = {
+    1: migrateV1,
+}
 
 
-def isValidDict(desired_dict, dict_to_check):
-    # JSON in file, but does not contain the stats required by StatManager
-    for key, value in desired_dict.items():
-        if key not in dict_to_check:
-            return False
-        # Stat value is the incorrect type
-        if not isinstance(dict_to_check[key], type(value)):
-            return False
+def parseSave(stat_data, strict: bool = False):
+    if not isinstance(stat_data, dict):
+        raise game_exceptions.InvalidSaveFormatError
+    version = stat_data.get(VERSION_KEY, 1)
+    if not isinstance(version, int) or not 1 <= version <= SAVE_VERSION:
+        raise game_exceptions.InvalidSaveFormatError
+    while version < SAVE_VERSION:
+        stat_data = MIGRATIONS[version](stat_data)
+        version += 1
 
-    return True
+    return currentSchema().validate(stat_data, strict)
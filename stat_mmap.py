@@ -0,0 +1,157 @@
+# Built-in modules
+from functools import partial
+import json
+import mmap
+import os
+import struct
+import time
+
+# Custom modules
+from stat_aggregates import GameAggregates
+from stat_manager import StatManager, parseSave, statDict
+import game_exceptions
+import util
+
+COUNTER_SUFFIX = ".counters"
+MAGIC = b"GTNC"
+LAYOUT_VERSION = 1
+# Magic, layout version, number of counters in use
+HEADER = struct.Struct("<4sHH")
+MAX_COUNTERS = 64
+NAME_SIZE = 32
+NAMES_OFFSET = HEADER.size
+VALUES_OFFSET = NAMES_OFFSET + MAX_COUNTERS * NAME_SIZE
+FILE_SIZE = VALUES_OFFSET + MAX_COUNTERS * 8
+
+
+class MappedCounter:
+    # A counter that lives in the mapped file. Reads and increments go
+    # straight to the shared memory, with nothing to serialize.
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.values[obj.slots[self.name]]
+
+    def __set__(self, obj, value: int):
+        obj.values[obj.slots[self.name]] = value
+
+
+def installCounters(cls):
+    # Counters of difficulties registered after import get theirs lazily
+    for stat in statDict:
+        if not isinstance(cls.__dict__.get(stat), MappedCounter):
+            setattr(cls, stat, MappedCounter(stat))
+
+
+def createCounterFile(filename: str):
+    data = bytearray(FILE_SIZE)
+    HEADER.pack_into(data, 0, MAGIC, LAYOUT_VERSION, 0)
+    util.writeFileAtomic(filename, bytes(data))
+
+
+class MappedStatManager(StatManager):
+    # Counters are kept in a small fixed-layout file mapped into memory:
+    # a header, a table of counter names and one int64 slot per counter
+    # in native byte order. The names let the file outlive changes to
+    # the counters. save() only has to flush the mapping and, for
+    # backups, export an atomic JSON snapshot.
+    __slots__ = ("counter_file", "file", "map", "values", "slots",
+                 "snapshot_interval", "last_snapshot")
+
+    def __init__(self, counter_file: str, snapshot_interval: float = 0):
+        # StatManager.__init__ isn't called, it would zero the counters
+        # that are already in the file
+        self.aggregates = GameAggregates()
+        self.counter_file = counter_file
+        # Minimum seconds between JSON snapshots written by save()
+        self.snapshot_interval = snapshot_interval
+        self.last_snapshot = None
+        installCounters(type(self))
+
+        if not os.path.exists(counter_file) or \
+                os.path.getsize(counter_file) == 0:
+            createCounterFile(counter_file)
+        self.file = open(counter_file, "r+b")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), FILE_SIZE)
+        except ValueError:
+            # Shorter than the layout, so not one of our files
+            self.file.close()
+            raise game_exceptions.InvalidSaveFormatError from None
+        self.values = None
+        try:
+            self.slots = self.readSlots()
+        except game_exceptions.InvalidSaveFormatError:
+            self.map.close()
+            self.file.close()
+            raise
+        self.values = memoryview(self.map)[VALUES_OFFSET:].cast("q")
+
+    def readSlots(self):
+        magic, version, num_counters = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != LAYOUT_VERSION or \
+                num_counters > MAX_COUNTERS:
+            raise game_exceptions.InvalidSaveFormatError
+
+        slots = {}
+        for slot in range(num_counters):
+            offset = NAMES_OFFSET + slot * NAME_SIZE
+            name = self.map[offset:offset + NAME_SIZE].rstrip(b"\0")
+            slots[name.decode("utf-8")] = slot
+        for stat in statDict:
+            if stat not in slots:
+                slots[stat] = self.addSlot(stat, len(slots))
+
+        return slots
+
+    def addSlot(self, stat: str, slot: int):
+        name = stat.encode("utf-8")
+        if slot >= MAX_COUNTERS or len(name) > NAME_SIZE:
+            raise game_exceptions.InvalidSaveFormatError
+        offset = NAMES_OFFSET + slot * NAME_SIZE
+        self.map[offset:offset + NAME_SIZE] = name.ljust(NAME_SIZE, b"\0")
+        # The slot's value is still zero from when the file was created
+        HEADER.pack_into(self.map, 0, MAGIC, LAYOUT_VERSION, slot + 1)
+        return slot
+
+    def save(self, filename: str):
+        self.map.flush()
+        now = time.monotonic()
+        if self.last_snapshot is None or \
+                now - self.last_snapshot >= self.snapshot_interval:
+            self.exportSnapshot(filename)
+            self.last_snapshot = now
+
+    def prepareSave(self, filename: str):
+        # Counters are already in the mapped file, only the throttled
+        # snapshot is left for the write
+        return [partial(self.save, filename)]
+
+    def exportSnapshot(self, filename: str):
+        # Temp file, fsync, rename, so a crash leaves either the old
+        # snapshot or the new one and never half of one
+        return util.writeFileAtomic(filename, json.dumps(self.to_json()))
+
+    def load(self, filename, strict: bool = False):
+        # Restores a JSON snapshot into the mapped counters
+        with open(filename, "r", encoding="utf-8") as f:
+            stat_data = json.load(f)
+
+        self.restoreFromJson(parseSave(stat_data, strict))
+        self.map.flush()
+        return True
+
+    def close(self):
+        if self.map.closed:
+            return
+        self.map.flush()
+        # The view has to go before the mapping can be closed
+        self.values.release()
+        self.map.close()
+        self.file.close()
+
+
+installCounters(MappedStatManager)
@@ -0,0 +1,156 @@
+# Built-in modules
+import threading
+
+# Custom modules
+from stat_manager import StatManager, statDict
+
+
+class CounterValue(int):
+    # What reading a sharded counter returns: the merged total, which
+    # also remembers how much was added to it since it was read. That is
+    # how `sm.wins += 1` becomes "add 1 to this thread's cell" instead of
+    # "overwrite the total", with no lock and no lost updates. It still
+    # merges every cell to read the total first, increment() doesn't.
+    def __new__(cls, value: int, owner, stat: str, delta: int = 0):
+        counter = super().__new__(cls, value)
+        counter.owner = owner
+        counter.stat = stat
+        counter.delta = delta
+        return counter
+
+    def __add__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return CounterValue(int(self) + other, self.owner, self.stat,
+                            self.delta + other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return self + -other
+
+
+class ShardedCounter:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return CounterValue(obj.total(self.name), obj, self.name)
+
+    def __set__(self, obj, value: int):
+        if isinstance(value, CounterValue) and value.owner is obj and \
+                value.stat == self.name:
+            obj.add(self.name, value.delta)
+        else:
+            obj.reset(self.name, int(value))
+
+
+def installCounters(cls):
+    # Counters of difficulties registered after import get theirs lazily
+    for stat in statDict:
+        if not isinstance(cls.__dict__.get(stat), ShardedCounter):
+            setattr(cls, stat, ShardedCounter(stat))
+
+
+class ShardedStatManager(StatManager):
+    # For sessions hosted on many threads. Every thread adds to its own
+    # cell of counters, so guesses never wait on each other (or fight
+    # over one cache line on free-threaded builds). Reads merge all cells
+    # lazily. Assigning a counter outright, as load does, resets it under
+    # a lock and isn't meant to race with games in progress.
+    __slots__ = ("lock", "base", "cells", "local", "version")
+
+    def __init__(self):
+        installCounters(type(self))
+        # Reentrant so save can hold it across to_json and fold
+        self.lock = threading.RLock()
+        # Counts folded in from finished threads and absolute sets
+        self.base = {}
+        # (thread, counts) for every thread that has added anything
+        self.cells = []
+        self.local = threading.local()
+        # Bumped around every change to base or cells, so lock-free reads
+        # can tell they raced with one and retry
+        self.version = 0
+        super().__init__()
+
+    def cell(self):
+        counts = getattr(self.local, "counts", None)
+        if counts is None:
+            counts = self.local.counts = {}
+            with self.lock:
+                self.cells.append((threading.current_thread(), counts))
+        return counts
+
+    def add(self, stat: str, amount: int):
+        counts = self.cell()
+        counts[stat] = counts.get(stat, 0) + amount
+
+    def increment(self, stat: str, amount: int = 1):
+        # Only touches this thread's cell, the total isn't read
+        self.add(stat, amount)
+
+    def reset(self, stat: str, value: int):
+        with self.lock:
+            self.version += 1
+            self.base[stat] = value
+            for _, counts in self.cells:
+                counts.pop(stat, None)
+            self.version += 1
+
+    def total(self, stat: str):
+        while True:
+            version = self.version
+            total = self.base.get(stat, 0)
+            for _, counts in self.cells:
+                total += counts.get(stat, 0)
+            # Odd while a change is in progress
+            if version % 2 == 0 and version == self.version:
+                return total
+
+    def fold(self):
+        # Moves the counts of finished threads into base so the number of
+        # cells stays bounded by the number of live threads
+        with self.lock:
+            if all(thread.is_alive() for thread, _ in self.cells):
+                return
+            self.version += 1
+            live = []
+            for thread, counts in self.cells:
+                if thread.is_alive():
+                    live.append((thread, counts))
+                    continue
+                for stat, amount in counts.items():
+                    self.base[stat] = self.base.get(stat, 0) + amount
+            self.cells = live
+            self.version += 1
+
+    def counters(self):
+        self.fold()
+        return {stat: self.total(stat) for stat in statDict}
+
+    def recordGame(self, difficulty: str, won: bool, num_guesses: int,
+                   duration: float):
+        # Once per game, so a lock here doesn't slow down guessing
+        with self.lock:
+            super().recordGame(difficulty, won, num_guesses, duration)
+
+    def to_json(self):
+        with self.lock:
+            return super().to_json()
+
+    def summary(self):
+        with self.lock:
+            return super().summary()
+
+    def save(self, filename: str):
+        # One writer at a time, they share the same temp file name
+        with self.lock:
+            super().save(filename)
+
+
+installCounters(ShardedStatManager)
@@ -0,0 +1,270 @@
+# Built-in modules
+from bisect import bisect_left, bisect_right
+from fractions import Fraction
+from itertools import accumulate
+from math import gcd
+import random
+
+# Custom modules
+from bot import GuessBot
+from rng import AnswerStream
+from simulation import SimSummary, depthHistogram
+import util
+
+DEFAULT_SAMPLES = 10000
+HISTORY_BUCKETS = 16
+
+
+class GuessStrategy:
+    name = "strategy"
+    # Deterministic strategies only look at the size of the range, which
+    # lets them be scored against every answer in closed form
+    deterministic = False
+
+    def newGame(self, start_num: int, end_num: int):
+        pass
+
+    def nextGuess(self, low: int, high: int):
+        raise NotImplementedError
+
+    def observeAnswer(self, answer: int):
+        pass
+
+    def splitOffset(self, range_size: int):
+        raise NotImplementedError
+
+    def __str__(self):
+        return self.name
+
+
+class BisectionStrategy(GuessStrategy):
+    name = "bisection"
+    deterministic = True
+
+    def nextGuess(self, low: int, high: int):
+        return GuessBot(low, high).getNextGuess()
+
+    def splitOffset(self, range_size: int):
+        return GuessBot(0, range_size - 1).getNextGuess()
+
+
+class BiasedSplitStrategy(GuessStrategy):
+    deterministic = True
+
+    def __init__(self, ratio=Fraction(2, 5)):
+        # Fractions keep the split exact on big-int ranges
+        self.ratio = Fraction(ratio)
+        if not 0 <= self.ratio <= 1:
+            raise ValueError("ratio must be between 0 and 1")
+        self.name = f"biased split {self.ratio}"
+
+    def nextGuess(self, low: int, high: int):
+        return low + self.splitOffset(high - low + 1)
+
+    def splitOffset(self, range_size: int):
+        ratio = self.ratio
+        return (range_size - 1) * ratio.numerator // ratio.denominator
+
+
+class TernarySplitStrategy(BiasedSplitStrategy):
+    def __init__(self):
+        super().__init__(Fraction(1, 3))
+        self.name = "ternary split"
+
+
+class RandomPickStrategy(GuessStrategy):
+    name = "random pick"
+
+    def __init__(self, seed: int = None):
+        self.rng = random.Random(seed)
+
+    def nextGuess(self, low: int, high: int):
+        return self.rng.randint(low, high)
+
+
+class NoisyBisectionStrategy(GuessStrategy):
+    # Plays like a person who knows to bisect but doesn't always do it:
+    # with probability `noise` a guess lands anywhere still possible
+    def __init__(self, noise: float = 0.3, seed: int = None):
+        if not 0 <= noise <= 1:
+            raise ValueError("noise must be between 0 and 1")
+        self.noise = noise
+        self.rng = random.Random(seed)
+        self.name = f"noisy bisection {noise}"
+
+    def nextGuess(self, low: int, high: int):
+        if self.rng.random() < self.noise:
+            return self.rng.randint(low, high)
+        return GuessBot(low, high).getNextGuess()
+
+
+class HistoryAwareStrategy(GuessStrategy):
+    # Models the answer host instead of assuming it is fair. Where past
+    # answers landed (relative to their range) is counted in buckets, and
+    # each guess splits the remaining range at the median of that learned
+    # distribution. Against a fair host it settles on bisection, against
+    # a skewed or adversarial one it follows the skew.
+    name = "history aware"
+
+    def __init__(self, num_buckets: int = HISTORY_BUCKETS):
+        # Start from a flat prior so the first games are plain bisection
+        self.weights = [1] * num_buckets
+        self.start_num = 0
+        self.end_num = 0
+        # Per game tables, see newGame
+        self.starts = []
+        self.densities = []
+        self.ends = []
+
+    def newGame(self, start_num: int, end_num: int):
+        self.start_num = start_num
+        self.end_num = end_num
+        # Weights only change once a game is over, so the buckets are
+        # laid out once per game and each guess is a couple of bisects.
+        # Every bucket spreads its weight evenly over the numbers it
+        # covers. Masses are scaled by a multiple of every bucket size so
+        # each number's share is a whole integer.
+        num_buckets = len(self.weights)
+        range_size = end_num - start_num + 1
+        self.starts = [start_num + bucket * range_size // num_buckets
+                       for bucket in range(num_buckets + 1)]
+        sizes = [end - start for start, end in
+                 zip(self.starts, self.starts[1:])]
+        scale = 1
+        for size in set(sizes):
+            if size:
+                scale = scale * size // gcd(scale, size)
+        self.densities = [weight * scale // size if size else 0
+                          for weight, size in zip(self.weights, sizes)]
+        # Scaled mass from start_num to the end of each bucket
+        self.ends = list(accumulate(
+            density * size for density, size in zip(self.densities, sizes)
+        ))
+
+    def observeAnswer(self, answer: int):
+        # Counted in the same buckets the guesses were made from
+        self.weights[bisect_right(self.starts, answer) - 1] += 1
+
+    def massThrough(self, number: int):
+        # Scaled learned mass of [start_num, number]
+        bucket = bisect_right(self.starts, number) - 1
+        if bucket < 0:
+            return 0
+        bucket_high = self.starts[bucket + 1] - 1
+        return self.ends[bucket] - \
+            self.densities[bucket] * (bucket_high - number)
+
+    def nextGuess(self, low: int, high: int):
+        if not self.start_num <= low <= high <= self.end_num:
+            return GuessBot(low, high).getNextGuess()
+
+        # The weighted median of [low, high] is the first number whose
+        # mass from start_num reaches the middle of the two ends. Its
+        # bucket is found in the running totals, then the number inside
+        # the bucket by division.
+        total = self.massThrough(low - 1) + self.massThrough(high)
+        bucket = bisect_left(self.ends, (total + 1) // 2)
+        before = self.ends[bucket - 1] if bucket else 0
+        numbers_in = -((2 * before - total) // (2 * self.densities[bucket]))
+        return self.starts[bucket] + numbers_in - 1
+
+
+class StrategyReport:
+    def __init__(self, strategy: GuessStrategy, summary: SimSummary,
+                 chances: int, exact: bool):
+        self.strategy = strategy
+        self.summary = summary
+        self.chances = chances
+        self.exact = exact
+
+    @property
+    def mean(self):
+        return self.summary.mean
+
+    @property
+    def worst_case(self):
+        return self.summary.max
+
+    @property
+    def win_rate(self):
+        total = self.summary.total
+        if total == 0:
+            return 0.0
+        wins = sum(count for num_guesses, count in
+                   self.summary.histogram.items()
+                   if num_guesses <= self.chances)
+        return wins / total
+
+    def __str__(self):
+        kind = "exact" if self.exact else "sampled"
+        return f"{self.strategy.name}: mean {self.mean:.3f}, " \
+               f"worst {self.worst_case}, " \
+               f"win rate {self.win_rate:.2%} " \
+               f"with {self.chances} chances ({kind})"
+
+
+def playStrategy(strategy: GuessStrategy, start_num: int, end_num: int,
+                 answer: int, max_guesses: int = None):
+    # Guesses it took to find answer. With max_guesses, a game that runs
+    # out of guesses stops there and counts as max_guesses + 1.
+    strategy.newGame(start_num, end_num)
+    low, high = start_num, end_num
+    num_guesses = 0
+    while True:
+        if num_guesses == max_guesses:
+            num_guesses += 1
+            break
+        guess = strategy.nextGuess(low, high)
+        num_guesses += 1
+        if guess == answer:
+            break
+        # Guesses outside [low, high] must not widen it again
+        if guess > answer:
+            high = min(high, guess - 1)
+        else:
+            low = max(low, guess + 1)
+    strategy.observeAnswer(answer)
+
+    return num_guesses
+
+
+def evaluateStrategy(strategy: GuessStrategy, start_num: int, end_num: int,
+                     chances: int, samples: int = DEFAULT_SAMPLES,
+                     seed: int = 0):
+    # Deterministic strategies are scored against every answer at once
+    # from per-depth counts, no matter how big the range is. The rest
+    # are played against a seeded sample of answers.
+    range_size = end_num - start_num + 1
+    if strategy.deterministic:
+        histogram = dict(depthHistogram(range_size, strategy.splitOffset))
+        return StrategyReport(strategy, SimSummary(histogram), chances, True)
+
+    summary = SimSummary()
+    if range_size <= samples:
+        answers = range(start_num, end_num + 1)
+    else:
+        answers = AnswerStream(seed).answers(start_num, end_num, samples)
+    for answer in answers:
+        summary.histogram[playStrategy(strategy, start_num, end_num,
+                                       answer)] += 1
+
+    return StrategyReport(strategy, summary, chances,
+                          range_size <= samples)
+
+
+def defaultStrategies(seed: int = 0):
+    return [BisectionStrategy(), BiasedSplitStrategy(),
+            TernarySplitStrategy(), RandomPickStrategy(seed),
+            HistoryAwareStrategy()]
+
+
+def compareStrategies(start_num: int, end_num: int, chances: int,
+                      strategies=None, samples: int = DEFAULT_SAMPLES):
+    if strategies is None:
+        strategies = defaultStrategies()
+    reports = [evaluateStrategy(strategy, start_num, end_num, chances,
+                                samples)
+               for strategy in strategies]
+    util.printWithBorder("\n".join(str(report) for report in reports))
+
+    return reports
@@ -0,0 +1,130 @@
+from fractions import Fraction
+
+import pytest
+
+from adversary import CORRECT, EvilHost, adversarialWorstCase
+from engine import GameEngine, GuessResult, ScriptedIO
+from game import Game
+from guess_history import TOO_HIGH, TOO_LOW
+from simulation import depthHistogram, simulateAllAnswers
+from stat_manager import StatManager
+from strategies import (BiasedSplitStrategy, BisectionStrategy,
+                        GuessStrategy, RandomPickStrategy,
+                        TernarySplitStrategy, playStrategy)
+
+
+class LinearStrategy(GuessStrategy):
+    name = "linear"
+
+    def nextGuess(self, low: int, high: int):
+        return low
+
+
+class TestAdversary:
+    # Ensure the host always keeps the bigger half
+    def test_replies(self):
+        host = EvilHost(1, 10)
+        assert host.reply(3) == TOO_LOW
+        assert (host.low, host.high) == (4, 10)
+        assert host.reply(9) == TOO_HIGH
+        assert (host.low, host.high) == (4, 8)
+        # Ruled out guesses change nothing
+        assert host.reply(2) == TOO_LOW
+        assert host.reply(10) == TOO_HIGH
+        assert host.remaining() == 5
+        assert host.reply(6) == TOO_LOW
+        assert host.reply(8) == TOO_HIGH
+        assert host.reply(7) == CORRECT
+        assert host.answer() == 7
+        with pytest.raises(ValueError):
+            EvilHost(5, 4)
+
+    # Ensure the state stays two integers for huge ranges
+    def test_big_ints(self):
+        host = EvilHost(-10 ** 400, 10 ** 400)
+        assert host.reply(0) == TOO_LOW
+        assert host.remaining() == 10 ** 400
+        assert not hasattr(host, "__dict__")
+
+    # Ensure one pass finds the exact worst case of split strategies
+    def test_matches_exact_worst_case(self):
+        strategies = [BisectionStrategy(), BiasedSplitStrategy(),
+                      TernarySplitStrategy(),
+                      BiasedSplitStrategy(Fraction(1, 10))]
+        for strategy in strategies:
+            for range_size in list(range(1, 300)) + [10 ** 9 + 7]:
+                num_guesses, answer = adversarialWorstCase(strategy, 1,
+                                                           range_size)
+                assert num_guesses == max(
+                    depth for depth, _ in
+                    depthHistogram(range_size, strategy.splitOffset)
+                )
+                assert playStrategy(strategy, 1, range_size, answer) == \
+                    num_guesses
+
+    # Ensure huge simulation ranges agree with the closed form
+    def test_huge_range(self):
+        num_guesses, answer = adversarialWorstCase(BisectionStrategy(), 1,
+                                                   10 ** 300)
+        assert num_guesses == simulateAllAnswers(1, 10 ** 300).max
+        assert 1 <= answer <= 10 ** 300
+
+    # Ensure strategies that aren't split based are covered too
+    def test_any_strategy(self):
+        assert adversarialWorstCase(LinearStrategy(), 1, 50) == (50, 50)
+        assert adversarialWorstCase(LinearStrategy(), 1, 10 ** 20, 30) == \
+            (31, 31)
+        num_guesses, answer = adversarialWorstCase(RandomPickStrategy(5),
+                                                   1, 1000)
+        assert num_guesses >= 10
+        assert playStrategy(RandomPickStrategy(5), 1, 1000, answer) == \
+            num_guesses
+
+
+class TestEvilHostMode:
+    def newEngine(self, difficulty: str = "hard"):
+        game = Game(StatManager(), io=ScriptedIO(()), evil_host=True)
+        game.setDifficulty(difficulty)
+        engine = GameEngine(game)
+        engine.newGame()
+        return engine
+
+    # Ensure perfect play still wins, on the very last chance
+    def test_bisection_wins_last_chance(self):
+        engine = self.newEngine()
+        assert engine.answer is None
+        while not engine.isOver():
+            result = engine.submitGuess(engine.hint())
+        assert result is GuessResult.CORRECT
+        assert engine.tries_left == 1
+        assert engine.game.stat_manager.num_hard_wins == 1
+        assert engine.answer == engine.history.guesses[-1]
+
+    # Ensure the revealed answer agrees with every reply
+    def test_loss_reveals_consistent_answer(self):
+        engine = self.newEngine("easy")
+        results = [engine.submitGuess(guess) for guess in (1, 2, 3, 4, 5)]
+        assert GuessResult.CORRECT not in results
+        assert engine.isOver() and not engine.won
+        assert engine.game.stat_manager.losses == 1
+        for guess, result in zip((1, 2, 3, 4, 5), results):
+            if result is GuessResult.TOO_LOW:
+                assert engine.answer > guess
+            else:
+                assert engine.answer < guess
+
+    # Ensure the interactive game plays in evil mode
+    def test_play_game(self, tmp_path):
+        io = ScriptedIO(["5", "8", "10", "9"])
+        game = Game(StatManager(), io=io, evil_host=True)
+        game.SAVEFILE_NAME = str(tmp_path / "persistent")
+        game.playGame()
+        assert "You guessed it!" in io.output
+        assert "The number was 9. Thanks for playing!" in io.output
+
+    # Ensure given answers still win over evil mode
+    def test_fixed_answer(self):
+        game = Game(StatManager(), io=ScriptedIO(()), evil_host=True)
+        engine = GameEngine(game)
+        engine.newGame(answer=4)
+        assert engine.submitGuess(4) is GuessResult.CORRECT
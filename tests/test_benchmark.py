@@ -0,0 +1,51 @@
+import json
+import os
+
+from benchmark import BisectionIO, compareResults, main, runBenchmarks
+from game import Game
+from stat_manager import StatManager
+
+
+def fakeResults(**values):
+    return {"results": {
+        name: {"value": value, "unit": "ops/s", "higher_is_better": True}
+        for name, value in values.items()
+    }}
+
+
+class TestBenchmark:
+    # Ensure the scripted player wins every hard game by bisection
+    def test_bisection_player(self, tmp_path):
+        game = Game(StatManager(), io=BisectionIO())
+        game.SAVEFILE_NAME = str(tmp_path / "persistent")
+        game.setDifficulty("hard")
+        for _ in range(20):
+            game.playGame()
+        assert game.stat_manager.wins == 20
+
+    # Ensure results are machine-readable JSON for the chosen targets
+    def test_json_results(self, tmp_path):
+        output = tmp_path / "results.json"
+        assert main(["--only", "bot_next_guess", "stat_load_empty",
+                     "--repeat", "1", "--output", str(output)]) == 0
+        results = json.loads(output.read_text())["results"]
+        assert set(results) == {"bot_next_guess", "stat_load_empty"}
+        assert results["stat_load_empty"]["higher_is_better"] is False
+
+    # Ensure only changes past the threshold count as regressions
+    def test_compare_results(self):
+        baseline = fakeResults(fast=100.0, steady=100.0, new=1.0)
+        current = fakeResults(fast=80.0, steady=95.0, extra=5.0)
+        assert compareResults(current, baseline, 0.1) == [
+            ("fast", 0.2)
+        ]
+
+    # Ensure a regression against a stored baseline fails the run
+    def test_baseline_regression_exit_code(self, tmp_path):
+        baseline = runBenchmarks(["bot_next_guess"], repeat=1)
+        baseline["results"]["bot_next_guess"]["value"] *= 1000
+        baseline_file = tmp_path / "baseline.json"
+        baseline_file.write_text(json.dumps(baseline))
+        assert main(["--only", "bot_next_guess", "--repeat", "1",
+                     "--output", os.devnull,
+                     "--baseline", str(baseline_file)]) == 1
@@ -0,0 +1,67 @@
+import pytest
+
+from calibration import (calibrateAll, calibrateDifficulty,
+                         chancesForWinRate, guessDistribution, main)
+from difficulty import DIFFICULTIES
+from simulation import SimSummary, answerHistogram
+import calibration
+
+
+class TestCalibration:
+    # Ensure the fewest chances reaching the target are picked
+    def test_chances_for_win_rate(self):
+        summary = SimSummary({1: 10, 2: 20, 3: 30, 4: 40})
+        assert chancesForWinRate(summary, 0.3) == (2, 0.3)
+        assert chancesForWinRate(summary, 0.31) == (3, 0.6)
+        assert chancesForWinRate(summary, 1) == (4, 1.0)
+        with pytest.raises(ValueError):
+            chancesForWinRate(summary, 0)
+        with pytest.raises(ValueError):
+            chancesForWinRate(SimSummary(), 0.5)
+
+    # Ensure a perfect player is scored exactly instead of sampled
+    def test_expert_is_exact(self):
+        summary = guessDistribution("expert", 1, 1000)
+        assert summary.histogram == answerHistogram(1, 1000)
+        result = calibrateDifficulty(DIFFICULTIES["hard"], 1.0, "expert")
+        assert (result.chances, result.win_rate) == (10, 1.0)
+
+    # Ensure sloppier players need more chances for the same win rate
+    def test_models_ordered_by_skill(self):
+        chances = [calibrateDifficulty(DIFFICULTIES["hard"], 0.9, model,
+                                       num_games=3000, workers=1).chances
+                   for model in ("expert", "skilled", "casual", "random")]
+        assert chances == sorted(chances)
+        assert chances[0] < chances[-1]
+
+    # Ensure results are identical for any number of workers
+    def test_workers_reproducible(self, monkeypatch):
+        monkeypatch.setattr(calibration, "SHARD_SIZE", 500)
+        single = guessDistribution("casual", 1, 10 ** 40, 2000, seed=3,
+                                   workers=1)
+        pooled = guessDistribution("casual", 1, 10 ** 40, 2000, seed=3,
+                                   workers=2)
+        assert single.total == 2000
+        assert single.histogram == pooled.histogram
+
+    # Ensure every registered difficulty is calibrated
+    def test_calibrate_all(self):
+        results = calibrateAll(0.5, "skilled", num_games=500, workers=1)
+        assert [result.difficulty.name for result in results] == \
+            list(DIFFICULTIES)
+        assert all(result.win_rate >= 0.5 for result in results)
+
+    # Ensure unknown models and empty ranges are rejected
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            guessDistribution("psychic", 1, 10)
+        with pytest.raises(ValueError):
+            guessDistribution("casual", 10, 1)
+
+    # Ensure the command line reports a custom range
+    def test_main_custom_range(self, capsys):
+        assert main(["--range", "1", "100", "--games", "500",
+                     "--workers", "1"]) == 0
+        output = capsys.readouterr().out
+        assert output.startswith("custom (1 to 100): ")
+        assert "currently" not in output
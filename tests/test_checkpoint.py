@@ -0,0 +1,258 @@
+import asyncio
+import os
+
+import pytest
+
+from checkpoint import (CheckpointBuilder, CheckpointWriter, SessionState,
+                        decodeCheckpoint, encodeCheckpoint, loadCheckpoint,
+                        saveCheckpoint)
+from decision_tree import DecisionTreeCache
+from engine import EngineState, GameEngine, ScriptedIO
+from game import Game
+from server import GameServer, GameSession
+from stat_manager import StatManager
+import game_exceptions
+
+
+def playingSession(guesses, difficulty: str = "hard", answer: int = 321,
+                   decision_trees=None):
+    session = GameSession(StatManager(), decision_trees)
+    session.game.setDifficulty(difficulty)
+    session.startGame()
+    session.engine.answer = answer
+    for guess in guesses:
+        session.handleLine(str(guess))
+    return session
+
+
+def sessionTuple(session: GameSession):
+    return (session.session_id, session.game, session.engine,
+            session.in_game)
+
+
+class TestCheckpoint:
+    # Ensure games in progress come back exactly where they were
+    def test_round_trip(self):
+        playing = playingSession([500, 250, 600, 300])
+        idle = GameSession(StatManager())
+        idle.game.setDifficulty("medium")
+        states = decodeCheckpoint(encodeCheckpoint(
+            [sessionTuple(playing), sessionTuple(idle)]
+        ))
+        assert [state.session_id for state in states] == \
+            [playing.session_id, idle.session_id]
+
+        restored = GameSession.restore(states[0], StatManager())
+        engine = restored.engine
+        assert restored.in_game
+        assert (engine.answer, engine.tries_left, engine.started) == \
+            (321, 6, playing.engine.started)
+        assert (engine.history.low, engine.history.high) == (301, 499)
+        assert list(engine.history.guesses) == [500, 250, 600, 300]
+        assert engine.history.num_wasted == 1
+        assert restored.game.DIFFICULTY == "hard"
+
+        assert restored.handleLine("321") == ["You guessed it!",
+                                              "The number was 321. "
+                                              "Thanks for playing!"]
+        assert restored.game.stat_manager.num_hard_wins == 1
+
+        idle_restored = GameSession.restore(states[1], StatManager())
+        assert not idle_restored.in_game
+        assert idle_restored.engine.state is EngineState.NEW
+        assert (idle_restored.game.DIFFICULTY,
+                idle_restored.game.ANSWER_RANGE_END) == ("medium", 100)
+
+    # Ensure the optimal play hint continues from the same tree node
+    def test_decision_tree_position(self, tmp_path):
+        trees = DecisionTreeCache(str(tmp_path / "trees"))
+        try:
+            playing = playingSession([500], decision_trees=trees)
+            expected = playing.engine.hint()
+            state = decodeCheckpoint(
+                encodeCheckpoint([sessionTuple(playing)])
+            )[0]
+            restored = GameSession.restore(state, StatManager(), trees)
+            assert restored.engine.tree_index == playing.engine.tree_index
+            assert restored.engine.hint() == expected
+        finally:
+            trees.close()
+
+    # Ensure evil host games come back still without an answer
+    def test_evil_host_sessions(self):
+        session = GameSession(StatManager())
+        session.game.setDifficulty("hard")
+        session.game.evil_host = True
+        session.startGame()
+        for guess in (500, 250):
+            session.handleLine(str(guess))
+        idle = GameSession(StatManager())
+        idle.game.evil_host = True
+        states = decodeCheckpoint(encodeCheckpoint(
+            [sessionTuple(session), sessionTuple(idle)]
+        ))
+        assert states[0].answer is None
+        assert states[1].evil_host and not states[1].in_game
+
+        builder = CheckpointBuilder()
+        for state in states:
+            builder.addState(state)
+        assert [state.to_json() for state in
+                decodeCheckpoint(builder.encode())] == \
+            [state.to_json() for state in states]
+
+        restored = GameSession.restore(states[0], StatManager())
+        assert restored.game.evil_host
+        assert (restored.engine.host.low, restored.engine.host.high) == \
+            (501, 1000)
+        while restored.in_game:
+            restored.handleLine(str(restored.engine.hint()))
+        assert 501 <= restored.engine.answer <= 1000
+
+    # Ensure ranges past 64 bits still round trip
+    def test_big_int_sessions(self):
+        game = Game(StatManager(), io=ScriptedIO(()),
+                    range_start=1, range_end=10 ** 30, chances=200)
+        engine = GameEngine(game)
+        engine.newGame(answer=10 ** 29)
+        engine.submitGuess(10 ** 29 + 5)
+        small = playingSession([500])
+        states = decodeCheckpoint(encodeCheckpoint(
+            [("big", game, engine, True), sessionTuple(small)]
+        ))
+        assert [state.session_id for state in states] == \
+            [small.session_id, "big"]
+        big = states[1]
+        assert (big.answer, big.high, list(big.guesses)) == \
+            (10 ** 29, 10 ** 29 + 4, [10 ** 29 + 5])
+
+        builder = CheckpointBuilder()
+        for state in states:
+            builder.addState(state)
+        assert decodeCheckpoint(builder.encode())[1].to_json() == \
+            big.to_json()
+
+    # Ensure restored states can be checkpointed again unchanged
+    def test_add_state(self):
+        states = decodeCheckpoint(encodeCheckpoint(
+            [sessionTuple(playingSession([500, 200]))]
+        ))
+        builder = CheckpointBuilder()
+        builder.addState(states[0])
+        assert len(builder) == 1
+        again = decodeCheckpoint(builder.encode())
+        assert again[0].to_json() == states[0].to_json()
+
+    # Ensure damaged checkpoints are rejected
+    def test_invalid_data(self):
+        data = encodeCheckpoint([sessionTuple(playingSession([500]))])
+        for damaged in (b"", b"not a checkpoint", data[:-3],
+                        data + b"\0", b"X" + data[1:]):
+            with pytest.raises(game_exceptions.InvalidSaveFormatError):
+                decodeCheckpoint(damaged)
+        assert decodeCheckpoint(encodeCheckpoint([])) == []
+
+    # Ensure the writer keeps only the newest checkpoint on disk
+    def test_writer(self, tmp_path):
+        filename = str(tmp_path / "sessions.checkpoint")
+        writer = CheckpointWriter(filename)
+        sessions = [sessionTuple(playingSession([500]))]
+        for _ in range(5):
+            writer.submit(encodeCheckpoint([]))
+        writer.submit(encodeCheckpoint(sessions))
+        writer.close()
+        assert 1 <= writer.num_written <= 6
+        assert writer.error is None
+        assert len(loadCheckpoint(filename)) == 1
+        assert not os.path.exists(f"{filename}.tmp")
+        with pytest.raises(ValueError):
+            writer.submit(b"")
+
+        saveCheckpoint(filename, [])
+        assert loadCheckpoint(filename) == []
+
+    # Ensure SessionState survives its JSON form
+    def test_state_json(self):
+        state = SessionState("abc", "easy", 1, 10, 5, True, 7, 4, 6, 9,
+                             started=12.5, num_wasted=0, guesses=[5],
+                             replies=[-1])
+        assert SessionState.from_json(state.to_json()).to_json() == \
+            state.to_json()
+
+
+async def readUntil(reader, text: str):
+    lines = []
+    while True:
+        line = (await reader.readline()).decode()
+        lines.append(line.strip())
+        if text in line or not line:
+            return lines
+
+
+class TestServerCheckpoints:
+    # Ensure a game in progress survives a server restart
+    def test_resume_after_restart(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 7)
+        checkpoint_file = str(tmp_path / "sessions.checkpoint")
+
+        async def firstRun():
+            server = GameServer(StatManager(), port=0,
+                                checkpoint_file=checkpoint_file)
+            await server.start()
+            reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                           server.port)
+            welcome = await readUntil(reader, "Commands")
+            session_id = welcome[1].split()[-1].rstrip(".")
+            writer.write(b"play\n3\n")
+            await readUntil(reader, "Guesses remaining")
+            # Stopping checkpoints the game while it's still connected
+            await server.stop()
+            writer.close()
+            return session_id
+
+        async def secondRun(session_id):
+            stat_manager = StatManager()
+            server = GameServer(stat_manager, port=0,
+                                checkpoint_file=checkpoint_file)
+            await server.start()
+            assert list(server.detached) == [session_id]
+            reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                           server.port)
+            await readUntil(reader, "Commands")
+            writer.write(b"resume nobody\n")
+            missing = await readUntil(reader, "No session")
+            writer.write(f"resume {session_id}\n".encode())
+            resumed = await readUntil(reader, "Guesses remaining")
+            writer.write(b"7\n")
+            finished = await readUntil(reader, "Thanks")
+            writer.write(b"quit\n")
+            await readUntil(reader, "Goodbye")
+            writer.close()
+            await server.stop()
+            return stat_manager, missing, resumed, finished
+
+        session_id = asyncio.run(firstRun())
+        stat_manager, missing, resumed, finished = \
+            asyncio.run(secondRun(session_id))
+        assert missing == ["No session to resume with that id."]
+        assert resumed == [f"Session {session_id} resumed.",
+                           "Enter a number between 1 and 10, inclusive.",
+                           "Guesses remaining: 4"]
+        assert finished[0] == "You guessed it!"
+        assert (stat_manager.wins, stat_manager.num_easy_wins) == (1, 1)
+        assert loadCheckpoint(checkpoint_file) == []
+
+    # Ensure unreadable checkpoints don't stop the server from starting
+    def test_bad_checkpoint_ignored(self, tmp_path):
+        checkpoint_file = tmp_path / "sessions.checkpoint"
+        checkpoint_file.write_bytes(b"garbage")
+
+        async def run():
+            server = GameServer(StatManager(), port=0,
+                                checkpoint_file=str(checkpoint_file))
+            await server.start()
+            detached = dict(server.detached)
+            await server.stop()
+            return detached
+
+        assert asyncio.run(run()) == {}
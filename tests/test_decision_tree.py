@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from bot import GuessBot
+from decision_tree import (DecisionTreeCache, FILE_HEADER, TreeBot,
+                           buildTree)
+from engine import GameEngine, ScriptedIO
+from game import Game
+from stat_manager import StatManager
+
+
+def botPath(start_num: int, end_num: int, answer: int, bot):
+    guesses = [bot.getNextGuess()]
+    while guesses[-1] != answer:
+        if guesses[-1] > answer:
+            bot.setUpperBound(guesses[-1] - 1)
+        else:
+            bot.setLowerBound(guesses[-1] + 1)
+        guesses.append(bot.getNextGuess())
+    return guesses
+
+
+class TestDecisionTree:
+    @pytest.fixture(autouse=True)
+    def setup_and_teardown(self, tmp_path):
+        self.cache = DecisionTreeCache(str(tmp_path / "trees"))
+        yield
+        self.cache.close()
+
+    # Ensure walking the tree reproduces GuessBot for every answer
+    @pytest.mark.parametrize("start_num,end_num",
+                             [(1, 10), (1, 100), (1, 1000), (-20, 33)])
+    def test_tree_bot_matches_guess_bot(self, start_num, end_num):
+        tree = self.cache.get(start_num, end_num)
+        for answer in range(start_num, end_num + 1):
+            assert botPath(start_num, end_num, answer, TreeBot(tree)) == \
+                botPath(start_num, end_num, answer,
+                        GuessBot(start_num, end_num))
+
+    # Ensure trees are built once and reused from the cache file
+    def test_cached_file_reused(self):
+        first = self.cache.get(1, 100)
+        assert self.cache.get(1, 100) is first
+        filename = first.filename
+
+        other_cache = DecisionTreeCache(self.cache.cache_dir)
+        tree = other_cache.get(1, 100)
+        assert tree.filename == filename
+        assert list(tree.nodes) == list(buildTree(1, 100))
+        other_cache.close()
+
+    # Ensure a stale or corrupt cache file gets rebuilt
+    def test_stale_file_rebuilt(self):
+        filename = self.cache.fileName(1, 1000)
+        os.makedirs(self.cache.cache_dir, exist_ok=True)
+        with open(filename, "wb") as f:
+            f.write(b"\0" * (FILE_HEADER.size + 16))
+        tree = self.cache.get(1, 1000)
+        assert tree.guessAt(0) == GuessBot(1, 1000).getNextGuess()
+
+    # Ensure hints follow the tree and fall back once the player strays
+    def test_engine_hints(self):
+        game = Game(StatManager(), io=ScriptedIO([]))
+        game.decision_trees = self.cache
+        game.setDifficulty("hard")
+        engine = GameEngine(game)
+        engine.newGame(answer=700)
+
+        assert engine.hint() == 500
+        engine.submitGuess(engine.hint())
+        assert engine.tree_index == 2
+        assert engine.hint() == GuessBot(501, 1000).getNextGuess()
+
+        engine.submitGuess(900)
+        assert engine.tree_index is None
+        assert engine.hint() == GuessBot(501, 899).getNextGuess()
+
+    # Ensure ranges too big to precompute are refused
+    def test_range_too_large(self):
+        with pytest.raises(ValueError):
+            buildTree(1, 10 ** 12)
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from difficulty import DIFFICULTIES, WIN_STATS, registerDifficulty
+from engine import ScriptedIO
+from game import Game
+from stat_manager import StatManager, statDict
+
+
+@pytest.fixture
+def expertDifficulty():
+    registerDifficulty("expert", 1, 10 ** 6, 20)
+    yield DIFFICULTIES["expert"]
+    del DIFFICULTIES["expert"]
+    del WIN_STATS["num_expert_wins"]
+
+
+class TestDifficulty:
+    # Ensure the built-in levels keep their ranges and counters
+    def test_builtin_levels(self):
+        assert list(DIFFICULTIES) == ["easy", "medium", "hard"]
+        assert [DIFFICULTIES[name].stat_key for name in DIFFICULTIES] == \
+            ["num_easy_wins", "num_med_wins", "num_hard_wins"]
+        assert DIFFICULTIES["hard"].range_size == 1000
+        assert list(StatManager().counters()) == [
+            "wins", "losses", "num_guesses", "num_first_correct",
+            "num_easy_wins", "num_med_wins", "num_hard_wins"
+        ]
+
+    # Ensure a registered level is playable and gets its own counter
+    def test_register_level(self, expertDifficulty, tmp_path):
+        assert statDict["num_expert_wins"] == "Wins on expert mode"
+        game = Game(StatManager(), io=ScriptedIO([]))
+        game.changeDifficulty("expert")
+        assert (game.ANSWER_RANGE_END, game.STARTING_CHANCES) == \
+            (10 ** 6, 20)
+        game.win()
+        assert game.stat_manager.num_expert_wins == 1
+        assert game.stat_manager.num_hard_wins == 0
+
+        filename = str(tmp_path / "persistent")
+        game.stat_manager.save(filename)
+        loaded = StatManager()
+        loaded.load(filename)
+        assert loaded.num_expert_wins == 1
+
+    # Ensure saves made before a level existed still load
+    def test_old_save_with_new_level(self, tmp_path):
+        filename = tmp_path / "persistent"
+        filename.write_text(json.dumps(StatManager().counters()))
+        registerDifficulty("expert", 1, 10 ** 6, 20)
+        try:
+            loaded = StatManager()
+            loaded.load(str(filename))
+            assert loaded.num_expert_wins == 0
+        finally:
+            del DIFFICULTIES["expert"]
+            del WIN_STATS["num_expert_wins"]
+
+    # Ensure every win goes to the current difficulty's counter
+    @pytest.mark.parametrize("difficulty", ["easy", "medium", "hard"])
+    def test_win_dispatch(self, difficulty):
+        game = Game(StatManager(), io=ScriptedIO([]))
+        game.setDifficulty(difficulty)
+        game.win()
+        wins = {name: getattr(game.stat_manager, level.stat_key)
+                for name, level in DIFFICULTIES.items()}
+        assert wins == {name: int(name == difficulty)
+                        for name in DIFFICULTIES}
+
+    # Ensure the difficulty prompt lists the registered levels
+    def test_prompt_lists_levels(self, expertDifficulty):
+        game = Game(StatManager(), io=ScriptedIO(["expert"]))
+        prompts = []
+        game.io.readLine = lambda prompt: prompts.append(prompt) or "expert"
+        game.requestDifficultyChange()
+        assert prompts == ["Enter difficulty (easy, medium, hard, expert): "]
+        assert game.DIFFICULTY == "expert"
+
+    # Ensure broken definitions and clashing counters are rejected
+    def test_invalid_registration(self):
+        with pytest.raises(ValueError):
+            registerDifficulty("broken", 10, 1, 5)
+        with pytest.raises(ValueError):
+            registerDifficulty("broken", 1, 10, 0)
+        with pytest.raises(ValueError):
+            registerDifficulty("broken", 1, 10, 5, stat_key="wins on x")
+        with pytest.raises(ValueError):
+            registerDifficulty("broken", 1, 10, 5, stat_key="num_easy_wins")
+        with pytest.raises(ValueError):
+            registerDifficulty("easy", 1, 10, 5, stat_key="num_other_wins")
+        assert "broken" not in DIFFICULTIES
+
+    # Ensure win counters can't take names StatManager already uses
+    @pytest.mark.parametrize("stat_key", ["wins", "losses", "num_guesses",
+                                          "num_first_correct", "version",
+                                          "aggregates", "counters", "save",
+                                          "__init__"])
+    def test_reserved_stat_keys(self, stat_key):
+        with pytest.raises(ValueError):
+            registerDifficulty("broken", 1, 10, 5, stat_key=stat_key)
+        assert "broken" not in DIFFICULTIES
+        assert stat_key not in WIN_STATS
+        sm = StatManager()
+        Game(sm, io=ScriptedIO([])).win()
+        assert sm.wins == 1
+
+    # Ensure a win is never counted without its difficulty's counter
+    def test_unknown_difficulty(self, expertDifficulty):
+        with pytest.raises(ValueError):
+            Game(StatManager(), "impossible")
+        game = Game(StatManager(), "expert", io=ScriptedIO([]))
+        del DIFFICULTIES["expert"]
+        try:
+            with pytest.raises(KeyError):
+                game.firstGuessWin()
+        finally:
+            DIFFICULTIES["expert"] = expertDifficulty
+        assert (game.stat_manager.wins,
+                game.stat_manager.num_first_correct) == (0, 0)
+        game.win()
+        assert game.stat_manager.num_expert_wins == 1
@@ -0,0 +1,190 @@
+import os.path
+
+import pytest
+
+import game_exceptions
+from engine import (EngineState, GameEngine, GuessResult, LineSink,
+                    ScriptedIO, TerminalIO)
+from game import Game
+from stat_manager import StatManager
+
+
+class RecordingSink:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text: str):
+        self.writes.append(text)
+
+    def flush(self):
+        pass
+
+
+class TestEngine:
+    @pytest.fixture(autouse=True)
+    def setup_and_teardown(self):
+        self.game = Game(StatManager(), io=ScriptedIO([]))
+        self.engine = GameEngine(self.game)
+        yield
+        if os.path.exists(self.game.SAVEFILE_NAME):
+            from os import remove
+            remove(self.game.SAVEFILE_NAME)
+
+    # Ensure the engine walks through new -> in progress -> over
+    def test_state_machine(self):
+        assert self.engine.state is EngineState.NEW
+        self.engine.newGame(answer=7)
+        assert self.engine.state is EngineState.IN_PROGRESS
+        assert self.engine.submitGuess(3) is GuessResult.TOO_LOW
+        assert self.engine.submitGuess(9) is GuessResult.TOO_HIGH
+        assert self.engine.submitGuess(7) is GuessResult.CORRECT
+        assert self.engine.isOver()
+        assert self.engine.lower_guesses == [3]
+        assert self.engine.higher_guesses == [9]
+
+    # Ensure guessing after the game ends is rejected
+    def test_guess_after_game_over(self):
+        self.engine.newGame(answer=1)
+        self.engine.submitGuess(1)
+        with pytest.raises(game_exceptions.GameNotInProgressError):
+            self.engine.submitGuess(1)
+
+    # Ensure out of range guesses don't count or use up a try
+    def test_out_of_range_guess(self):
+        self.engine.newGame(answer=5)
+        with pytest.raises(game_exceptions.InvalidOptionError):
+            self.engine.submitGuess(11)
+        assert self.engine.tries_left == self.game.STARTING_CHANCES
+        assert self.game.stat_manager.num_guesses == 0
+
+    # Ensure stats match the interactive flow for wins and losses
+    def test_stat_updates(self):
+        sm = self.game.stat_manager
+        self.engine.newGame(answer=4)
+        self.engine.submitGuess(4)
+        assert sm.wins == 1 and sm.num_first_correct == 1
+        assert sm.num_easy_wins == 1
+
+        self.engine.newGame(answer=4)
+        for _ in range(self.game.STARTING_CHANCES):
+            self.engine.submitGuess(5)
+        assert self.engine.isOver() and not self.engine.won
+        assert sm.losses == 1
+        assert sm.num_guesses == 1 + self.game.STARTING_CHANCES
+
+    # Ensure playGame can be driven end to end without a terminal
+    def test_scripted_play_game(self, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 6)
+        self.game.io = ScriptedIO(["abc", "0", "5", "8", "6"])
+        self.game.playGame()
+        output = self.game.io.output
+        assert "You did not enter an integer in the given range!" in output
+        assert "You guessed it!" in output
+        assert "The number was 6. Thanks for playing!" in output
+        assert self.game.stat_manager.wins == 1
+        assert self.game.stat_manager.num_guesses == 3
+        assert os.path.exists(self.game.SAVEFILE_NAME)
+
+    # Ensure everything before a prompt goes out in a single write
+    def test_terminal_frames(self, monkeypatch):
+        monkeypatch.setattr("builtins.input", lambda: "5")
+        sink = RecordingSink()
+        io = TerminalIO(sink)
+        io.write("Lower: []")
+        io.write("Higher: [7]")
+        assert sink.writes == []
+        assert io.readLine("Guess: ") == "5"
+        assert sink.writes == ["Lower: []\nHigher: [7]\nGuess: "]
+        io.flush()
+        assert len(sink.writes) == 1
+
+    # Ensure a silent terminal never writes anything
+    def test_silent_terminal(self, monkeypatch):
+        monkeypatch.setattr("builtins.input", lambda: "1")
+        sink = RecordingSink()
+        io = TerminalIO(sink, silent=True)
+        io.write("Hello")
+        assert io.readLine("Prompt: ") == "1"
+        assert sink.writes == []
+
+    # Ensure a silent game writes nothing, whatever the menu does
+    def test_silent_menu(self, monkeypatch, tmp_path, capsys):
+        monkeypatch.setattr("engine.randint", lambda start, end: 6)
+        lines = iter(["1", "6", "4", "3", "2", "4", "6", "1", "100",
+                      "7", "1", "10", "9"])
+        monkeypatch.setattr("builtins.input", lambda: next(lines))
+        sink = RecordingSink()
+        self.game.io = TerminalIO(sink, silent=True)
+        self.game.SAVEFILE_NAME = str(tmp_path / "persistent")
+        with pytest.raises(SystemExit):
+            self.game.run()
+        assert self.game.stat_manager.wins == 1
+        assert sink.writes == []
+        assert capsys.readouterr().out == ""
+
+    # Ensure menu options write through the game's I/O
+    def test_menu_output(self, tmp_path):
+        self.game.io = ScriptedIO(["3", "4", "2", "3", "6", "1", "10", "9"])
+        self.game.SAVEFILE_NAME = str(tmp_path / "persistent")
+        self.game.HAS_SAVE = True
+        with pytest.raises(SystemExit):
+            self.game.run()
+        output = self.game.io.output
+        assert "No save file found!" in output
+        assert any("Your game statistics" in line for line in output)
+        assert "Save successful!" in output
+        assert "Load successful!" in output
+        assert any(line.startswith("It's guess order is: [")
+                   for line in output)
+        assert output[-1] == "Exiting program..."
+
+    # Ensure streamed text reaches the adapter one line at a time
+    def test_line_sink(self):
+        io = ScriptedIO(())
+        sink = LineSink(io)
+        sink.write("a")
+        sink.write("b\nc\n\nd")
+        assert io.output == ["ab", "c", ""]
+        sink.flush()
+        assert io.output == ["ab", "c", "", "d"]
+
+    # Ensure terminals get streamed text as it comes, after the frame
+    def test_line_sink_stream(self):
+        sink = RecordingSink()
+        io = TerminalIO(sink)
+        io.write("before")
+        out = LineSink(io)
+        out.write("[1")
+        out.write(", 2")
+        assert sink.writes == ["before\n", "[1", ", 2"]
+        assert io.frame == []
+        silent = TerminalIO(sink, silent=True)
+        LineSink(silent).write("x")
+        assert sink.writes == ["before\n", "[1", ", 2"]
+
+    # Ensure a whole scripted game writes once per prompt
+    def test_play_game_frames(self, monkeypatch, tmp_path, capsys):
+        monkeypatch.setattr("engine.randint", lambda start, end: 6)
+        guesses = iter(["5", "8", "6"])
+        monkeypatch.setattr("builtins.input", lambda: next(guesses))
+        sink = RecordingSink()
+        self.game.io = TerminalIO(sink)
+        self.game.SAVEFILE_NAME = str(tmp_path / "persistent")
+        self.game.playGame()
+        # Three prompts, the result waits for the next one
+        assert len(sink.writes) == 3
+        assert "".join(self.game.io.frame).startswith("You guessed it!")
+
+    # Ensure the menu is rendered once per save state
+    def test_menu_cache(self):
+        self.game.io = ScriptedIO([])
+        self.game.HAS_SAVE = False
+        self.game.printMenu()
+        self.game.printMenu()
+        self.game.HAS_SAVE = True
+        self.game.printMenu()
+        without_load, cached, with_load = self.game.io.output
+        assert without_load is cached
+        assert "Load save data" not in without_load
+        assert "3 -- Load save data" in with_load
+        assert len(self.game.menu_frames) == 2
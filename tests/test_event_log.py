@@ -0,0 +1,156 @@
+from array import array
+import random
+
+import pytest
+
+from difficulty import DIFFICULTIES, WIN_STATS, registerDifficulty
+from engine import GameEngine, ScriptedIO
+from event_log import (BLOCK_HEADER, COLUMNS, FILE_MAGIC, LEGACY_BLOCK_MAGIC,
+                       EventLogWriter, iterBlocks, iterGames, padTo8)
+from game import Game
+from stat_manager import StatManager
+
+
+def randomGame(rng: random.Random):
+    guesses = [rng.randint(1, 1000) for _ in range(rng.randint(0, 10))]
+    return (rng.choice(["easy", "medium", "hard"]), rng.randint(1, 1000),
+            guesses, rng.random() < 0.5, rng.random(), rng.random() + 1)
+
+
+class TestEventLog:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.filename = str(tmp_path / "games.log")
+
+    # Ensure every recorded game streams back unchanged
+    def test_round_trip(self):
+        rng = random.Random(8)
+        games = [randomGame(rng) for _ in range(1000)]
+        with EventLogWriter(self.filename, block_rows=64) as log:
+            for game in games:
+                log.recordGame(*game)
+
+        records = list(iterGames(self.filename))
+        assert len(records) == len(games)
+        for record, game in zip(records, games):
+            difficulty, answer, guesses, won, started, finished = game
+            assert record.difficulty == difficulty
+            assert record.answer == answer
+            assert record.guesses == guesses
+            assert record.won == won
+            assert record.started == started
+            assert record.finished == finished
+
+    # Ensure columns can be read per block without touching rows
+    def test_block_columns(self):
+        with EventLogWriter(self.filename, block_rows=10) as log:
+            for answer in range(25):
+                log.recordGame("easy", answer, [answer], True, 0.0, 1.0)
+
+        answers = []
+        for block in iterBlocks(self.filename):
+            answers.extend(block["answer"].tolist())
+            assert sum(block["guess_count"]) == len(block["answer"])
+        assert answers == list(range(25))
+
+    # Ensure a block cut short by a crash doesn't break reading
+    def test_truncated_block(self):
+        with EventLogWriter(self.filename, block_rows=5) as log:
+            for answer in range(10):
+                log.recordGame("hard", answer, [1, 2], False, 0.0, 1.0)
+        with open(self.filename, "r+b") as f:
+            f.seek(0, 2)
+            f.truncate(f.tell() - 3)
+
+        assert [r.answer for r in iterGames(self.filename)] == list(range(5))
+
+    # Ensure games appended after a torn block can still be read
+    def test_reopen_after_torn_block(self):
+        with EventLogWriter(self.filename, block_rows=4) as log:
+            for answer in range(6):
+                log.recordGame("easy", answer, [answer], True, 0.0, 1.0)
+        with open(self.filename, "r+b") as f:
+            f.seek(0, 2)
+            f.truncate(f.tell() - 5)
+
+        with EventLogWriter(self.filename, block_rows=4) as log:
+            for answer in range(4, 8):
+                log.recordGame("easy", answer, [answer], True, 0.0, 1.0)
+        assert [r.answer for r in iterGames(self.filename)] == list(range(8))
+
+    # Ensure other files are never appended to
+    def test_rejects_other_files(self):
+        with open(self.filename, "wb") as f:
+            f.write(b"not a log at all")
+        with pytest.raises(ValueError):
+            EventLogWriter(self.filename)
+        with open(self.filename, "wb") as f:
+            f.write(b"GTN")
+        EventLogWriter(self.filename).close()
+        assert list(iterGames(self.filename)) == []
+
+    # Ensure games past 64 bits are skipped instead of crashing
+    def test_skips_huge_games(self):
+        with EventLogWriter(self.filename) as log:
+            log.recordGame("custom", 10 ** 30, [10 ** 29], False, 0.0, 1.0)
+            log.recordGame("custom", 5, [-10 ** 30, 5], True, 0.0, 1.0)
+            log.recordGame("easy", 5, [2 ** 63 - 1, 5], True, 0.0, 1.0)
+        assert log.num_skipped == 2
+        record, = iterGames(self.filename)
+        assert record.guesses == [2 ** 63 - 1, 5]
+
+    # Ensure registered difficulties are logged by name
+    def test_registered_difficulty(self):
+        registerDifficulty("tiny", 1, 3, 2)
+        try:
+            with EventLogWriter(self.filename, block_rows=3) as log:
+                game = Game(StatManager(), io=ScriptedIO([]), event_log=log)
+                game.setDifficulty("tiny")
+                engine = GameEngine(game)
+                engine.newGame(answer=2)
+                engine.submitGuess(2)
+                for difficulty in ["hard", "tiny", "medium", "bad\n"]:
+                    log.recordGame(difficulty, 1, [1], True, 0.0, 1.0)
+        finally:
+            del DIFFICULTIES["tiny"]
+            del WIN_STATS["num_tiny_wins"]
+        assert [r.difficulty for r in iterGames(self.filename)] == \
+            ["tiny", "hard", "tiny", "medium", None]
+
+    # Ensure blocks written before names were stored still decode
+    def test_legacy_blocks(self):
+        columns = {"answer": [7, 8], "started": [0.0, 0.0],
+                   "finished": [1.0, 1.0], "guess_count": [1, 2],
+                   "difficulty": [2, 0], "outcome": [1, 0]}
+        body = bytearray()
+        for name, code in COLUMNS:
+            body += array(code, columns[name]).tobytes()
+            body += bytes(padTo8(len(body)))
+        body += array("q", [7, 1, 2]).tobytes()
+        with open(self.filename, "wb") as f:
+            f.write(FILE_MAGIC)
+            f.write(BLOCK_HEADER.pack(LEGACY_BLOCK_MAGIC, 2, 3,
+                                      BLOCK_HEADER.size + len(body)))
+            f.write(body)
+
+        with EventLogWriter(self.filename) as log:
+            log.recordGame("easy", 9, [9], True, 0.0, 1.0)
+        assert [(r.difficulty, r.answer, r.guesses)
+                for r in iterGames(self.filename)] == \
+            [("hard", 7, [7]), ("easy", 8, [1, 2]), ("easy", 9, [9])]
+
+    # Ensure finished games played through the engine get logged
+    def test_engine_records_games(self):
+        log = EventLogWriter(self.filename)
+        game = Game(StatManager(), io=ScriptedIO([]), event_log=log)
+        engine = GameEngine(game)
+        engine.newGame(answer=4)
+        engine.submitGuess(2)
+        engine.submitGuess(4)
+        log.close()
+
+        record, = iterGames(self.filename)
+        assert record.difficulty == "easy"
+        assert record.guesses == [2, 4]
+        assert record.won
+        assert record.finished >= record.started
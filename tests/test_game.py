@@ -45,7 +45,7 @@ class TestGame:
     def test_saving_default__data(self):
         self.game.saveGameStats()
         stat_data = get_stat_data(self.game.SAVEFILE_NAME)
-        assert stat_data == self.game.stat_manager.__dict__
+        assert stat_data == self.game.stat_manager.to_json()
 
     # Ensure winning a game increases number of wins by exactly one
     def test_winning(self):
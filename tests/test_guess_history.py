@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from engine import GameEngine, ScriptedIO
+from game import Game
+from guess_history import GuessHistory, TOO_HIGH, TOO_LOW
+from stat_manager import StatManager
+
+
+class TestGuessHistory:
+    # Ensure the feasible interval matches a rescan of every guess
+    def test_interval_matches_rescan(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            answer = rng.randint(1, 1000)
+            history = GuessHistory(1, 1000)
+            lower, higher = [], []
+            for _ in range(15):
+                guess = rng.randint(1, 1000)
+                if guess == answer:
+                    continue
+                feasible = max(lower, default=0) < guess < \
+                    min(higher, default=1001)
+                if guess > answer:
+                    higher.append(guess)
+                    wasted = history.record(guess, TOO_HIGH)
+                else:
+                    lower.append(guess)
+                    wasted = history.record(guess, TOO_LOW)
+                assert wasted == (not feasible)
+                assert history.low == max(lower, default=0) + 1
+                assert history.high == min(higher, default=1001) - 1
+            assert history.lowerGuesses() == lower
+            assert history.higherGuesses() == higher
+            assert history.remaining() == history.high - history.low + 1
+
+    # Ensure the history object stays slot-based
+    def test_no_instance_dict(self):
+        history = GuessHistory(1, 10)
+        with pytest.raises(AttributeError):
+            history.__dict__
+
+    # Ensure ranges past 64 bits still work
+    def test_big_int_guesses(self):
+        history = GuessHistory(1, 10 ** 30)
+        history.record(10 ** 29, TOO_LOW)
+        assert history.low == 10 ** 29 + 1
+        assert list(history.guesses) == [10 ** 29]
+
+    # Ensure the game tells players about guesses already ruled out
+    def test_wasted_guess_message(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 5)
+        game = Game(StatManager(), io=ScriptedIO(["7", "9", "5"]))
+        game.SAVEFILE_NAME = str(tmp_path / "persistent")
+        game.playGame()
+        output = game.io.output
+        wasted = [line for line in output if "already ruled out" in line]
+        assert len(wasted) == 1
+        assert "The answer is between 1 and 6 (6 possible)" in output
+
+    # Ensure the engine reports the remaining candidates
+    def test_engine_interval(self):
+        engine = GameEngine(Game(StatManager(), io=ScriptedIO([])))
+        engine.newGame(answer=4)
+        engine.submitGuess(2)
+        engine.submitGuess(8)
+        assert (engine.history.low, engine.history.high) == (3, 7)
+        assert engine.history.remaining() == 5
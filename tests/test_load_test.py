@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from load_test import (MODELS, LoadTestReport, main, percentile,
+                       runLoadTest, runPlayerShard, splitGames)
+
+
+class TestLoadTest:
+    # Ensure every model plays exactly the requested number of games
+    @pytest.mark.parametrize("model_name", list(MODELS))
+    def test_models_finish_games(self, model_name):
+        result = runPlayerShard(model_name, 25, 1, "medium")
+        assert result["games"] == 25
+        assert len(result["guess_seconds"]) >= 25
+        assert 0 < result["save_seconds"] <= result["seconds"]
+
+    # Ensure junk input is handled as invalid instead of ending games
+    def test_invalid_input_player(self):
+        bisection = runPlayerShard("bisection", 20, 1, "hard")
+        invalid = runPlayerShard("invalid", 20, 1, "hard")
+        assert len(invalid["guess_seconds"]) > \
+            len(bisection["guess_seconds"])
+
+    # Ensure games are spread over workers without losing any
+    def test_split_games(self):
+        assert splitGames(10, 3) == [4, 3, 3]
+        assert splitGames(2, 4) == [1, 1, 0, 0]
+
+    # Ensure results from several worker processes are merged
+    def test_process_pool(self):
+        report = runLoadTest("noisy", 40, workers=2)
+        assert report.games == 40
+        assert report.workers == 2
+        assert report.games_per_second > 0
+        assert 0 < report.save_fraction < 1
+
+    # Ensure unknown models and worker counts are rejected
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            runLoadTest("telepathic", 10, workers=1)
+        with pytest.raises(ValueError):
+            runLoadTest("random", 10, workers=0)
+
+    # Ensure latency percentiles come from the sorted guess timings
+    def test_report_percentiles(self):
+        report = LoadTestReport("bisection", 1, 2, 2.0, 2.0, 0.5,
+                                [i / 1000 for i in range(100, 0, -1)])
+        assert report.games_per_second == 1.0
+        assert report.save_fraction == 0.25
+        assert report.latencyPercentiles() == pytest.approx(
+            {50: 50.0, 90: 90.0, 99: 99.0}
+        )
+        assert percentile([], 50) == 0.0
+
+    # Ensure the command line writes JSON reports
+    def test_main_output(self, tmp_path):
+        output = tmp_path / "load.json"
+        assert main(["--model", "bisection", "random", "--games", "10",
+                     "--workers", "1", "--output", str(output)]) == 0
+        reports = json.loads(output.read_text())
+        assert [report["model"] for report in reports] == \
+            ["bisection", "random"]
+        assert reports[0]["games"] == 10
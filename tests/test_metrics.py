@@ -0,0 +1,75 @@
+import urllib.request
+
+import pytest
+
+import metrics
+from engine import ScriptedIO
+from game import Game
+from stat_manager import StatManager
+
+
+class TestMetrics:
+    @pytest.fixture(autouse=True)
+    def setup_and_teardown(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 7)
+        self.game = Game(StatManager(), io=ScriptedIO([]))
+        self.game.SAVEFILE_NAME = str(tmp_path / "persistent")
+        yield
+        metrics.disable()
+
+    def playScriptedGame(self, lines):
+        self.game.io = ScriptedIO(lines)
+        self.game.playGame()
+
+    # Ensure histograms render cumulative Prometheus buckets
+    def test_render_histogram(self):
+        registry = metrics.MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Test", (0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+        text = registry.render()
+        assert "# TYPE test_seconds histogram" in text
+        assert 'test_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_seconds_bucket{le="1.0"} 3' in text
+        assert 'test_seconds_bucket{le="+Inf"} 4' in text
+        assert "test_seconds_count 4" in text
+
+    # Ensure enabled metrics see guesses, invalid input and saves
+    def test_game_metrics_enabled(self):
+        metrics.enable()
+        guesses_before = metrics.GUESS_HANDLING.count
+        invalid_before = metrics.INVALID_GUESSES.value
+        saves_before = metrics.STAT_SAVE.count
+
+        self.playScriptedGame(["abc", "3", "7"])
+
+        assert metrics.GUESS_HANDLING.count == guesses_before + 3
+        assert metrics.INVALID_GUESSES.value == invalid_before + 1
+        assert metrics.STAT_SAVE.count == saves_before + 1
+        assert metrics.ACTIVE_GAMES.value == 0
+
+    # Ensure nothing is recorded while instrumentation is off
+    def test_game_metrics_disabled(self):
+        rendered = metrics.REGISTRY.render()
+        self.playScriptedGame(["abc", "3", "7"])
+        assert metrics.REGISTRY.render() == rendered
+
+    # Ensure metrics can be written out for a file-based scraper
+    def test_write_metrics_file(self, tmp_path):
+        filename = tmp_path / "gtn.prom"
+        metrics.writeMetricsFile(str(filename))
+        assert "gtn_active_games" in filename.read_text()
+
+    # Ensure the HTTP endpoint serves the text format
+    def test_http_endpoint(self):
+        server = metrics.startHttpServer(0)
+        try:
+            port = server.server_address[1]
+            url = f"http://127.0.0.1:{port}/metrics"
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+                content_type = response.headers["Content-Type"]
+        finally:
+            server.shutdown()
+        assert "gtn_guess_seconds_count" in body
+        assert content_type.startswith("text/plain")
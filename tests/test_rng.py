@@ -0,0 +1,118 @@
+from collections import Counter
+
+import pytest
+
+from engine import ScriptedIO
+from game import Game, runOptimalSim
+from rng import AnswerStream, deriveSeed
+from simulation import sampleOptimalSim
+from stat_manager import StatManager
+import simulation
+
+
+class TestAnswerStream:
+    # Ensure the same seed replays the same answers
+    def test_reproducible(self):
+        first = list(AnswerStream(7).answers(1, 1000, 5000))
+        second = list(AnswerStream(7).answers(1, 1000, 5000))
+        assert first == second
+        assert first != list(AnswerStream(8).answers(1, 1000, 5000))
+
+    # Ensure answers stay in range and cover it evenly
+    @pytest.mark.parametrize("start, end", [(1, 1), (1, 10), (-5, 250),
+                                            (1, 70000), (0, 2 ** 32 - 1)])
+    def test_in_range(self, start, end):
+        stream = AnswerStream(3, batch_size=64)
+        answers = list(stream.answers(start, end, 1000))
+        assert all(start <= answer <= end for answer in answers)
+
+    # Ensure small ranges are roughly uniform
+    def test_uniform(self):
+        counts = Counter(AnswerStream(11).answers(1, 10, 100000))
+        assert set(counts) == set(range(1, 11))
+        assert all(9000 < count < 11000 for count in counts.values())
+
+    # Ensure big-int ranges use the exact slow path
+    def test_big_int_range(self):
+        stream = AnswerStream(5)
+        answers = list(stream.answers(1, 10 ** 300, 50))
+        assert all(1 <= answer <= 10 ** 300 for answer in answers)
+        assert len(set(answers)) == 50
+
+    # Ensure switching ranges doesn't mix up their batches
+    def test_interleaved_ranges(self):
+        stream = AnswerStream(2)
+        for _ in range(100):
+            assert 1 <= stream.randint(1, 10) <= 10
+            assert 500 <= stream.randint(500, 600) <= 600
+
+    # Ensure spawned streams are independent and reproducible
+    def test_spawn(self):
+        children = AnswerStream(9).spawn(3)
+        assert [child.seed for child in children] == \
+            [deriveSeed(9, index) for index in range(3)]
+        assert len({child.seed for child in children}) == 3
+        draws = [list(child.answers(1, 10 ** 6, 10)) for child in children]
+        assert draws[0] != draws[1] != draws[2]
+
+    # Ensure an unseeded stream records the seed it picked
+    def test_random_root_seed(self):
+        stream = AnswerStream()
+        replay = AnswerStream(stream.seed)
+        assert list(stream.answers(1, 100, 20)) == \
+            list(replay.answers(1, 100, 20))
+
+    # Ensure bad arguments are rejected
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            AnswerStream(1, batch_size=0)
+        with pytest.raises(ValueError):
+            AnswerStream(1).randint(5, 4)
+
+
+class TestSeededGames:
+    # Ensure seeded games get the same answers on every run
+    def test_seeded_game_answers(self, tmp_path):
+        def playedAnswers(seed):
+            game = Game(StatManager(), io=ScriptedIO(["1"] * 50),
+                        rng=AnswerStream(seed))
+            game.SAVEFILE_NAME = str(tmp_path / "persistent")
+            answers = []
+            for _ in range(10):
+                game.playGame()
+                answers.append(game.io.output[-3].split()[3].rstrip("."))
+            return answers
+
+        assert playedAnswers(4) == playedAnswers(4)
+
+    # Ensure the optimal sim draws its answer from the given stream
+    def test_seeded_optimal_sim(self):
+        expected = AnswerStream(6).randint(1, 10 ** 20)
+        assert runOptimalSim(1, 10 ** 20, ScriptedIO(()),
+                             AnswerStream(6)) == \
+            sum(1 for _ in simulation.iterOptimalSim(1, 10 ** 20, expected))
+
+    # Ensure the menu's sim draws from the game's stream too
+    def test_seeded_menu_sim(self):
+        def simAnswer(seed):
+            game = Game(StatManager(), io=ScriptedIO(["1", "1000"]),
+                        rng=AnswerStream(seed))
+            game.setupSim()
+            return game.io.output[1]
+
+        expected = AnswerStream(3).randint(1, 1000)
+        assert simAnswer(3) == f"The bot is looking for {expected}."
+
+    # Ensure sampled sims don't depend on the number of workers
+    def test_sampled_sim_workers(self, monkeypatch):
+        monkeypatch.setattr(simulation, "SAMPLE_SHARD_SIZE", 300)
+        single = sampleOptimalSim(1, 10 ** 9, 1000, seed=12, workers=1)
+        pooled = sampleOptimalSim(1, 10 ** 9, 1000, seed=12, workers=2)
+        assert single.total == 1000
+        assert single.histogram == pooled.histogram
+        assert single.max <= 30
+
+    # Ensure sampled sims reject empty ranges
+    def test_sampled_sim_invalid_range(self):
+        with pytest.raises(ValueError):
+            sampleOptimalSim(10, 1, 100, seed=1)
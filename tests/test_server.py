@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+
+from event_log import EventLogWriter, iterGames
+from server import GameServer
+from stat_journal import JournaledStatManager
+from stat_manager import StatManager
+import util
+
+
+async def readUntil(reader, *texts: str):
+    lines = []
+    while True:
+        line = (await reader.readline()).decode()
+        lines.append(line.strip())
+        if any(text in line for text in texts) or not line:
+            return lines
+
+
+async def playScriptedGame(port: int, guesses):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await readUntil(reader, "Commands")
+    writer.write(b"play\n")
+    await readUntil(reader, "Enter a number")
+    responses = []
+    for guess in guesses:
+        writer.write(f"{guess}\n".encode())
+        responses.extend(
+            await readUntil(reader, "Guesses remaining", "Thanks")
+        )
+    writer.write(b"quit\n")
+    await readUntil(reader, "Goodbye")
+    writer.close()
+    return responses
+
+
+def runServer(server: GameServer, client):
+    async def scenario():
+        await server.start()
+        try:
+            return await client(server)
+        finally:
+            await server.stop()
+
+    return asyncio.run(scenario())
+
+
+class TestServer:
+    # Ensure concurrent sessions share one StatManager
+    def test_sessions_share_stats(self, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 3)
+        stat_manager = StatManager()
+        server = GameServer(stat_manager, port=0)
+
+        async def client(server):
+            return await asyncio.gather(*[
+                playScriptedGame(server.port, [5, 3]) for _ in range(20)
+            ])
+
+        results = runServer(server, client)
+        assert all("You guessed it!" in r for r in results)
+        assert stat_manager.wins == 20
+        assert stat_manager.num_easy_wins == 20
+        assert stat_manager.num_guesses == 40
+
+    # Ensure idle sessions are closed after the timeout
+    def test_session_timeout(self):
+        server = GameServer(StatManager(), port=0, session_timeout=0.05)
+
+        async def client(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                           server.port)
+            lines = await readUntil(reader, "timed out")
+            writer.close()
+            return lines
+
+        assert "Session timed out." in runServer(server, client)
+
+    # Ensure many idle connections can be held at once
+    def test_many_idle_sessions(self):
+        server = GameServer(StatManager(), port=0)
+
+        async def client(server):
+            connections = [
+                await asyncio.open_connection("127.0.0.1", server.port)
+                for _ in range(300)
+            ]
+            await asyncio.sleep(0.05)
+            active = server.active_sessions
+            for _, writer in connections:
+                writer.close()
+            return active
+
+        assert runServer(server, client) == 300
+
+    # Ensure stats are written to the save file when the server stops
+    def test_saves_on_stop(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 1)
+        save_file = tmp_path / "persistent"
+        server = GameServer(StatManager(), port=0, save_file=str(save_file))
+
+        async def client(server):
+            return await playScriptedGame(server.port, [1])
+
+        runServer(server, client)
+        assert json.loads(save_file.read_text())["wins"] == 1
+
+    # Ensure the server carries on from an existing save
+    def test_loads_save_on_start(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 1)
+        save_file = tmp_path / "persistent"
+        saved = StatManager()
+        saved.wins = 42
+        saved.save(str(save_file))
+        server = GameServer(StatManager(), port=0, save_file=str(save_file))
+
+        async def client(server):
+            return await playScriptedGame(server.port, [1])
+
+        runServer(server, client)
+        assert json.loads(save_file.read_text())["wins"] == 43
+
+    # Ensure journaled stats are saved through their journal
+    def test_journaled_saves(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 1)
+        save_file = tmp_path / "persistent"
+        JournaledStatManager().save(str(save_file))
+        stat_manager = JournaledStatManager(flush_interval=0)
+        server = GameServer(stat_manager, port=0, save_file=str(save_file))
+
+        async def client(server):
+            return await playScriptedGame(server.port, [1])
+
+        runServer(server, client)
+        stat_manager.close()
+        assert os.path.getsize(stat_manager.journalName()) > 0
+        loaded = JournaledStatManager()
+        loaded.load(str(save_file))
+        assert loaded.wins == 1
+
+    # Ensure a failed periodic save doesn't end periodic saving
+    def test_save_loop_survives_errors(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setattr("engine.randint", lambda start, end: 1)
+        save_file = tmp_path / "persistent"
+        write = util.writeFileAtomic
+        failures = []
+
+        def flakyWrite(filename, data):
+            if not failures:
+                failures.append(filename)
+                raise OSError("disk full")
+            return write(filename, data)
+
+        monkeypatch.setattr(util, "writeFileAtomic", flakyWrite)
+        server = GameServer(StatManager(), port=0, save_file=str(save_file),
+                            save_interval=0.01)
+
+        async def client(server):
+            await playScriptedGame(server.port, [1])
+            for _ in range(100):
+                if save_file.exists():
+                    break
+                await asyncio.sleep(0.01)
+            assert not server.save_task.done()
+            return json.loads(save_file.read_text())["wins"]
+
+        assert runServer(server, client) == 1
+        assert failures
+        assert "disk full" in capsys.readouterr().out
+
+    # Ensure a save that can't be read is never written over
+    def test_keeps_unreadable_save(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 1)
+        save_file = tmp_path / "persistent"
+        save_file.write_text("{not json")
+        server = GameServer(StatManager(), port=0, save_file=str(save_file))
+
+        async def client(server):
+            return await playScriptedGame(server.port, [1])
+
+        runServer(server, client)
+        assert save_file.read_text() == "{not json"
+
+    # Ensure games played on the server are recorded in the event log
+    def test_event_log(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 3)
+        log_file = str(tmp_path / "games.log")
+        event_log = EventLogWriter(log_file)
+        server = GameServer(StatManager(), port=0, event_log=event_log)
+
+        async def client(server):
+            return await playScriptedGame(server.port, [5, 3])
+
+        runServer(server, client)
+        event_log.close()
+        record, = iterGames(log_file)
+        assert (record.answer, record.guesses) == (3, [5, 3])
@@ -0,0 +1,135 @@
+import io
+import random
+from collections import Counter
+
+import pytest
+
+from bot import GuessBot
+from game import runOptimalSim
+from simulation import (SimSummary, answerHistogram, iterOptimalSim,
+                        simulateAllAnswers, simulateSharded)
+import game
+
+
+def countBotGuesses(start_num: int, end_num: int, answer: int):
+    bot = GuessBot(start_num, end_num)
+    bot_guess = bot.getNextGuess()
+    num_guesses = 1
+    while bot_guess != answer:
+        if bot_guess > answer:
+            bot.setUpperBound(bot_guess - 1)
+        else:
+            bot.setLowerBound(bot_guess + 1)
+        bot_guess = bot.getNextGuess()
+        num_guesses += 1
+
+    return num_guesses
+
+
+def bruteForceHistogram(start_num: int, end_num: int):
+    return Counter(
+        countBotGuesses(start_num, end_num, answer)
+        for answer in range(start_num, end_num + 1)
+    )
+
+
+class TestSimulation:
+    # Ensure the closed-form histogram matches playing every answer
+    @pytest.mark.parametrize("start_num,end_num", [
+        (1, 2), (1, 10), (1, 100), (1, 1000), (-37, 58), (5, 6), (0, 1023)
+    ])
+    def test_histogram_matches_brute_force(self, start_num, end_num):
+        expected = bruteForceHistogram(start_num, end_num)
+        assert answerHistogram(start_num, end_num) == expected
+
+    # Ensure partial answer windows only count the answers inside them
+    def test_partial_answer_window(self):
+        for _ in range(200):
+            start_num = random.randint(-50, 50)
+            end_num = start_num + random.randint(1, 300)
+            answer_start = random.randint(start_num, end_num)
+            answer_end = random.randint(answer_start, end_num)
+            expected = Counter(
+                countBotGuesses(start_num, end_num, answer)
+                for answer in range(answer_start, answer_end + 1)
+            )
+            histogram = answerHistogram(start_num, end_num,
+                                        answer_start, answer_end)
+            assert histogram == expected
+
+    # Ensure summary statistics are computed from the histogram
+    def test_summary_stats(self):
+        summary = simulateAllAnswers(1, 10)
+        brute = bruteForceHistogram(1, 10)
+        assert summary.total == 10
+        assert summary.max == max(brute)
+        assert summary.mean == sum(d * c for d, c in brute.items()) / 10
+        assert summary.percentile(100) == summary.max
+        assert summary.percentile(0) == min(brute)
+
+    # Ensure huge ranges resolve without touching every answer
+    def test_huge_range(self):
+        summary = simulateAllAnswers(1, 10 ** 18)
+        assert summary.total == 10 ** 18
+        assert summary.max == (10 ** 18).bit_length()
+        assert summary.percentile(99) <= summary.max
+        assert simulateAllAnswers(1, 10 ** 400).percentile(50) > 0
+
+    # Ensure merging partial summaries adds their histograms
+    def test_merge(self):
+        merged = SimSummary(answerHistogram(1, 100, 1, 40))
+        merged.merge(SimSummary(answerHistogram(1, 100, 41, 100)))
+        assert merged.histogram == answerHistogram(1, 100)
+
+    # Ensure sharded runs merge back into the single-process result
+    @pytest.mark.parametrize("workers,chunk_size",
+                             [(1, 7), (2, 13), (3, None)])
+    def test_sharded_matches_single(self, workers, chunk_size):
+        progress_calls = []
+        summary = simulateSharded(
+            1, 500, workers=workers, chunk_size=chunk_size,
+            progress=lambda done, total: progress_calls.append((done, total))
+        )
+        assert summary.histogram == answerHistogram(1, 500)
+        assert progress_calls[-1][0] == progress_calls[-1][1]
+        assert len(progress_calls) == progress_calls[-1][1]
+
+    # Ensure huge ranges can be sharded across processes
+    def test_sharded_huge_range(self):
+        summary = simulateSharded(1, 10 ** 10, workers=2)
+        assert summary.histogram == answerHistogram(1, 10 ** 10)
+
+    # Ensure bad shard sizes are rejected
+    def test_sharded_invalid_chunk(self):
+        with pytest.raises(ValueError):
+            simulateSharded(1, 10, chunk_size=0)
+
+    # Ensure the streamed guesses are the ones the bot would make
+    @pytest.mark.parametrize("answer", [1, 7, 50, 99, 100])
+    def test_iter_optimal_sim(self, answer):
+        guesses = list(iterOptimalSim(1, 100, answer))
+        assert guesses[-1] == answer
+        assert len(guesses) == countBotGuesses(1, 100, answer)
+
+    # Ensure the generator is lazy, so huge ranges can be cut short
+    def test_iter_optimal_sim_stops_early(self):
+        steps = iterOptimalSim(1, 10 ** 1000, 1)
+        assert next(steps) == (1 + 10 ** 1000) // 2
+        assert next(steps) < (1 + 10 ** 1000) // 2
+        steps.close()
+
+    # Ensure answers outside the range are rejected
+    def test_iter_optimal_sim_invalid_answer(self):
+        with pytest.raises(ValueError):
+            next(iterOptimalSim(1, 10, 11))
+
+    # Ensure runOptimalSim streams its report to the given sink
+    def test_run_optimal_sim_output(self, monkeypatch):
+        monkeypatch.setattr(game, "randint", lambda start, end: 3)
+        out = io.StringIO()
+        assert runOptimalSim(1, 10, out) == countBotGuesses(1, 10, 3)
+        assert out.getvalue() == (
+            "The bot is looking for 3.\n"
+            "The bot guessed the correct answer in 3 guesses.\n\n"
+            "It's guess order is: [5, 2, 3]\n\n"
+        )
@@ -0,0 +1,73 @@
+from fractions import Fraction
+
+import pytest
+
+from solver import (Solver, botStats, exhaustiveSolve,
+                    optimalExpectedGuesses, optimalWinProbability)
+
+
+class TestSolver:
+    # Ensure closed forms agree with trying every guess on small ranges
+    @pytest.mark.parametrize("range_size", range(1, 40))
+    @pytest.mark.parametrize("chances", range(0, 7))
+    def test_closed_form_matches_dp(self, range_size, chances):
+        found, guesses = exhaustiveSolve(range_size, chances)
+        total = guesses + (range_size - found) * chances
+        assert optimalWinProbability(range_size, chances) == \
+            Fraction(found, range_size)
+        assert optimalExpectedGuesses(range_size, chances) == \
+            Fraction(total, range_size)
+
+    # Ensure the bisecting bot is optimal for every budget
+    @pytest.mark.parametrize("range_size", [1, 2, 10, 100, 1000, 777])
+    def test_bot_is_optimal(self, range_size):
+        for chances in range(0, 12):
+            found, _ = botStats(range_size, chances)
+            assert Fraction(found, range_size) == \
+                optimalWinProbability(range_size, chances)
+
+    # Ensure the built-in difficulties are fully winnable
+    @pytest.mark.parametrize("range_size,chances",
+                             [(10, 5), (100, 7), (1000, 10)])
+    def test_difficulties_winnable(self, range_size, chances):
+        assert Solver().solve(range_size, chances).win_probability == 1
+        assert Solver().solve(range_size, chances - 3).win_probability < 1
+
+    # Ensure huge ranges solve without materializing anything
+    def test_huge_range(self):
+        result = Solver().solve(10 ** 18, 40)
+        assert result.win_probability == Fraction(2 ** 40 - 1, 10 ** 18)
+        assert result.bot_win_probability == result.win_probability
+        assert Solver().solve(10 ** 18, 60).win_probability == 1
+
+    # Ensure the table persists to disk and is reused
+    def test_cache_round_trip(self, tmp_path):
+        cache_file = str(tmp_path / "solver_cache.json")
+        solver = Solver(cache_file)
+        expected = solver.solve(1000, 9)
+        solver.saveCache()
+
+        reloaded = Solver(cache_file)
+        assert (1000, 9) in reloaded.table
+        result = reloaded.solve(1000, 9)
+        assert result.to_json() == expected.to_json()
+        assert not reloaded.dirty
+
+    # Ensure a cache in the wrong shape starts an empty table
+    @pytest.mark.parametrize("contents", [
+        "[]", "5", '{"a,b": ["1", "1", "1", "1"]}', '{"10": []}',
+        '{"10,3": ["x", "1", "1", "1"]}', '{"10,3": ["1/0", "1", "1", "1"]}',
+        '{"10,3": ["1"]}', '{"10,3": 7}', '{"10,3": [null, 1, 1, 1]}',
+        "\xff"
+    ])
+    def test_bad_cache(self, tmp_path, contents):
+        cache_file = tmp_path / "solver_cache.json"
+        cache_file.write_text(contents, encoding="latin-1")
+        solver = Solver(str(cache_file))
+        assert solver.table == {}
+        assert solver.solve(10, 3).to_json() == \
+            Solver().solve(10, 3).to_json()
+
+    def test_invalid_input(self):
+        with pytest.raises(ValueError):
+            Solver().solve(0, 3)
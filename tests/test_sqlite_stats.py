@@ -0,0 +1,83 @@
+import json
+import os.path
+
+import pytest
+
+import game_exceptions
+from game import Game
+from sqlite_stats import (LEGACY_BACKUP_SUFFIX, SqliteStatManager,
+                          StatStore, isSqliteFile)
+from stat_manager import StatManager
+
+
+class TestSqliteStats:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.filename = str(tmp_path / "persistent")
+
+    # Ensure a profile saves and loads back through the database
+    def test_round_trip(self):
+        sm = SqliteStatManager("alice")
+        sm.wins, sm.num_guesses, sm.num_med_wins = 3, 17, 2
+        sm.save(self.filename)
+        assert isSqliteFile(self.filename)
+
+        loaded = SqliteStatManager("alice")
+        assert loaded.load(self.filename)
+        assert loaded.to_json() == sm.to_json()
+
+    # Ensure different players keep separate counters in one file
+    def test_multiple_profiles(self):
+        alice = SqliteStatManager("alice")
+        bob = SqliteStatManager("bob")
+        alice.wins = 1
+        bob.losses = 4
+        alice.save(self.filename)
+        bob.save(self.filename)
+
+        with StatStore(self.filename) as store:
+            assert store.getPlayers() == ["alice", "bob"]
+            assert store.getProfile("alice")["wins"] == 1
+            assert store.getProfile("bob")["losses"] == 4
+
+    # Ensure bulk upserts insert new rows and update existing ones
+    def test_bulk_upsert(self):
+        profiles = {f"player{i}": dict(StatManager().to_json(), wins=i)
+                    for i in range(5000)}
+        with StatStore(self.filename) as store:
+            store.upsertProfiles(profiles)
+            profiles["player7"]["wins"] = 700
+            store.upsertProfiles({"player7": profiles["player7"]})
+            assert len(store.getPlayers()) == 5000
+            assert store.getProfile("player4999")["wins"] == 4999
+            assert store.getProfile("player7")["wins"] == 700
+
+    # Ensure a missing player raises the usual save format error
+    def test_unknown_player(self):
+        SqliteStatManager("alice").save(self.filename)
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            SqliteStatManager("nobody").load(self.filename)
+
+    # Ensure existing JSON saves are migrated in place on first use
+    def test_migrates_legacy_json(self):
+        legacy = StatManager().to_json()
+        legacy["wins"] = 9
+        with open(self.filename, "w", encoding="utf-8") as f:
+            json.dump(legacy, f)
+
+        sm = SqliteStatManager()
+        sm.load(self.filename)
+        assert sm.wins == 9
+        assert isSqliteFile(self.filename)
+        assert os.path.exists(f"{self.filename}{LEGACY_BACKUP_SUFFIX}")
+
+    # Ensure Game's save and load keep working with the database
+    def test_game_save_and_load(self):
+        game = Game(SqliteStatManager())
+        game.SAVEFILE_NAME = self.filename
+        game.win()
+        game.saveGameStats()
+        game.stat_manager.wins = 0
+        game.loadGameStats()
+        assert game.stat_manager.wins == 1
+        assert game.HAS_SAVE
@@ -0,0 +1,96 @@
+import json
+import random
+
+import pytest
+
+import game_exceptions
+from stat_aggregates import GameAggregates, P2Quantile, RollingWindow
+from stat_manager import StatManager
+
+
+class TestStatAggregates:
+    # Ensure the streaming quantile estimate lands close to the real one
+    @pytest.mark.parametrize("quantile", [0.5, 0.95])
+    def test_p2_quantile(self, quantile):
+        rng = random.Random(3)
+        values = [rng.uniform(0, 100) for _ in range(20000)]
+        estimate = P2Quantile(quantile)
+        for value in values:
+            estimate.add(value)
+        exact = sorted(values)[int(quantile * (len(values) - 1))]
+        assert abs(estimate.value() - exact) < 1.5
+
+    # Ensure the rolling window matches a naive recount of recent games
+    def test_rolling_window(self):
+        rng = random.Random(5)
+        window = RollingWindow(50)
+        games = []
+        for _ in range(537):
+            game = (rng.random() < 0.3, rng.randint(1, 10))
+            games.append(game)
+            window.add(*game)
+            recent = games[-50:]
+            wins = sum(won for won, _ in recent)
+            assert window.winRate() == wins / len(recent)
+            mean = sum(guesses for _, guesses in recent) / len(recent)
+            assert window.meanGuesses() == pytest.approx(mean)
+
+    # Ensure per-difficulty percentiles come from the histograms
+    def test_guess_percentiles(self):
+        aggregates = GameAggregates()
+        for num_guesses in range(1, 101):
+            aggregates.recordGame("hard", True, num_guesses % 10 + 1, 1.0)
+        assert aggregates.guessPercentile("hard", 50) == 5
+        assert aggregates.guessPercentile("hard", 95) == 10
+        assert aggregates.guessPercentile("easy", 95) == 0
+
+    # Ensure memory stays bounded however many games are recorded
+    def test_bounded(self):
+        aggregates = GameAggregates(window_size=100)
+        for i in range(20000):
+            aggregates.recordGame("easy", i % 2 == 0, i % 5 + 1, i / 100)
+        assert len(aggregates.histograms["easy"]) == 5
+        assert aggregates.window.filled == 100
+        assert len(aggregates.window.outcomes) == 100
+
+    # Ensure aggregates survive a save and load
+    def test_persisted(self, tmp_path):
+        filename = str(tmp_path / "persistent")
+        sm = StatManager()
+        for i in range(30):
+            sm.recordGame("medium", i % 3 == 0, i % 7 + 1, 0.5 * i)
+        sm.save(filename)
+
+        loaded = StatManager()
+        loaded.load(filename)
+        assert loaded.to_json() == sm.to_json()
+        assert "aggregates" not in loaded.__dict__
+
+    # Ensure a full window saves as a few kilobytes and round trips
+    def test_window_packed(self):
+        window = RollingWindow()
+        for i in range(2500):
+            window.add(i % 3 == 0, i % 11 + 1)
+        data = window.to_json()
+        assert len(json.dumps(data)) < 3000
+        again = RollingWindow.fromJson(data)
+        assert list(again.chronological()) == list(window.chronological())
+
+        window.add(True, 300)
+        assert RollingWindow.fromJson(window.to_json()).guess_sum == \
+            window.guess_sum
+
+    # Ensure windows saved as plain lists still load
+    def test_window_list_format(self):
+        window = RollingWindow.fromJson({"size": 4, "outcomes": [1, 0, 1],
+                                         "guesses": [2, 5, 3]})
+        assert list(window.chronological()) == [(1, 2), (0, 5), (1, 3)]
+
+    # Ensure broken aggregates are reported like any bad save
+    def test_malformed_aggregates(self, tmp_path):
+        save_file = tmp_path / "persistent"
+        stat_data = StatManager().to_json()
+        stat_data["aggregates"] = {"games": 1}
+        save_file.write_text(json.dumps(stat_data))
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            StatManager().load(str(save_file))
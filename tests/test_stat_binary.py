@@ -0,0 +1,87 @@
+import pytest
+
+import game_exceptions
+from stat_binary import (BinaryStatManager, ProfileTable, decodeProfiles,
+                         encodeProfiles, isBinarySave, loadProfiles,
+                         saveProfiles)
+from stat_manager import StatManager
+
+
+def makeProfiles(num_players: int):
+    return {f"player{i}": {**StatManager().counters(), "wins": i,
+                           "num_hard_wins": 2 ** 40 + i}
+            for i in range(num_players)}
+
+
+class TestStatBinary:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.filename = str(tmp_path / "profiles")
+
+    # Ensure many profiles round trip through the binary file
+    def test_round_trip(self):
+        profiles = makeProfiles(500)
+        saveProfiles(self.filename, profiles)
+        assert isBinarySave(self.filename)
+        loaded = loadProfiles(self.filename)
+        assert len(loaded) == 500
+        assert dict(loaded) == profiles
+
+    # Ensure the layout is fixed size per profile
+    def test_compact_layout(self):
+        small = encodeProfiles(makeProfiles(10))
+        large = encodeProfiles(makeProfiles(20))
+        counters = len(StatManager().counters())
+        names = len("".join(f"\nplayer{i}" for i in range(10, 20)))
+        assert len(large) - len(small) == 10 * counters * 8 + names
+
+    # Ensure tables can be updated and re-encoded in place
+    def test_update_table(self):
+        table = decodeProfiles(encodeProfiles(makeProfiles(3)))
+        table["player1"] = {**table["player1"], "losses": 9}
+        table["newcomer"] = StatManager().counters()
+        decoded = decodeProfiles(table.encode())
+        assert list(decoded) == ["player0", "player1", "player2",
+                                 "newcomer"]
+        assert decoded["player1"]["losses"] == 9
+        assert decoded["player2"] == table["player2"]
+
+    # Ensure files written with other counters map onto the current ones
+    def test_other_counters(self):
+        table = ProfileTable()
+        table.stats = ["wins", "losses", "num_guesses", "num_first_correct",
+                       "num_retired_wins"]
+        table["old"] = {"wins": 3, "losses": 1, "num_guesses": 7,
+                        "num_first_correct": 0, "num_retired_wins": 2}
+        loaded = decodeProfiles(table.encode())["old"]
+        assert loaded == {**StatManager().counters(), "wins": 3,
+                          "losses": 1, "num_guesses": 7}
+
+    # Ensure truncated or foreign files are rejected
+    def test_corrupt_file(self):
+        data = encodeProfiles(makeProfiles(5))
+        for broken in (data[:-3], data[:10], b"JSON" + data[4:], b""):
+            with pytest.raises(game_exceptions.InvalidSaveFormatError):
+                decodeProfiles(broken)
+
+    # Ensure player names can't break the layout
+    def test_invalid_names(self):
+        with pytest.raises(ValueError):
+            encodeProfiles({"two\nlines": StatManager().counters()})
+        with pytest.raises(ValueError):
+            encodeProfiles({"": StatManager().counters()})
+
+    # Ensure each player saves and loads only their own counters
+    def test_stat_manager_profiles(self):
+        alice = BinaryStatManager("alice")
+        bob = BinaryStatManager("bob")
+        alice.wins, bob.losses = 2, 5
+        alice.save(self.filename)
+        bob.save(self.filename)
+
+        loaded = BinaryStatManager("alice")
+        assert loaded.load(self.filename)
+        assert loaded.counters() == alice.counters()
+        assert list(loadProfiles(self.filename)) == ["alice", "bob"]
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            BinaryStatManager("carol").load(self.filename)
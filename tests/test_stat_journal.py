@@ -0,0 +1,148 @@
+import json
+import weakref
+
+import pytest
+
+from stat_journal import JournaledStatManager, SEQ_KEY
+from stat_manager import StatManager
+import stat_journal
+
+
+def playGames(sm: StatManager, filename: str, num_games: int):
+    for i in range(num_games):
+        sm.num_guesses += 3
+        if i % 2:
+            sm.wins += 1
+            sm.num_easy_wins += 1
+        else:
+            sm.losses += 1
+        sm.save(filename)
+
+
+class TestStatJournal:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.filename = str(tmp_path / "persistent")
+
+    # Ensure snapshot plus journal rebuilds the saved counters
+    def test_round_trip(self):
+        sm = JournaledStatManager(flush_count=4, compact_entries=10)
+        playGames(sm, self.filename, 27)
+        sm.close()
+
+        loaded = JournaledStatManager()
+        assert loaded.load(self.filename)
+        assert loaded.to_json() == sm.to_json()
+
+    # Ensure pending deltas only reach disk once a flush is due
+    def test_write_behind(self):
+        sm = JournaledStatManager(flush_count=5, flush_interval=3600)
+        # The first save writes a snapshot, the next four stay pending
+        playGames(sm, self.filename, 5)
+        loaded = JournaledStatManager()
+        loaded.load(self.filename)
+        assert loaded.losses == 1 and loaded.wins == 0
+
+        playGames(sm, self.filename, 1)
+        loaded.load(self.filename)
+        assert loaded.to_json() == sm.to_json()
+
+    # Ensure a torn final line from a crash is ignored and cut off
+    def test_torn_journal_tail(self):
+        sm = JournaledStatManager(flush_count=1)
+        playGames(sm, self.filename, 3)
+        expected = sm.to_json()
+        with open(sm.journalName(), "a", encoding="utf-8") as f:
+            f.write('{"seq":99,"d":{"wi')
+
+        loaded = JournaledStatManager(flush_count=1)
+        loaded.load(self.filename)
+        assert loaded.to_json() == expected
+
+        playGames(loaded, self.filename, 2)
+        reloaded = JournaledStatManager()
+        reloaded.load(self.filename)
+        assert reloaded.to_json() == loaded.to_json()
+
+    # Ensure entries already folded into the snapshot aren't applied twice
+    def test_crash_between_compact_and_truncate(self):
+        sm = JournaledStatManager(flush_count=1)
+        playGames(sm, self.filename, 3)
+        with open(sm.journalName(), encoding="utf-8") as f:
+            journal = f.read()
+        sm.compact()
+        # Put the old journal back as if truncating never happened
+        with open(sm.journalName(), "w", encoding="utf-8") as f:
+            f.write(journal)
+
+        loaded = JournaledStatManager()
+        loaded.load(self.filename)
+        assert loaded.to_json() == sm.to_json()
+
+    # Ensure snapshots stay readable by the regular StatManager
+    def test_snapshot_compatible(self):
+        sm = JournaledStatManager()
+        playGames(sm, self.filename, 5)
+        sm.compact()
+        with open(self.filename, encoding="utf-8") as f:
+            assert json.load(f)[SEQ_KEY] == sm.seq
+        plain = StatManager()
+        plain.load(self.filename)
+        assert plain.to_json() == sm.to_json()
+
+    # Ensure journaling writes fewer bytes per game than full rewrites
+    def test_fewer_bytes_per_game(self, tmp_path):
+        num_games = 200
+        sm = JournaledStatManager()
+        playGames(sm, self.filename, num_games)
+        sm.close()
+
+        plain_file = tmp_path / "plain"
+        plain = StatManager()
+        playGames(plain, str(plain_file), 1)
+        full_save_bytes = plain_file.stat().st_size
+
+        assert sm.bytes_written / num_games < full_save_bytes / 2
+
+    # Ensure aggregates recorded after the snapshot survive a reload
+    def test_aggregates_journaled(self):
+        sm = JournaledStatManager(flush_count=1)
+        sm.save(self.filename)
+        for i in range(12):
+            sm.recordGame("hard" if i % 3 else "easy", i % 2 == 0, i + 1,
+                          0.25 * i)
+            sm.save(self.filename)
+        sm.close()
+
+        loaded = JournaledStatManager()
+        loaded.load(self.filename)
+        assert loaded.aggregates.games == 12
+        assert loaded.to_json() == sm.to_json()
+
+    # Ensure closed managers aren't kept alive for the exit hook
+    def test_closed_manager_released(self):
+        sm = JournaledStatManager()
+        assert sm in stat_journal.OPEN_MANAGERS
+        sm.save(self.filename)
+        sm.close()
+        assert sm not in stat_journal.OPEN_MANAGERS
+        manager = weakref.ref(sm)
+        del sm
+        assert manager() is None
+
+    # Ensure prepared saves leave the disk alone until they are written
+    def test_prepare_save(self):
+        sm = JournaledStatManager(flush_count=1)
+        sm.wins += 1
+        writes = sm.prepareSave(self.filename)
+        sm.wins += 5
+        writes += sm.prepareSave(self.filename)
+        sm.wins += 100
+        with pytest.raises(FileNotFoundError):
+            open(self.filename)
+        for write in writes:
+            write()
+
+        loaded = JournaledStatManager()
+        loaded.load(self.filename)
+        assert loaded.wins == 6
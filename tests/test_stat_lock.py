@@ -0,0 +1,116 @@
+import json
+import multiprocessing
+import sys
+
+import pytest
+
+from engine import ScriptedIO
+from game import Game
+from stat_lock import LockedStatManager
+from stat_manager import StatManager
+import game_exceptions
+
+NUM_WORKERS = 8
+COMMITS_PER_WORKER = 100
+
+
+def commitGames(filename: str, num_commits: int):
+    sm = LockedStatManager()
+    for i in range(num_commits):
+        sm.wins += 1
+        sm.num_guesses += 2
+        if i % 4 == 0:
+            sm.num_first_correct += 1
+        sm.save(filename)
+
+
+def get_stat_data(filename: str) -> dict:
+    with open(filename, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TestStatLock:
+    # Ensure forked workers sharing a save file never lose an increment
+    @pytest.mark.skipif(sys.platform == "win32", reason="needs fork")
+    def test_concurrent_commits(self, tmp_path):
+        filename = str(tmp_path / "persistent")
+        ctx = multiprocessing.get_context("fork")
+        workers = [
+            ctx.Process(target=commitGames,
+                        args=(filename, COMMITS_PER_WORKER))
+            for _ in range(NUM_WORKERS)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+
+        stat_data = get_stat_data(filename)
+        total_commits = NUM_WORKERS * COMMITS_PER_WORKER
+        assert stat_data["wins"] == total_commits
+        assert stat_data["num_guesses"] == 2 * total_commits
+        assert stat_data["num_first_correct"] == total_commits // 4
+
+    # Ensure a save picks up commits made by other managers in between
+    def test_merges_other_writers(self, tmp_path):
+        filename = str(tmp_path / "persistent")
+        first = LockedStatManager()
+        second = LockedStatManager()
+        first.wins += 2
+        first.save(filename)
+        second.losses += 1
+        second.save(filename)
+        first.wins += 1
+        first.save(filename)
+
+        assert get_stat_data(filename)["wins"] == 3
+        assert get_stat_data(filename)["losses"] == 1
+        assert first.losses == 1
+
+    # Ensure the merged file stays loadable by the plain StatManager
+    def test_plain_load(self, tmp_path):
+        filename = str(tmp_path / "persistent")
+        sm = LockedStatManager()
+        sm.num_hard_wins += 5
+        sm.save(filename)
+        plain = StatManager()
+        plain.load(filename)
+        assert plain.num_hard_wins == 5
+
+    # Ensure unreadable saves are never written over
+    @pytest.mark.parametrize("contents", ['{"wins": ', '{"version": 99}',
+                                          '{"version": 2, "wins": "a"}'])
+    def test_keeps_unreadable_save(self, tmp_path, contents):
+        save_file = tmp_path / "persistent"
+        save_file.write_text(contents)
+        sm = LockedStatManager()
+        sm.wins += 1
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            sm.save(str(save_file))
+        assert save_file.read_text() == contents
+
+        game = Game(sm, io=ScriptedIO(()))
+        game.SAVEFILE_NAME = str(save_file)
+        game.saveGameStats()
+        assert "Save successful!" not in game.io.output
+        assert save_file.read_text() == contents
+
+    # Ensure the aggregates block isn't dropped by merged saves
+    def test_keeps_aggregates(self, tmp_path):
+        filename = str(tmp_path / "persistent")
+        plain = StatManager()
+        plain.recordGame("easy", True, 3, 1.0)
+        plain.save(filename)
+        locked = LockedStatManager()
+        locked.wins += 1
+        locked.save(filename)
+        assert get_stat_data(filename)["aggregates"] == \
+            plain.aggregates.to_json()
+
+        locked.recordGame("hard", False, 10, 2.0)
+        locked.save(filename)
+        loaded = StatManager()
+        loaded.load(filename)
+        assert loaded.aggregates.games == 1
+        assert "hard" in loaded.aggregates.histograms
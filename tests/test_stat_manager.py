@@ -5,7 +5,8 @@ import pytest
 import json
 
 import game_exceptions
-from stat_manager import StatManager
+from stat_manager import (SAVE_VERSION, StatManager, compileSchema,
+                          currentSchema, parseSave)
 
 TEMP_DIR_NAME = "test_root"
 
@@ -123,3 +124,43 @@ class TestStatManager:
         sm = self.stat_manager
         with pytest.raises(game_exceptions.InvalidSaveFormatError):
             sm.load(getFilePath(MALFORMED_GOOD_JSON_NAME, test_files))
+
+    # Ensure saves record the format version
+    def test_save_has_version(self, tmp_path):
+        filename = str(tmp_path / "persistent")
+        self.stat_manager.save(filename)
+        assert get_stat_data(filename)["version"] == SAVE_VERSION
+
+    # Ensure unversioned saves are migrated
+    def test_migrate_unversioned(self):
+        stat_data = parseSave({**StatManager().counters(), "wins": 4})
+        assert stat_data["wins"] == 4
+        assert "version" not in stat_data
+
+    # Ensure unknown fields are stripped, or rejected when strict
+    def test_unknown_fields(self, tmp_path):
+        filename = tmp_path / "persistent"
+        filename.write_text(json.dumps({**StatManager().to_json(),
+                                        "cheat_mode": True}))
+        assert self.stat_manager.load(str(filename))
+        assert "cheat_mode" not in self.stat_manager.__dict__
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            self.stat_manager.load(str(filename), strict=True)
+
+    # Ensure saves from a newer or unknown version are rejected
+    @pytest.mark.parametrize("version", [SAVE_VERSION + 1, 0, "2", None])
+    def test_bad_version(self, version):
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            parseSave({**StatManager().counters(), "version": version})
+
+    # Ensure saves that aren't JSON objects are rejected
+    def test_not_an_object(self):
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            parseSave([1, 2, 3])
+
+    # Ensure the validator is compiled once, not per load
+    def test_schema_compiled_once(self):
+        assert currentSchema() is currentSchema()
+        hits = compileSchema.cache_info().hits
+        parseSave(StatManager().to_json())
+        assert compileSchema.cache_info().hits == hits + 1
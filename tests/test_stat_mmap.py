@@ -0,0 +1,115 @@
+import json
+import os
+
+import pytest
+
+import game_exceptions
+from difficulty import DIFFICULTIES, WIN_STATS, registerDifficulty
+from engine import ScriptedIO
+from game import Game
+from stat_manager import StatManager
+from stat_mmap import FILE_SIZE, MAX_COUNTERS, MappedStatManager
+
+
+class TestStatMmap:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.counter_file = str(tmp_path / "persistent.counters")
+        self.filename = str(tmp_path / "persistent")
+        self.managers = []
+        yield
+        for sm in self.managers:
+            sm.close()
+
+    def open(self, **kwargs):
+        sm = MappedStatManager(self.counter_file, **kwargs)
+        self.managers.append(sm)
+        return sm
+
+    # Ensure increments land in the file without saving
+    def test_in_place_updates(self):
+        sm = self.open()
+        sm.wins += 2
+        sm.num_guesses += 9
+        sm.num_hard_wins = 4
+        assert sm.__dict__ == {}
+        assert os.path.getsize(self.counter_file) == FILE_SIZE
+
+        reopened = self.open()
+        assert reopened.counters() == {**StatManager().counters(),
+                                       "wins": 2, "num_guesses": 9,
+                                       "num_hard_wins": 4}
+
+    # Ensure save writes a regular JSON snapshot atomically
+    def test_snapshot_export(self):
+        sm = self.open()
+        sm.losses = 3
+        sm.save(self.filename)
+        assert not os.path.exists(f"{self.filename}.tmp")
+        with open(self.filename, "r", encoding="utf-8") as f:
+            assert json.load(f) == sm.to_json()
+
+        plain = StatManager()
+        plain.load(self.filename)
+        assert plain.counters() == sm.counters()
+
+    # Ensure snapshots are throttled by the snapshot interval
+    def test_snapshot_interval(self):
+        sm = self.open(snapshot_interval=3600)
+        sm.save(self.filename)
+        sm.wins += 1
+        sm.save(self.filename)
+        with open(self.filename, "r", encoding="utf-8") as f:
+            assert json.load(f)["wins"] == 0
+        assert self.open().wins == 1
+
+    # Ensure a JSON snapshot can be restored into the mapping
+    def test_load_snapshot(self):
+        plain = StatManager()
+        plain.wins, plain.num_med_wins = 7, 3
+        plain.save(self.filename)
+        sm = self.open()
+        assert sm.load(self.filename)
+        assert sm.counters() == plain.counters()
+        assert self.open().counters() == plain.counters()
+
+    # Ensure the game plays with mapped counters
+    def test_game_uses_mapped_counters(self, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 6)
+        game = Game(self.open(), io=ScriptedIO(["5", "8", "6"]))
+        game.SAVEFILE_NAME = self.filename
+        game.playGame()
+        reopened = self.open()
+        assert (reopened.wins, reopened.num_easy_wins,
+                reopened.num_guesses) == (1, 1, 3)
+
+    # Ensure counters added after the file was made get a new slot
+    def test_new_counter(self):
+        self.open().wins = 5
+        registerDifficulty("expert", 1, 10 ** 6, 20)
+        try:
+            sm = self.open()
+            sm.num_expert_wins += 1
+            assert self.open().counters()["num_expert_wins"] == 1
+            assert sm.wins == 5
+        finally:
+            del DIFFICULTIES["expert"]
+            del WIN_STATS["num_expert_wins"]
+
+    # Ensure files that aren't counter files are rejected
+    def test_invalid_file(self):
+        with open(self.counter_file, "wb") as f:
+            f.write(b"{}" * FILE_SIZE)
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            self.open()
+        with open(self.counter_file, "wb") as f:
+            f.write(b"short")
+        with pytest.raises(game_exceptions.InvalidSaveFormatError):
+            self.open()
+
+    # Ensure closing twice is harmless
+    def test_close(self):
+        sm = self.open()
+        sm.close()
+        sm.close()
+        assert MAX_COUNTERS >= len(StatManager().counters())
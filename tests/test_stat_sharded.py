@@ -0,0 +1,149 @@
+import json
+import threading
+
+from engine import ScriptedIO
+from game import Game
+from stat_manager import StatManager
+from stat_sharded import ShardedStatManager
+
+NUM_THREADS = 8
+
+
+def runThreads(target, num_threads: int = NUM_THREADS):
+    # Starts every thread behind a barrier so they really overlap
+    barrier = threading.Barrier(num_threads)
+
+    def run(index):
+        barrier.wait()
+        target(index)
+
+    threads = [threading.Thread(target=run, args=(index,))
+               for index in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestStatSharded:
+    # Ensure concurrent increments are never lost
+    def test_stress_increments(self):
+        sm = ShardedStatManager()
+        num_ops = 20000
+
+        def work(index):
+            for _ in range(num_ops):
+                sm.num_guesses += 1
+                sm.wins += 1
+                sm.losses -= 1
+
+        runThreads(work)
+        assert sm.num_guesses == NUM_THREADS * num_ops
+        assert sm.wins == NUM_THREADS * num_ops
+        assert sm.losses == -NUM_THREADS * num_ops
+
+    # Ensure increment() only writes this thread's cell
+    def test_increment_skips_total(self, monkeypatch):
+        sm = ShardedStatManager()
+        num_ops = 2000
+
+        def noTotal(self, stat):
+            raise AssertionError("increment read the total")
+
+        def work(index):
+            for _ in range(num_ops):
+                sm.increment("num_guesses")
+                sm.increment("wins", 2)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(ShardedStatManager, "total", noTotal)
+            runThreads(work)
+        assert sm.num_guesses == NUM_THREADS * num_ops
+        assert sm.wins == 2 * NUM_THREADS * num_ops
+
+    # Ensure reads while other threads count stay consistent
+    def test_reads_during_increments(self):
+        sm = ShardedStatManager()
+        num_ops = 5000
+        seen = []
+
+        def work(index):
+            if index == 0:
+                for _ in range(num_ops):
+                    seen.append(sm.counters()["wins"])
+                    sm.to_json()
+            else:
+                for _ in range(num_ops):
+                    sm.wins += 1
+
+        runThreads(work)
+        assert seen == sorted(seen)
+        assert sm.wins == (NUM_THREADS - 1) * num_ops
+
+    # Ensure games on many threads share one manager and save file
+    def test_concurrent_games(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("engine.randint", lambda start, end: 6)
+        sm = ShardedStatManager()
+        filename = str(tmp_path / "persistent")
+        num_games = 25
+
+        def work(index):
+            for _ in range(num_games):
+                game = Game(sm, io=ScriptedIO(["5", "8", "6"]))
+                game.SAVEFILE_NAME = filename
+                game.playGame()
+
+        runThreads(work)
+        total = NUM_THREADS * num_games
+        counters = sm.counters()
+        assert (counters["wins"], counters["num_easy_wins"],
+                counters["num_guesses"]) == (total, total, 3 * total)
+        assert sm.aggregates.games == total
+
+        sm.save(filename)
+        with open(filename, "r", encoding="utf-8") as f:
+            assert json.load(f) == sm.to_json()
+        plain = StatManager()
+        plain.load(filename)
+        assert plain.counters() == counters
+
+    # Ensure finished threads are folded into the base counts
+    def test_fold_dead_threads(self):
+        sm = ShardedStatManager()
+
+        def work(index):
+            sm.num_first_correct += index
+
+        runThreads(work)
+        sm.wins += 1
+        assert len(sm.cells) == NUM_THREADS + 1
+        assert sm.counters()["num_first_correct"] == sum(range(NUM_THREADS))
+        assert len(sm.cells) == 1
+        assert sm.num_first_correct == sum(range(NUM_THREADS))
+        assert sm.wins == 1
+
+    # Ensure assigning a counter sets it instead of adding to it
+    def test_assignment_resets(self):
+        sm = ShardedStatManager()
+        runThreads(lambda index: setattr(sm, "wins", sm.wins + 2), 4)
+        sm.wins = 3
+        assert sm.wins == 3
+        sm.wins += 1
+        assert sm.wins == 4
+
+        other = ShardedStatManager()
+        other.wins = sm.wins
+        other.wins += sm.num_guesses + 1
+        assert (other.wins, sm.wins) == (5, 4)
+
+    # Ensure saves restore into the sharded manager
+    def test_load(self, tmp_path):
+        filename = str(tmp_path / "persistent")
+        plain = StatManager()
+        plain.wins, plain.num_hard_wins = 7, 2
+        plain.save(filename)
+
+        sm = ShardedStatManager()
+        sm.wins += 5
+        assert sm.load(filename)
+        assert sm.counters() == plain.counters()
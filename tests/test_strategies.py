@@ -0,0 +1,96 @@
+import random
+from collections import Counter
+from fractions import Fraction
+
+import pytest
+
+from simulation import answerHistogram
+from strategies import (BiasedSplitStrategy, BisectionStrategy,
+                        HistoryAwareStrategy, RandomPickStrategy,
+                        TernarySplitStrategy, evaluateStrategy,
+                        playStrategy)
+
+
+class TestStrategies:
+    # Ensure closed-form scores match playing every answer one by one
+    @pytest.mark.parametrize("strategy", [
+        BisectionStrategy(), BiasedSplitStrategy(), TernarySplitStrategy(),
+        BiasedSplitStrategy(Fraction(9, 10)), BiasedSplitStrategy(0)
+    ])
+    def test_exact_matches_played_games(self, strategy):
+        expected = Counter(playStrategy(strategy, 1, 300, answer)
+                           for answer in range(1, 301))
+        report = evaluateStrategy(strategy, 1, 300, chances=9)
+        assert report.exact
+        assert report.summary.histogram == expected
+
+    # Ensure bisection scores agree with the bot simulation
+    def test_bisection_matches_bot(self):
+        report = evaluateStrategy(BisectionStrategy(), 1, 1000, chances=10)
+        assert report.summary.histogram == answerHistogram(1, 1000)
+        assert report.win_rate == 1.0
+        assert report.worst_case == 10
+
+    # Ensure only games finished within the chances count as wins
+    def test_win_rate_budget(self):
+        report = evaluateStrategy(TernarySplitStrategy(), 1, 1000,
+                                  chances=10)
+        assert 0 < report.win_rate < 1
+        assert report.mean > evaluateStrategy(BisectionStrategy(), 1, 1000,
+                                              chances=10).mean
+
+    # Ensure huge ranges are scored without playing games
+    def test_huge_range(self):
+        report = evaluateStrategy(BiasedSplitStrategy(), 1, 10 ** 30,
+                                  chances=100)
+        assert report.summary.total == 10 ** 30
+
+    # Ensure random strategies are sampled reproducibly
+    def test_random_strategy_sampled(self):
+        first = evaluateStrategy(RandomPickStrategy(1), 1, 10 ** 6, 20,
+                                 samples=500, seed=4)
+        second = evaluateStrategy(RandomPickStrategy(1), 1, 10 ** 6, 20,
+                                  samples=500, seed=4)
+        assert not first.exact
+        assert first.summary.total == 500
+        assert first.summary.histogram == second.summary.histogram
+
+    # Ensure the history-aware strategy learns a skewed answer host
+    def test_history_aware_learns_skew(self):
+        rng = random.Random(2)
+        history_aware = HistoryAwareStrategy()
+        bisection = BisectionStrategy()
+        learned = plain = 0
+        for game in range(1500):
+            answer = rng.randint(1, 50)
+            guesses = playStrategy(history_aware, 1, 1000, answer)
+            if game >= 500:
+                learned += guesses
+                plain += playStrategy(bisection, 1, 1000, answer)
+        assert learned < plain
+
+    # Ensure guesses are the exact weighted median of what was learned
+    def test_history_aware_median(self):
+        rng = random.Random(5)
+        strategy = HistoryAwareStrategy(5)
+        strategy.weights = [3, 1, 7, 1, 2]
+        for start_num, end_num in [(1, 3), (1, 17), (-20, 981)]:
+            strategy.newGame(start_num, end_num)
+            range_size = end_num - start_num + 1
+            # Every number's share of its bucket's weight
+            bucket_of = [max(bucket for bucket in range(5)
+                             if bucket * range_size // 5 <= offset)
+                         for offset in range(range_size)]
+            sizes = Counter(bucket_of)
+            share = [Fraction(strategy.weights[bucket], sizes[bucket])
+                     for bucket in bucket_of]
+            for _ in range(50):
+                low = rng.randint(start_num, end_num)
+                high = rng.randint(low, end_num)
+                half = sum(share[low - start_num:high - start_num + 1]) / 2
+                mass = 0
+                for median in range(low, high + 1):
+                    mass += share[median - start_num]
+                    if mass >= half:
+                        break
+                assert strategy.nextGuess(low, high) == median
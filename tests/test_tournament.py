@@ -0,0 +1,116 @@
+import csv
+import json
+
+import pytest
+
+from strategies import BisectionStrategy, RandomPickStrategy, playStrategy
+from tournament import (ENTRANTS, OVERALL, Leaderboard, Standing,
+                        main, runTournament, tournamentShard)
+import tournament
+
+FAST_ENTRANTS = ["bisection", "ternary_split", "random_pick",
+                 "noisy_player", "invalid_player"]
+
+
+class TestTournament:
+    # Ensure standings count games the way StatManager does
+    def test_standing_from_histogram(self):
+        standing = Standing.fromHistogram("bot", "easy",
+                                          {1: 2, 3: 5, 6: 3}, 5)
+        assert (standing.games, standing.wins, standing.num_guesses,
+                standing.num_first_correct) == (10, 7, 2 + 15 + 15, 2)
+        assert standing.win_rate == 0.7
+        assert standing.mean_guesses == 3.2
+
+    # Ensure games stop once the chances run out
+    def test_play_with_limit(self):
+        assert playStrategy(BisectionStrategy(), 1, 1000, 1, 3) == 4
+        assert playStrategy(BisectionStrategy(), 1, 1000, 500, 3) == 1
+        assert playStrategy(RandomPickStrategy(0), 1, 10 ** 30, 7, 5) == 6
+
+    # Ensure the leaderboard keeps only the best k, ties by order
+    def test_leaderboard_top_k(self):
+        board = Leaderboard("mean_guesses", "easy", 3)
+        for order, guesses in enumerate([9, 4, 7, 4, 2, 8]):
+            board.offer(Standing(f"bot{order}", "easy", 1, 1, guesses),
+                        order)
+        assert [standing.entrant for standing in board.ranking()] == \
+            ["bot4", "bot1", "bot3"]
+        assert len(board.heap) == 3
+        with pytest.raises(ValueError):
+            Leaderboard("speed", "easy")
+        with pytest.raises(ValueError):
+            Leaderboard("win_rate", "easy", 0)
+
+    # Ensure every entrant faces the same answers
+    def test_same_answers(self, monkeypatch):
+        monkeypatch.setattr(tournament, "SHARD_SIZE", 100)
+        shards = list(tournament.tournamentShards(FAST_ENTRANTS, ["easy"],
+                                                  250, 0))
+        assert len(shards) == 3 * len(FAST_ENTRANTS)
+        answer_seeds = {}
+        for (entrant, difficulty), shard in shards:
+            answer_seeds.setdefault(shard[5], set()).add(entrant)
+            assert shard[1:4] == (1, 10, 5)
+        assert list(answer_seeds.values()) == [set(FAST_ENTRANTS)] * 3
+        assert tournamentShard("bisection", 1, 100, 7, 500, 11, 1) == \
+            tournamentShard("bisection", 1, 100, 7, 500, 11, 2)
+
+    # Ensure rankings match sorting every standing
+    def test_leaderboards_match_sort(self):
+        result = runTournament(FAST_ENTRANTS, num_games=300, workers=1,
+                               k=3)
+        for difficulty in [*result.difficulties, OVERALL]:
+            standings = [result.standings[entrant, difficulty]
+                         for entrant in FAST_ENTRANTS]
+            expected = sorted(standings,
+                              key=lambda standing: standing.win_rate,
+                              reverse=True)[:3]
+            assert result.leaderboard("win_rate", difficulty).ranking() == \
+                expected
+        assert result.standings["bisection", "hard"].win_rate == 1.0
+        overall = result.standings["random_pick", OVERALL]
+        assert overall.games == 300 * len(result.difficulties)
+
+    # Ensure results are identical for any number of workers
+    def test_workers_reproducible(self, monkeypatch):
+        monkeypatch.setattr(tournament, "SHARD_SIZE", 100)
+        single = runTournament(FAST_ENTRANTS, ["medium"], 250, seed=4,
+                               workers=1)
+        pooled = runTournament(FAST_ENTRANTS, ["medium"], 250, seed=4,
+                               workers=2)
+        assert single.to_json() == pooled.to_json()
+
+    # Ensure unknown entrants and difficulties are rejected
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            runTournament(["nobody"], workers=1)
+        with pytest.raises(ValueError):
+            runTournament(["bisection"], ["impossible"], workers=1)
+        with pytest.raises(ValueError):
+            runTournament(["bisection", "bisection"], workers=1)
+        with pytest.raises(ValueError):
+            runTournament(["bisection"], num_games=0, workers=1)
+        assert "history_aware" in ENTRANTS
+
+    # Ensure results export to JSON and CSV
+    def test_export(self, tmp_path, capsys):
+        json_file = str(tmp_path / "results.json")
+        csv_file = str(tmp_path / "results.csv")
+        assert main(["--entrants", "bisection", "random_player",
+                     "--difficulty", "easy", "--games", "50",
+                     "--workers", "1", "--json", json_file,
+                     "--csv", csv_file]) == 0
+        assert "win_rate (easy)" in capsys.readouterr().out
+
+        with open(json_file, "r", encoding="utf-8") as f:
+            results = json.load(f)
+        assert [(standing["entrant"], standing["difficulty"])
+                for standing in results["standings"]] == \
+            [("bisection", "easy"), ("bisection", OVERALL),
+             ("random_player", "easy"), ("random_player", OVERALL)]
+        with open(csv_file, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == len(results["leaderboards"]) == 12
+        assert rows[0]["entrant"] == "bisection"
+        assert rows[0]["rank"] == "1"
@@ -0,0 +1,376 @@
+# Built-in modules
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import heapq
+import json
+import os
+import random
+
+# Custom modules
+from difficulty import DIFFICULTIES
+from load_test import MODELS
+from rng import AnswerStream, deriveSeed
+from strategies import (BiasedSplitStrategy, BisectionStrategy,
+                        GuessStrategy, HistoryAwareStrategy,
+                        NoisyBisectionStrategy, RandomPickStrategy,
+                        TernarySplitStrategy, playStrategy)
+
+DEFAULT_GAMES = 10000
+DEFAULT_TOP_K = 10
+OVERALL = "overall"
+CSV_FIELDS = ("metric", "rank", "entrant", "difficulty", "games", "wins",
+              "win_rate", "mean_guesses", "num_first_correct")
+# Games per stream. Fixed so results don't depend on worker count
+SHARD_SIZE = 5000
+
+
+class PlayerStrategy(GuessStrategy):
+    # Lets a load test player model play without the menu or the game
+    # loop. Lines the game would reject are skipped, they don't use up
+    # a chance there either.
+    def __init__(self, model, seed: int = None):
+        self.model = model
+        self.rng = random.Random(seed)
+        self.name = f"{model.name} player"
+        self.start_num = self.end_num = 0
+
+    def newGame(self, start_num: int, end_num: int):
+        self.start_num = start_num
+        self.end_num = end_num
+
+    def nextGuess(self, low: int, high: int):
+        while True:
+            line = self.model.guess(self.rng, low, high, self.start_num,
+                                    self.end_num)
+            try:
+                guess = int(line)
+            except ValueError:
+                continue
+            if self.start_num <= guess <= self.end_num:
+                return guess
+
+
+def playerEntrant(model_class):
+    return lambda seed: PlayerStrategy(model_class(), seed)
+
+
+# Everyone who can be entered, built from a seed inside each worker so
+# only the name has to be sent to it
+ENTRANTS = {
+    "bisection": lambda seed: BisectionStrategy(),
+    "biased_split": lambda seed: BiasedSplitStrategy(),
+    "ternary_split": lambda seed: TernarySplitStrategy(),
+    "random_pick": lambda seed: RandomPickStrategy(seed),
+    "noisy_bisection": lambda seed: NoisyBisectionStrategy(0.3, seed),
+    "history_aware": lambda seed: HistoryAwareStrategy(),
+    **{f"{name}_player": playerEntrant(model_class)
+       for name, model_class in MODELS.items()},
+}
+
+
+def tournamentShard(entrant: str, start_num: int, end_num: int,
+                    chances: int, num_games: int, answer_seed: int,
+                    player_seed: int):
+    # Guesses each answer took, chances + 1 for a lost game. Every
+    # entrant gets the same answer_seed for a shard, so they all face
+    # the same answers in the same order.
+    strategy = ENTRANTS[entrant](player_seed)
+    histogram = Counter()
+    for answer in AnswerStream(answer_seed).answers(start_num, end_num,
+                                                    num_games):
+        histogram[playStrategy(strategy, start_num, end_num, answer,
+                               chances)] += 1
+    return dict(histogram)
+
+
+class Standing:
+    # One entrant's results on one difficulty, counted the way
+    # StatManager counts a player's games
+    def __init__(self, entrant: str, difficulty: str, games: int = 0,
+                 wins: int = 0, num_guesses: int = 0,
+                 num_first_correct: int = 0):
+        self.entrant = entrant
+        self.difficulty = difficulty
+        self.games = games
+        self.wins = wins
+        self.num_guesses = num_guesses
+        self.num_first_correct = num_first_correct
+
+    @classmethod
+    def fromHistogram(cls, entrant: str, difficulty: str, histogram: dict,
+                      chances: int):
+        standing = cls(entrant, difficulty)
+        for num_guesses, count in histogram.items():
+            standing.games += count
+            if num_guesses <= chances:
+                standing.wins += count
+            # A lost game used up every chance
+            standing.num_guesses += min(num_guesses, chances) * count
+            if num_guesses == 1:
+                standing.num_first_correct += count
+        return standing
+
+    def merge(self, other: 'Standing'):
+        self.games += other.games
+        self.wins += other.wins
+        self.num_guesses += other.num_guesses
+        self.num_first_correct += other.num_first_correct
+        return self
+
+    @property
+    def win_rate(self):
+        if self.games == 0:
+            return 0.0
+        return self.wins / self.games
+
+    @property
+    def mean_guesses(self):
+        if self.games == 0:
+            return 0.0
+        return self.num_guesses / self.games
+
+    def to_json(self):
+        return {
+            "entrant": self.entrant,
+            "difficulty": self.difficulty,
+            "games": self.games,
+            "wins": self.wins,
+            "win_rate": self.win_rate,
+            "mean_guesses": self.mean_guesses,
+            "num_first_correct": self.num_first_correct
+        }
+
+
+# Leaderboard metric -> (value of a standing, whether higher is better)
+METRICS = {
+    "win_rate": (lambda standing: standing.win_rate, True),
+    "mean_guesses": (lambda standing: standing.mean_guesses, False),
+    "first_guess_wins": (lambda standing: standing.num_first_correct, True),
+}
+
+
+class Leaderboard:
+    # The best k standings by one metric. Standings are offered once, as
+    # soon as they are final, and kept in a size-k min-heap whose root is
+    # the current last place, so each offer is O(log k) and nothing is
+    # ever re-sorted until the ranking is read.
+    def __init__(self, metric: str, difficulty: str,
+                 k: int = DEFAULT_TOP_K):
+        if metric not in METRICS:
+            raise ValueError(f"unknown metric {metric!r}")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.metric = metric
+        self.difficulty = difficulty
+        self.k = k
+        self.heap = []
+
+    def offer(self, standing: Standing, order: int):
+        # Ties go to the entrant with the lower order
+        value, higher_is_better = METRICS[self.metric]
+        score = value(standing)
+        entry = (score if higher_is_better else -score, -order, standing)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def ranking(self):
+        entries = sorted(self.heap, key=lambda entry: entry[:2],
+                         reverse=True)
+        return [entry[2] for entry in entries]
+
+    def rows(self):
+        return [{"metric": self.metric, "rank": rank, **standing.to_json()}
+                for rank, standing in enumerate(self.ranking(), 1)]
+
+    def __str__(self):
+        value, _ = METRICS[self.metric]
+        lines = [f"{self.metric} ({self.difficulty})"]
+        for rank, standing in enumerate(self.ranking(), 1):
+            score = value(standing)
+            score_str = f"{score:.4f}" if isinstance(score, float) else \
+                str(score)
+            lines.append(f"  {rank}. {standing.entrant}: {score_str}")
+        return "\n".join(lines)
+
+
+class TournamentResult:
+    def __init__(self, entrants: list, difficulties: list, games: int,
+                 seed: int, k: int):
+        self.entrants = entrants
+        self.difficulties = difficulties
+        self.games = games
+        self.seed = seed
+        self.order = {entrant: index for index, entrant in
+                      enumerate(entrants)}
+        # (entrant, difficulty) -> Standing, difficulty OVERALL included
+        self.standings = {}
+        self.leaderboards = {
+            (metric, difficulty): Leaderboard(metric, difficulty, k)
+            for difficulty in [*difficulties, OVERALL]
+            for metric in METRICS
+        }
+
+    def finish(self, standing: Standing):
+        self.standings[standing.entrant, standing.difficulty] = standing
+        for metric in METRICS:
+            self.leaderboards[metric, standing.difficulty].offer(
+                standing, self.order[standing.entrant])
+
+    def leaderboard(self, metric: str, difficulty: str = OVERALL):
+        return self.leaderboards[metric, difficulty]
+
+    def rows(self):
+        rows = []
+        for leaderboard in self.leaderboards.values():
+            rows.extend(leaderboard.rows())
+        return rows
+
+    def to_json(self):
+        return {
+            "entrants": self.entrants,
+            "difficulties": self.difficulties,
+            "games": self.games,
+            "seed": self.seed,
+            # In a fixed order, whichever shards finished first
+            "standings": [self.standings[entrant, difficulty].to_json()
+                          for entrant in self.entrants
+                          for difficulty in [*self.difficulties, OVERALL]],
+            "leaderboards": self.rows()
+        }
+
+    def writeJson(self, filename: str):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    def writeCsv(self, filename: str):
+        rows = self.rows()
+        with open(filename, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def __str__(self):
+        return "\n\n".join(str(leaderboard)
+                           for leaderboard in self.leaderboards.values())
+
+
+def tournamentShards(entrants: list, difficulties: list, num_games: int,
+                     seed: int):
+    # Yields ((entrant, difficulty), shard args). Shard i of a difficulty
+    # draws its answers from the same stream for every entrant.
+    for difficulty_index, name in enumerate(difficulties):
+        difficulty = DIFFICULTIES[name]
+        answers_seed = deriveSeed(seed, difficulty_index)
+        for index, shard_start in enumerate(range(0, num_games,
+                                                  SHARD_SIZE)):
+            answer_seed = deriveSeed(answers_seed, index)
+            for entrant_index, entrant in enumerate(entrants):
+                yield (entrant, name), (
+                    entrant, difficulty.range_start, difficulty.range_end,
+                    difficulty.chances,
+                    min(SHARD_SIZE, num_games - shard_start), answer_seed,
+                    deriveSeed(answer_seed, entrant_index + 1)
+                )
+
+
+def iterShardResults(shards: list, workers: int):
+    # Yields (key, histogram) as shards finish, in any order
+    if workers == 1 or len(shards) <= 1:
+        for key, shard in shards:
+            yield key, tournamentShard(*shard)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(tournamentShard, *shard): key
+                   for key, shard in shards}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def runTournament(entrants=None, difficulties=None,
+                  num_games: int = DEFAULT_GAMES, seed: int = 0,
+                  workers: int = None, k: int = DEFAULT_TOP_K):
+    # Every entrant plays num_games on every difficulty without the menu
+    # or the game loop. A standing goes on the leaderboards the moment
+    # its last shard is in, and an entrant's overall standing once all
+    # of its difficulties are.
+    entrants = list(ENTRANTS if entrants is None else entrants)
+    difficulties = list(DIFFICULTIES if difficulties is None
+                        else difficulties)
+    for entrant in entrants:
+        if entrant not in ENTRANTS:
+            raise ValueError(f"unknown entrant {entrant!r}")
+    for name in difficulties:
+        if name not in DIFFICULTIES:
+            raise ValueError(f"unknown difficulty {name!r}")
+    if len(set(entrants)) != len(entrants):
+        raise ValueError("entrants must not repeat")
+    if num_games < 1:
+        raise ValueError("num_games must be at least 1")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    result = TournamentResult(entrants, difficulties, num_games, seed, k)
+    shards = list(tournamentShards(entrants, difficulties, num_games, seed))
+    shards_left = Counter(key for key, _ in shards)
+    difficulties_left = Counter({entrant: len(difficulties)
+                                 for entrant in entrants})
+    partial = {}
+    overall = {entrant: Standing(entrant, OVERALL) for entrant in entrants}
+
+    for key, histogram in iterShardResults(shards, workers):
+        entrant, name = key
+        standing = Standing.fromHistogram(entrant, name, histogram,
+                                          DIFFICULTIES[name].chances)
+        if key in partial:
+            standing = partial[key].merge(standing)
+        partial[key] = standing
+        shards_left[key] -= 1
+        if shards_left[key]:
+            continue
+
+        result.finish(partial.pop(key))
+        overall[entrant].merge(standing)
+        difficulties_left[entrant] -= 1
+        if not difficulties_left[entrant]:
+            result.finish(overall.pop(entrant))
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Play strategies and player models against the same "
+                    "answers and rank them"
+    )
+    parser.add_argument("--entrants", nargs="*", choices=list(ENTRANTS),
+                        default=list(ENTRANTS))
+    parser.add_argument("--difficulty", nargs="*",
+                        choices=list(DIFFICULTIES),
+                        default=list(DIFFICULTIES))
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES,
+                        help="Games per entrant on each difficulty")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--csv", help="Write the leaderboards to this file")
+    args = parser.parse_args(argv)
+
+    result = runTournament(args.entrants, args.difficulty, args.games,
+                           args.seed, args.workers, args.top)
+    print(result)
+    if args.json:
+        result.writeJson(args.json)
+    if args.csv:
+        result.writeCsv(args.csv)
+
+    return 0
+
+
+if __name__ == "__main__":
+    main()
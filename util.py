@@ -1,5 +1,30 @@
+import os
+import sys
 
-def printWithBorder(message: str):
-    print("----------------------------------------------------")
-    print(message)
-    print("----------------------------------------------------\n")
+BORDER = "----------------------------------------------------"
+
+
+def formatWithBorder(message: str):
+    return f"{BORDER}\n{message}\n{BORDER}\n"
+
+
+def printWithBorder(message: str, out=None):
+    # One write per block, to any file-like sink
+    if out is None:
+        out = sys.stdout
+    out.write(f"{formatWithBorder(message)}\n")
+
+
+def writeFileAtomic(filename: str, data: str):
+    # Write to a temp file in the same directory, then rename over the
+    # target so a crash never leaves a half-written file behind
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    temp_name = f"{filename}.tmp"
+    with open(temp_name, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_name, filename)
+
+    return len(data)